@@ -18,7 +18,7 @@ import logging
 import random
 from typing import Any, Callable, Tuple, Iterable, Generic, TypeVar, Optional
 
-from fate.arch.computing.partitioners import get_partitioner_by_type
+from fate.arch.computing.partitioners import get_partitioner_by_type, is_modulo_partitioner
 from fate.arch.computing.serdes import get_serdes_by_type
 from fate.arch.trace import auto_trace
 from fate.arch.trace import computing_profile as _compute_info
@@ -228,6 +228,13 @@ class KVTable(Generic[K, V]):
     def _destroy(self):
         raise NotImplementedError(f"{self.__class__.__name__}.destroy")
 
+    def _resize_partitions(self, num_partitions: int) -> Optional["KVTable"]:
+        """
+        change the partition number by merging or splitting partitions instead of shuffling keys,
+        backends without such a path return None and the caller falls back to a shuffle
+        """
+        return None
+
     @property
     def key_serdes(self):
         if self._key_serdes is None:
@@ -605,6 +612,19 @@ class KVTable(Generic[K, V]):
 
         if key_serdes_type is None:
             key_serdes_type = self.key_serdes_type
+
+        # modulo partitioners keep partition `i` of n partitions inside partition `i % m` of m partitions when
+        # m divides n, so a table can be resized partition by partition without a full shuffle
+        if (
+            self.partitioner_type == partitioner_type
+            and self.key_serdes_type == key_serdes_type
+            and is_modulo_partitioner(partitioner_type)
+            and (num_partitions % self.num_partitions == 0 or self.num_partitions % num_partitions == 0)
+        ):
+            resized = self._resize_partitions(num_partitions)
+            if resized is not None:
+                return resized
+
         if key_serdes_type != self.key_serdes_type:
             output_key_serdes = get_serdes_by_type(key_serdes_type)
         else:
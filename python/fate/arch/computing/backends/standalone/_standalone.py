@@ -14,18 +14,21 @@
 #  limitations under the License.
 #
 
+import errno
 import hashlib
 import itertools
 import logging
 import logging.config
 import os
+import select
 import shutil
 import signal
 import threading
 import time
 import uuid
+from collections import OrderedDict
 from concurrent.futures import ProcessPoolExecutor as Executor
-from contextlib import ExitStack
+from contextlib import ExitStack, contextmanager
 from functools import partial
 from heapq import heapify, heappop, heapreplace
 from operator import is_not
@@ -38,6 +41,13 @@ import lmdb
 
 PartyMeta = Tuple[Literal["guest", "host", "arbiter", "local"], str]
 
+# max number of distinct keys a mapper combines in memory before spilling them to the shuffle env
+SHUFFLE_COMBINE_BUFFER_SIZE = 100_000
+# max number of idle lmdb environments each process keeps open
+ENV_CACHE_SIZE = 128
+# max seconds a federation receiver waits for a notification before checking the status again
+FEDERATION_NOTIFY_TIMEOUT = 0.01
+
 logger = logging.getLogger(__name__)
 
 
@@ -351,7 +361,7 @@ class Table(object):
         self._session._submit_map_reduce_partitions_with_index(
             _do_shuffle_write_func,
             mapper=map_partition_op,
-            reducer=None,
+            reducer=reduce_partition_op,
             input_data_dir=self._data_dir,
             input_num_partitions=self.num_partitions,
             input_name=self._name,
@@ -399,9 +409,67 @@ class Table(object):
                     txn.drop(db)
 
         path = Path(self._data_dir).joinpath(intermediate_namespace, intermediate_name)
+        _env_cache.invalidate(path)
         shutil.rmtree(path, ignore_errors=True)
         return output
 
+    def resize_partitions(
+        self,
+        output_num_partitions,
+        partitioner: Callable[[bytes, int], int],
+        need_cleanup=True,
+        output_name=None,
+        output_namespace=None,
+        output_data_dir=None,
+    ):
+        """
+        merge or split partitions without the shuffle write/read round trip, valid only for partitioners of form
+        `hash(key) % num_partitions` and when one of the partition numbers divides the other
+        """
+        if output_num_partitions % self.num_partitions == 0:
+            # each output partition is filled by exactly one input partition
+            _do_func = _do_split_partitions
+        elif self.num_partitions % output_num_partitions == 0:
+            # each input partition is copied into exactly one output partition
+            _do_func = _do_merge_partitions
+        else:
+            raise ValueError(
+                f"can not resize {self.num_partitions} partitions to {output_num_partitions} without shuffle"
+            )
+        if output_data_dir is None:
+            output_data_dir = self._data_dir
+        if output_name is None:
+            output_name = str(uuid.uuid1())
+        if output_namespace is None:
+            output_namespace = self._namespace
+
+        # noinspection PyProtectedMember
+        self._session._submit_map_reduce_partitions_with_index(
+            _do_func,
+            mapper=None,
+            reducer=None,
+            input_data_dir=self._data_dir,
+            input_num_partitions=self.num_partitions,
+            input_name=self._name,
+            input_namespace=self._namespace,
+            output_data_dir=output_data_dir,
+            output_num_partitions=output_num_partitions,
+            output_name=output_name,
+            output_namespace=output_namespace,
+            output_partitioner=partitioner,
+        )
+        return _create_table(
+            session=self._session,
+            data_dir=output_data_dir,
+            name=output_name,
+            namespace=output_namespace,
+            partitions=output_num_partitions,
+            need_cleanup=need_cleanup,
+            key_serdes_type=self._key_serdes_type,
+            value_serdes_type=self._value_serdes_type,
+            partitioner_type=self._partitioner_type,
+        )
+
     def copy_as(self, name, namespace, need_cleanup=True):
         return self.map_reduce_partitions_with_index(
             map_partition_op=lambda i, x: x,
@@ -565,9 +633,11 @@ class Session(object):
         if not namespace_dir.is_dir():
             return
         if name == "*":
+            _env_cache.invalidate(namespace_dir)
             shutil.rmtree(namespace_dir, True)
             return
         for table in namespace_dir.glob(name):
+            _env_cache.invalidate(table)
             shutil.rmtree(table, True)
 
     def stop(self):
@@ -688,14 +758,22 @@ class Federation(object):
         return federation
 
     def destroy(self):
+        self._meta.close()
         self._session.cleanup(namespace=self._session_id, name="*")
 
     def push_table(self, table, name: str, tag: str, parties: List[PartyMeta]):
+        """
+        one copy of the table is shared by all receivers, it is dropped by the last receiver releasing it
+        """
+        if not parties:
+            return
+        saved_name = str(uuid.uuid1())
+        _table = table.copy_as(name=saved_name, namespace=table.namespace, need_cleanup=False)
+        _shared_key = _serialize_tuple_of_str(_table.name, _table.namespace)
+        self._meta.set_ref_count(_shared_key, len(parties))
         for party in parties:
             _tagged_key = self._federation_object_key(name, tag, self._party, party)
-            saved_name = str(uuid.uuid1())
-            _table = table.copy_as(name=saved_name, namespace=table.namespace, need_cleanup=False)
-            self._meta.set_status(party, _tagged_key, _serialize_tuple_of_str(_table.name, _table.namespace))
+            self._meta.set_status(party, _tagged_key, _shared_key)
 
     def push_bytes(self, v: bytes, name: str, tag: str, parties: List[PartyMeta]):
         for party in parties:
@@ -713,8 +791,8 @@ class Federation(object):
         rtn = []
         for r in results:
             name, namespace = _deserialize_tuple_of_str(self._meta.get_status(r))
-            table: Table = _load_table(
-                session=self._session, data_dir=self._data_dir, name=name, namespace=namespace, need_cleanup=True
+            table: Table = _load_shared_table(
+                session=self._session, data_dir=self._data_dir, name=name, namespace=namespace, meta=self._meta
             )
             rtn.append(table)
             self._meta.ack_status(r)
@@ -791,6 +869,43 @@ def _load_table(session, data_dir: str, name: str, namespace: str, need_cleanup=
     )
 
 
+class _SharedTable(Table):
+    """
+    table received from the standalone federation, the storage is shared by every receiver of the same push and
+    destroying it only releases a reference, the last release drops the storage
+    """
+
+    def __init__(self, meta: "_FederationMetaManager", **kwargs):
+        super().__init__(**kwargs)
+        self._meta = meta
+        self._released = False
+
+    def destroy(self):
+        if self._released:
+            return
+        self._released = True
+        if self._meta.release_ref(_serialize_tuple_of_str(self._name, self._namespace)) <= 0:
+            super().destroy()
+
+
+def _load_shared_table(session, data_dir: str, name: str, namespace: str, meta: "_FederationMetaManager"):
+    table_meta = _TableMetaManager.get_table_meta(data_dir, namespace, name)
+    if table_meta is None:
+        raise RuntimeError(f"table not exist: name={name}, namespace={namespace}")
+    return _SharedTable(
+        meta=meta,
+        session=session,
+        data_dir=data_dir,
+        namespace=namespace,
+        name=name,
+        need_cleanup=True,
+        partitions=table_meta.num_partitions,
+        key_serdes_type=table_meta.key_serdes_type,
+        value_serdes_type=table_meta.value_serdes_type,
+        partitioner_type=table_meta.partitioner_type,
+    )
+
+
 class _TaskInputInfo:
     def __init__(self, data_dir: str, namespace: str, name: str, num_partitions: int):
         self.data_dir = data_dir
@@ -882,7 +997,9 @@ class _ReduceProcess:
         return self.input_info.get_env(pid, write=write)
 
     def input_cursor(self, stack: ExitStack):
-        return stack.enter_context(stack.enter_context(self.as_input_env(self.partition_id).begin()).cursor())
+        return stack.enter_context(
+            stack.enter_context(stack.enter_context(self.as_input_env(self.partition_id)).begin()).cursor()
+        )
 
     def get_reducer(self):
         return self.operator_info.get_reducer()
@@ -997,8 +1114,120 @@ class _BinarySortedMapProcess:
 
 
 def _get_env_with_data_dir(data_dir: str, *args, write=False):
+    """
+    context manager of the cached environment of a table partition, envs are always opened with locking
+    enabled since reader and writer share the same cached env within a process
+    """
     _path = Path(data_dir).joinpath(*args)
-    return _open_env(_path, write=write)
+    return _env_cache.open(_path)
+
+
+class _CachedEnv:
+    def __init__(self, key, env, inode):
+        self.key = key
+        self.env = env
+        self.inode = inode
+        self.ref_count = 0
+        self.evicted = False
+
+
+class _EnvCache:
+    """
+    per process cache of opened lmdb environments keyed by path, so that every op does not pay for an
+    `lmdb.open` per partition. An entry is reopened if its data file was removed or replaced by another process,
+    and idle entries of removed tables are closed so that their files do not linger on disk. Envs in use are
+    closed when the last user releases them.
+    """
+
+    def __init__(self, max_size: int):
+        self._max_size = max_size
+        self._entries: "OrderedDict[str, _CachedEnv]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def open(self, path: Path):
+        entry = self._acquire(path)
+        try:
+            yield entry.env
+        finally:
+            self._release(entry)
+
+    def invalidate(self, path: Path):
+        prefix = path.as_posix()
+        with self._lock:
+            for key in [k for k in self._entries if k == prefix or k.startswith(f"{prefix}/")]:
+                self._drop(key)
+
+    def _acquire(self, path: Path):
+        key = path.as_posix()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry.inode != _get_data_file_inode(path):
+                self._drop(key)
+                entry = None
+            if entry is None:
+                self._drop_stale()
+                env = _open_env(path, write=True)
+                entry = _CachedEnv(key, env, _get_data_file_inode(path))
+                self._entries[key] = entry
+                self._evict()
+            else:
+                self._entries.move_to_end(key)
+            entry.ref_count += 1
+            return entry
+
+    def _release(self, entry: _CachedEnv):
+        with self._lock:
+            entry.ref_count -= 1
+            if entry.ref_count > 0:
+                return
+            if entry.evicted:
+                entry.env.close()
+            elif entry.inode != _get_data_file_inode(Path(entry.key)):
+                # the table was destroyed while in use, holding the env would keep its unlinked files on disk
+                self._drop(entry.key)
+
+    def _drop(self, key):
+        entry = self._entries.pop(key)
+        entry.evicted = True
+        if entry.ref_count == 0:
+            entry.env.close()
+
+    def _drop_stale(self):
+        # idle envs of tables destroyed by other processes still hold their unlinked files open
+        for key in [k for k, entry in self._entries.items() if entry.ref_count == 0]:
+            if self._entries[key].inode != _get_data_file_inode(Path(key)):
+                self._drop(key)
+
+    def _evict(self):
+        if len(self._entries) <= self._max_size:
+            return
+        # least recently used first, envs in use are kept
+        for key in [k for k, entry in self._entries.items() if entry.ref_count == 0]:
+            if len(self._entries) <= self._max_size:
+                break
+            self._drop(key)
+
+
+def _get_data_file_inode(path: Path):
+    try:
+        return os.stat(path.joinpath("data.mdb")).st_ino
+    except FileNotFoundError:
+        return None
+
+
+_env_cache = _EnvCache(ENV_CACHE_SIZE)
+# envs inherited from the parent process must be neither used nor closed in a forked worker
+_inherited_env_caches = []
+
+
+def _reset_env_cache_in_child():
+    global _env_cache
+    _inherited_env_caches.append(_env_cache)
+    _env_cache = _EnvCache(ENV_CACHE_SIZE)
+
+
+os.register_at_fork(after_in_child=_reset_env_cache_in_child)
 
 
 def _open_env(path, write=False):
@@ -1075,6 +1304,10 @@ def _get_shuffle_partition_id(shuffle_source_partition_id: int, shuffle_destinat
 
 
 def _do_mrwi_map_and_shuffle_write(p: _MapReduceProcess):
+    """
+    map and combine values of the same key with the reducer before writing to the shuffle env,
+    at most `SHUFFLE_COMBINE_BUFFER_SIZE` keys are buffered, the buffer is spilled when it is full
+    """
     rtn = p.output_info
     if p.has_partition(p.partition_id):
         with ExitStack() as s:
@@ -1084,11 +1317,28 @@ def _do_mrwi_map_and_shuffle_write(p: _MapReduceProcess):
                 shuffle_partition_id = _get_shuffle_partition_id(p.partition_id, output_partition_id)
                 shuffle_write_txn_map[output_partition_id] = p.get_output_transaction(shuffle_partition_id, s)
 
+            reducer = p.get_reducer()
+            combine_buffer = {}
+            spill_index = 0
+
+            def _spill():
+                nonlocal spill_index
+                for buffered_k_bytes, buffered_v_bytes in combine_buffer.items():
+                    shuffle_write_txn_map[p.get_output_partition_id(buffered_k_bytes)].put(
+                        _serialize_shuffle_write_key(spill_index, buffered_k_bytes), buffered_v_bytes, overwrite=False
+                    )
+                    spill_index += 1
+                combine_buffer.clear()
+
             output_kv_iter = p.get_mapper()(p.partition_id, _generator_from_cursor(cursor))
-            for index, (k_bytes, v_bytes) in enumerate(output_kv_iter):
-                shuffle_write_txn_map[p.get_output_partition_id(k_bytes)].put(
-                    _serialize_shuffle_write_key(index, k_bytes), v_bytes, overwrite=False
-                )
+            for k_bytes, v_bytes in output_kv_iter:
+                if (old := combine_buffer.get(k_bytes)) is None:
+                    if len(combine_buffer) >= SHUFFLE_COMBINE_BUFFER_SIZE:
+                        _spill()
+                    combine_buffer[k_bytes] = v_bytes
+                else:
+                    combine_buffer[k_bytes] = reducer(old, v_bytes)
+            _spill()
     return rtn
 
 
@@ -1137,6 +1387,32 @@ def _do_mrwi_shuffle_read_no_reduce(p: _MapReduceProcess):
     return rtn
 
 
+def _do_split_partitions(p: _MapReduceProcess):
+    rtn = p.output_info
+    if p.has_partition(p.partition_id):
+        with ExitStack() as s:
+            cursor = p.get_input_cursor(s)
+            dst_txn_map = {}
+            for output_partition_id in range(
+                p.partition_id, p.get_output_partition_num(), p.get_input_partition_num()
+            ):
+                dst_txn_map[output_partition_id] = p.get_output_transaction(output_partition_id, s)
+            for k_bytes, v_bytes in cursor:
+                dst_txn_map[p.get_output_partition_id(k_bytes)].put(k_bytes, v_bytes)
+    return rtn
+
+
+def _do_merge_partitions(p: _MapReduceProcess):
+    rtn = p.output_info
+    if p.partition_id < p.get_output_partition_num():
+        with ExitStack() as s:
+            dst_txn = p.get_output_transaction(p.partition_id, s)
+            for input_partition_id in range(p.partition_id, p.get_input_partition_num(), p.get_output_partition_num()):
+                for k_bytes, v_bytes in p.get_input_cursor(s, pid=input_partition_id):
+                    dst_txn.put(k_bytes, v_bytes)
+    return rtn
+
+
 def _do_reduce(p: _ReduceProcess):
     value = None
     with ExitStack() as s:
@@ -1152,17 +1428,23 @@ def _do_reduce(p: _ReduceProcess):
 class _FederationMetaManager:
     STATUS_TABLE_NAME_PREFIX = "__federation_status__"
     OBJECT_TABLE_NAME_PREFIX = "__federation_object__"
+    REF_COUNT_TABLE_NAME = "__federation_ref_count__"
+    NOTIFY_FIFO_NAME_PREFIX = "__federation_notify__"
 
     def __init__(self, data_dir: str, session_id, party: Tuple[str, str]) -> None:
         self.session_id = session_id
         self.party = party
         self._data_dir = data_dir
         self._env = {}
+        self._env_lock = threading.Lock()
+        self._notifier = _FederationNotifier(self._get_notify_fifo_path(party))
 
     def wait_status_set(self, key: bytes) -> bytes:
+        # the notifier is listening before the status is checked, so a status set in between is not missed
+        self._notifier.listen()
         value = self.get_status(key)
         while value is None:
-            time.sleep(0.001)
+            self._notifier.wait(FEDERATION_NOTIFY_TIMEOUT)
             value = self.get_status(key)
         return key
 
@@ -1170,7 +1452,12 @@ class _FederationMetaManager:
         return self._get(self._get_status_table_name(self.party), key)
 
     def set_status(self, party: Tuple[str, str], key: bytes, value: bytes):
-        return self._set(self._get_status_table_name(party), key, value)
+        rtn = self._set(self._get_status_table_name(party), key, value)
+        _FederationNotifier.notify(self._get_notify_fifo_path(party))
+        return rtn
+
+    def close(self):
+        self._notifier.close()
 
     def ack_status(self, key: bytes):
         return self._ack(self._get_status_table_name(self.party), key)
@@ -1184,15 +1471,42 @@ class _FederationMetaManager:
     def ack_object(self, key: bytes):
         return self._ack(self._get_object_table_name(self.party), key)
 
+    def set_ref_count(self, key: bytes, count: int):
+        return self._set(self.REF_COUNT_TABLE_NAME, key, count.to_bytes(4, "big"))
+
+    def release_ref(self, key: bytes) -> int:
+        """
+        decrease the reference count of a shared table and return the remaining count,
+        read and write happen in one write transaction so concurrent receivers never lose an update
+        """
+        env = self._get_env(self.REF_COUNT_TABLE_NAME)
+        with env.begin(write=True) as txn:
+            value = txn.get(key)
+            if value is None:
+                return 0
+            count = int.from_bytes(value, "big") - 1
+            if count <= 0:
+                txn.delete(key)
+            else:
+                txn.put(key, count.to_bytes(4, "big"))
+            return count
+
     def _get_status_table_name(self, party: Tuple[str, str]):
         return f"{self.STATUS_TABLE_NAME_PREFIX}.{party[0]}_{party[1]}"
 
     def _get_object_table_name(self, party: Tuple[str, str]):
         return f"{self.OBJECT_TABLE_NAME_PREFIX}.{party[0]}_{party[1]}"
 
+    def _get_notify_fifo_path(self, party: Tuple[str, str]):
+        return Path(self._data_dir).joinpath(self.session_id, f"{self.NOTIFY_FIFO_NAME_PREFIX}.{party[0]}_{party[1]}")
+
     def _get_env(self, name):
         if name not in self._env:
-            self._env[name] = _get_env_with_data_dir(self._data_dir, self.session_id, name, str(0), write=True)
+            with self._env_lock:
+                if name not in self._env:
+                    self._env[name] = _open_env(
+                        Path(self._data_dir).joinpath(self.session_id, name, str(0)), write=True
+                    )
         return self._env[name]
 
     def _get(self, name: str, key: bytes) -> bytes:
@@ -1211,6 +1525,78 @@ class _FederationMetaManager:
             txn.delete(key)
 
 
+class _FederationNotifier:
+    """
+    wakes up a party waiting for federation status with a named pipe, senders write one byte to the pipe of the
+    receiving party after setting a status. The waiter keeps a dummy writer open so the pipe never reports hangup,
+    and falls back to sleeping when named pipes are not available. Missed or spurious wake-ups are harmless since
+    waiters always check the status again.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._read_fd = None
+        self._write_fd = None
+        self._disabled = not hasattr(os, "mkfifo")
+        self._lock = threading.Lock()
+
+    def listen(self):
+        if self._read_fd is not None or self._disabled:
+            return
+        # several threads of one party may wait at the same time, the pipe is opened once
+        with self._lock:
+            if self._read_fd is not None or self._disabled:
+                return
+            try:
+                self._path.parent.mkdir(parents=True, exist_ok=True)
+                try:
+                    os.mkfifo(self._path)
+                except FileExistsError:
+                    pass
+                read_fd = os.open(self._path, os.O_RDONLY | os.O_NONBLOCK)
+                self._write_fd = os.open(self._path, os.O_WRONLY | os.O_NONBLOCK)
+                self._read_fd = read_fd
+            except OSError as e:
+                logger.warning(f"federation notifier disabled, fallback to polling: {e}")
+                self.close()
+                self._disabled = True
+
+    def wait(self, timeout: float):
+        if self._read_fd is None:
+            time.sleep(0.001)
+            return
+        readable, _, _ = select.select([self._read_fd], [], [], timeout)
+        if readable:
+            try:
+                while os.read(self._read_fd, 4096):
+                    pass
+            except BlockingIOError:
+                pass
+
+    @staticmethod
+    def notify(path: Path):
+        try:
+            fd = os.open(path, os.O_WRONLY | os.O_NONBLOCK)
+        except OSError:
+            # no pipe or nobody listening, the receiver will find the status when it starts waiting
+            return
+        try:
+            os.write(fd, b"\0")
+        except OSError as e:
+            # a full pipe already wakes the receiver up
+            if e.errno not in (errno.EAGAIN, errno.EWOULDBLOCK):
+                raise
+        finally:
+            os.close(fd)
+
+    def close(self):
+        for fd in (self._read_fd, self._write_fd):
+            if fd is not None:
+                os.close(fd)
+        self._read_fd = None
+        self._write_fd = None
+
+
 def _hash_namespace_name_to_partition(namespace: str, name: str, partitions: int) -> Tuple[bytes, int]:
     k_bytes = f"{name}.{namespace}".encode("utf-8")
     partition_id = int.from_bytes(hashlib.sha256(k_bytes).digest(), "big") % partitions
@@ -1226,7 +1612,7 @@ class _TableMetaManager:
     @classmethod
     def _get_or_create_meta_env(cls, data_dir: str, p):
         if p not in cls._env:
-            cls._env[p] = _get_env_with_data_dir(data_dir, cls.namespace, cls.name, str(p), write=True)
+            cls._env[p] = _open_env(Path(data_dir).joinpath(cls.namespace, cls.name, str(p)), write=True)
         return cls._env[p]
 
     @classmethod
@@ -1266,6 +1652,7 @@ class _TableMetaManager:
         with env.begin(write=True) as txn:
             txn.delete(k_bytes)
         path = Path(data_dir).joinpath(namespace, name)
+        _env_cache.invalidate(path)
         shutil.rmtree(path, ignore_errors=True)
 
 
@@ -107,6 +107,14 @@ class Table(KVTable):
             ),
         )
 
+    def _resize_partitions(self, num_partitions: int):
+        return Table(
+            table=self._table.resize_partitions(
+                output_num_partitions=num_partitions,
+                partitioner=self.partitioner,
+            )
+        )
+
     def _collect(self, **kwargs):
         return self._table.collect(**kwargs)
 
@@ -27,6 +27,13 @@ def get_default_partitioner():
     return mmh3_partitioner
 
 
+def is_modulo_partitioner(partitioner_type: int):
+    """
+    whether the partitioner places a key at `hash(key) % total_partitions`
+    """
+    return partitioner_type in (0, 1, 2)
+
+
 def get_partitioner_by_type(partitioner_type: int):
     if partitioner_type == 0:
         return get_default_partitioner()
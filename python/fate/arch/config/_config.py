@@ -78,6 +78,10 @@ class Config(object):
     def safety(self):
         return self.config.safety
 
+    @property
+    def phe(self):
+        return self.config.phe
+
     @property
     def components(self):
         return self.config.components
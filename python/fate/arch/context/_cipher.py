@@ -15,6 +15,7 @@
 
 import logging
 import typing
+import weakref
 
 from fate.arch.config import cfg
 from ..unify import device as device_type
@@ -104,9 +105,12 @@ class PHECipherBuilder:
         if options is None:
             kind = self.kind
             key_size = self.key_length
+            obfuscator_pool_size = cfg.phe.obfuscator.pool_size
         else:
             kind = options.get("kind", self.kind)
             key_size = options.get("key_length", self.key_length)
+            # callers encrypting fixed size batches can size the pool from the batch size
+            obfuscator_pool_size = options.get("obfuscator_pool_size", cfg.phe.obfuscator.pool_size)
 
         if kind == "paillier":
             if not cfg.safety.phe.paillier.allow:
@@ -119,7 +123,8 @@ class PHECipherBuilder:
             from fate.arch.tensor.phe import PHETensorCipher
 
             sk, pk, coder = keygen(key_size)
-            tensor_cipher = PHETensorCipher.from_raw_cipher(pk, coder, sk, evaluator)
+            obfuscator = _create_obfuscator_pool(pk, coder, evaluator, obfuscator_pool_size)
+            tensor_cipher = PHETensorCipher.from_raw_cipher(pk, coder, sk, evaluator, obfuscator)
 
             return PHECipher(kind, key_size, pk, sk, evaluator, coder, tensor_cipher, True, True, True)
 
@@ -132,7 +137,8 @@ class PHECipherBuilder:
             from fate.arch.tensor.phe import PHETensorCipher
 
             sk, pk, coder = keygen(key_size)
-            tensor_cipher = PHETensorCipher.from_raw_cipher(pk, coder, sk, evaluator)
+            obfuscator = _create_obfuscator_pool(pk, coder, evaluator, obfuscator_pool_size)
+            tensor_cipher = PHETensorCipher.from_raw_cipher(pk, coder, sk, evaluator, obfuscator)
             return PHECipher(kind, key_size, pk, sk, evaluator, coder, tensor_cipher, False, False, True)
 
         elif kind == "mock":
@@ -149,6 +155,14 @@ class PHECipherBuilder:
             raise ValueError(f"Unknown PHE keygen kind: {self.kind}")
 
 
+def _create_obfuscator_pool(pk, coder, evaluator, pool_size):
+    if pool_size <= 0:
+        return None
+    from fate.arch.tensor.phe import PHEObfuscatorPool
+
+    return PHEObfuscatorPool(pk, coder, evaluator, pool_size, cfg.phe.obfuscator.refill_threads)
+
+
 class PHECipherPublic:
     def __init__(
         self,
@@ -238,6 +252,11 @@ class PHECipher(PHECipherPublic):
         )
         self._sk = sk
         self._tensor_cipher = tensor_cipher
+        # the obfuscator pool refills in background threads, stop them once the cipher is released
+        weakref.finalize(self, tensor_cipher.close)
+
+    def close(self):
+        self._tensor_cipher.close()
 
     def get_tensor_decryptor(self):
         return self._tensor_cipher.sk
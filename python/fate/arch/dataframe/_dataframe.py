@@ -173,6 +173,29 @@ class DataFrame(object):
             enable_type_align_checking=enable_type_align_checking,
         )
 
+    @auto_trace
+    def apply_block(self, func, columns: list, dtype="float64") -> "DataFrame":
+        from .ops._apply_block import apply_block
+
+        return apply_block(self, func, columns=columns, dtype=dtype)
+
+    @auto_trace
+    def pack_encrypt(
+        self, encryptor, coder, offset_bit: int, precision: int, column: str, offsets=None, obfuscate=True
+    ) -> "DataFrame":
+        from .ops._encrypt import pack_encrypt
+
+        return pack_encrypt(
+            self,
+            encryptor,
+            coder,
+            offset_bit=offset_bit,
+            precision=precision,
+            column=column,
+            offsets=offsets,
+            obfuscate=obfuscate,
+        )
+
     @auto_trace
     def create_frame(self, with_label=False, with_weight=False, columns: Union[list, pd.Index] = None) -> "DataFrame":
         if columns is not None and isinstance(columns, pd.Index):
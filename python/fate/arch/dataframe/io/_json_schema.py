@@ -15,13 +15,18 @@
 FRAME_SCHEME = "fate.arch.dataframe"
 
 
-def build_schema(data):
+FRAME_LIST_FORMAT = "list"
+FRAME_BUFFER_FORMAT = "buffer"
+
+
+def build_schema(data, data_format=FRAME_LIST_FORMAT):
     meta = data.data_manager.serialize()
 
     built_schema = dict()
     built_schema["schema_meta"] = meta
     built_schema["partition_order_mappings"] = data.partition_order_mappings
     built_schema["type"] = FRAME_SCHEME
+    built_schema["format"] = data_format
 
     return built_schema
 
@@ -34,3 +39,8 @@ def parse_schema(schema):
     partition_order_mappings = schema["partition_order_mappings"]
 
     return schema_meta, partition_order_mappings
+
+
+def parse_data_format(schema):
+    # frames written before the buffer format carry no format field
+    return schema.get("format", FRAME_LIST_FORMAT)
@@ -15,18 +15,36 @@
 
 from .._dataframe import DataFrame
 from ..manager import DataManager
-from ._json_schema import build_schema, parse_schema
+from ._json_schema import FRAME_BUFFER_FORMAT, FRAME_LIST_FORMAT, build_schema, parse_data_format, parse_schema
+
+
+def _can_serialize_as_buffer(data_manager):
+    from ..manager.block_manager import BlockType
+
+    for block_schema in data_manager.blocks:
+        if block_schema.block_type != BlockType.index and not BlockType.is_tensor(block_schema.block_type):
+            return False
+
+    return True
 
 
 def _serialize(ctx, data):
     """
     index, match_id, label, weight, values
+    frames whose blocks are all index or tensor blocks are stored block by block as buffers,
+    others fall back to row lists
     """
-    schema = build_schema(data)
+    if _can_serialize_as_buffer(data.data_manager):
+        from ..ops._transformer import transform_block_table_to_buffer
+
+        schema = build_schema(data, data_format=FRAME_BUFFER_FORMAT)
+        serialize_data = transform_block_table_to_buffer(data.block_table, data.data_manager)
+    else:
+        from ..ops._transformer import transform_block_table_to_list
 
-    from ..ops._transformer import transform_block_table_to_list
+        schema = build_schema(data, data_format=FRAME_LIST_FORMAT)
+        serialize_data = transform_block_table_to_list(data.block_table, data.data_manager)
 
-    serialize_data = transform_block_table_to_list(data.block_table, data.data_manager)
     serialize_data.schema = schema
     return serialize_data
 
@@ -43,8 +61,13 @@ def deserialize(ctx, data):
     site_name = ctx.local.name
     data_manager.fill_anonymous_site_name(site_name)
 
-    from ..ops._transformer import transform_list_to_block_table
+    if parse_data_format(data.schema) == FRAME_BUFFER_FORMAT:
+        from ..ops._transformer import transform_buffer_to_block_table
+
+        block_table = transform_buffer_to_block_table(data, data_manager)
+    else:
+        from ..ops._transformer import transform_list_to_block_table
 
-    block_table = transform_list_to_block_table(data, data_manager)
+        block_table = transform_list_to_block_table(data, data_manager)
 
     return DataFrame(ctx, block_table, partition_order_mappings, data_manager)
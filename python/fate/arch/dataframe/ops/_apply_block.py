@@ -0,0 +1,97 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import functools
+from typing import List
+
+import numpy as np
+import torch
+
+from .._dataframe import DataFrame
+from ..manager import DataManager
+from ..manager.block_manager import BlockType
+
+
+def apply_block(df: "DataFrame", func, columns: List[str], dtype="float64") -> "DataFrame":
+    """
+    apply `func` to all rows of a block at once.
+
+    func receives a 2-D numpy array whose columns are the operable columns of df in schema order and
+    returns a 2-D array with len(columns) columns, the result frame keeps sample_id/match_id and adds `columns`
+    as a single block of type `dtype`.
+    """
+    data_manager = df.data_manager
+    field_names = data_manager.infer_operable_field_names()
+    fields_loc = data_manager.loc_block(field_names)
+
+    src_block_ids = sorted(set(bid for bid, _ in fields_loc))
+    for bid in src_block_ids:
+        if not data_manager.get_block(bid).is_numeric():
+            raise ValueError("apply_block support only operates on numeric columns")
+
+    # blocks are stacked in block order, then columns are permuted back to the schema order
+    block_offsets = dict()
+    stacked_width = 0
+    for bid in src_block_ids:
+        block_offsets[bid] = stacked_width
+        stacked_width += len(data_manager.get_block(bid).field_indexes)
+    column_permutation = [block_offsets[bid] + offset for bid, offset in fields_loc]
+    if column_permutation == list(range(stacked_width)):
+        column_permutation = None
+
+    dst_data_manager, blocks_loc = data_manager.derive_new_data_manager(
+        with_sample_id=True, with_match_id=True, with_label=False, with_weight=False, columns=None
+    )
+    dst_bid = dst_data_manager.append_columns(columns, BlockType.get_block_type(dtype))[0]
+
+    _apply_block_func = functools.partial(
+        _apply_block,
+        func=func,
+        src_block_ids=src_block_ids,
+        column_permutation=column_permutation,
+        blocks_loc=blocks_loc,
+        dst_bid=dst_bid,
+        dm=dst_data_manager,
+        column_num=len(columns),
+    )
+    block_table = df.block_table.mapValues(_apply_block_func)
+
+    return DataFrame(df._ctx, block_table, df.partition_order_mappings, dst_data_manager)
+
+
+def _apply_block(
+    blocks,
+    func=None,
+    src_block_ids=None,
+    column_permutation=None,
+    blocks_loc=None,
+    dst_bid=None,
+    dm: DataManager = None,
+    column_num=None,
+):
+    ret_blocks = [None] * dm.block_num
+    for src_bid, bid, is_changed, block_column_indexes in blocks_loc:
+        block = blocks[src_bid]
+        ret_blocks[bid] = block[:, block_column_indexes] if is_changed else block
+
+    values = torch.hstack([blocks[bid] for bid in src_block_ids])
+    if column_permutation is not None:
+        values = values[:, column_permutation]
+
+    ret = np.asarray(func(values.numpy()))
+    if ret.shape != (len(values), column_num):
+        raise ValueError(f"apply_block func should return an array of shape {(len(values), column_num)}")
+    ret_blocks[dst_bid] = dm.blocks[dst_bid].convert_block(torch.from_numpy(np.ascontiguousarray(ret)))
+
+    return ret_blocks
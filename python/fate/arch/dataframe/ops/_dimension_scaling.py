@@ -243,14 +243,21 @@ def retrieval_row(df: "DataFrame", indexer: Union["DTensor", "DataFrame"]):
         if operable_field_len != 1:
             raise ValueError("Row indexing by DataFrame should have only one column filling with True/False")
 
-    data_manager = df.data_manager.duplicate()
-
     if isinstance(indexer, DataFrame):
         bid = indexer.data_manager.infer_operable_blocks()[0]
         block_table = df.block_table.join(indexer.block_table, lambda v1, v2: (v1, v2[bid]))
     else:
         block_table = df.block_table.join(indexer.shardings._data, lambda v1, v2: (v1, v2))
 
+    return retrieval_row_by_masked_table(df, block_table)
+
+
+def retrieval_row_by_masked_table(df: "DataFrame", block_table):
+    """
+    block_table: table, key=block_id, value=(blocks, mask), mask has one True/False per row of the block
+    """
+    data_manager = df.data_manager.duplicate()
+
     def _block_counter(kvs):
         size = 0
         first_block_id = None
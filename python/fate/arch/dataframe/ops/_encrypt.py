@@ -0,0 +1,121 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+import functools
+from typing import List
+
+import torch
+from fate.arch.tensor.phe._tensor import PHETensorEncoded
+
+from .._dataframe import DataFrame
+from ..manager import DataManager
+from ..manager.block_manager import BlockType
+
+
+def pack_encrypt(
+    df: "DataFrame",
+    encryptor,
+    coder,
+    offset_bit: int,
+    precision: int,
+    column: str,
+    offsets: List[float] = None,
+    obfuscate: bool = True,
+) -> "DataFrame":
+    """
+    pack the operable columns of each row into one plaintext and encrypt them block by block,
+    the result frame keeps sample_id/match_id and adds a single phe_tensor column named `column`.
+
+    encryptor/coder are PHETensorEncryptor/PHETensorCoder, `Coder.pack_floats` and `encrypt_encoded` are
+    called once per block instead of once per row. values are packed as float32 and each block holds a
+    (row_num, 1) float32 phe tensor, one packed ciphertext per row, as encrypting row by row gives.
+    """
+    data_manager = df.data_manager
+    field_names = data_manager.infer_operable_field_names()
+    pack_num = len(field_names)
+    fields_loc = data_manager.loc_block(field_names)
+    for bid, _ in fields_loc:
+        if not data_manager.get_block(bid).is_numeric():
+            raise ValueError("pack_encrypt support only operates on numeric columns")
+
+    if offsets is None:
+        offsets = [0] * pack_num
+    if len(offsets) != pack_num:
+        raise ValueError(f"offsets length {len(offsets)} is not equal to operable columns length {pack_num}")
+
+    dst_data_manager, blocks_loc = data_manager.derive_new_data_manager(
+        with_sample_id=True, with_match_id=True, with_label=False, with_weight=False, columns=None
+    )
+    # lifting an empty payload builds a template that carries the public cipher info without encrypting anything
+    template = encryptor.lift(None, (0, 1), torch.float32, torch.device("cpu"))
+    dst_bid = dst_data_manager.append_columns([column], BlockType.phe_tensor)[0]
+    dst_data_manager.blocks[dst_bid].set_extra_kwargs(
+        pk=template.pk,
+        evaluator=template.evaluator,
+        coder=template.coder,
+        dtype=template.dtype,
+        device=template.device,
+    )
+
+    _pack_encrypt_func = functools.partial(
+        _pack_encrypt,
+        encryptor=encryptor,
+        coder=coder,
+        fields_loc=fields_loc,
+        blocks_loc=blocks_loc,
+        dst_bid=dst_bid,
+        dm=dst_data_manager,
+        offset_bit=offset_bit,
+        pack_num=pack_num,
+        precision=precision,
+        offsets=offsets,
+        obfuscate=obfuscate,
+    )
+    block_table = df.block_table.mapValues(_pack_encrypt_func)
+
+    return DataFrame(df._ctx, block_table, df.partition_order_mappings, dst_data_manager)
+
+
+def _pack_encrypt(
+    blocks,
+    encryptor=None,
+    coder=None,
+    fields_loc=None,
+    blocks_loc=None,
+    dst_bid=None,
+    dm: DataManager = None,
+    offset_bit=None,
+    pack_num=None,
+    precision=None,
+    offsets=None,
+    obfuscate=True,
+):
+    ret_blocks = [None] * dm.block_num
+    for src_bid, bid, is_changed, block_column_indexes in blocks_loc:
+        block = blocks[src_bid]
+        ret_blocks[bid] = block[:, block_column_indexes] if is_changed else block
+
+    values = torch.hstack([blocks[bid][:, [offset]] for bid, offset in fields_loc]).to(torch.float32)
+    if any(offsets):
+        values = values + torch.tensor(offsets, dtype=values.dtype)
+
+    # row-major flatten puts the values of one row next to each other, which is the packing order
+    packed = coder.pack_encode_float_tensor(values.flatten(), offset_bit, pack_num, precision)
+    # the packed plaintext holds one value per row, not pack_num, so its shape is that of the packed column
+    encoded = PHETensorEncoded(
+        packed.coder, torch.Size((values.shape[0], 1)), packed.data, values.dtype, packed.device
+    )
+    ret_blocks[dst_bid] = encryptor.encrypt_encoded(encoded, obfuscate=obfuscate).data
+
+    return ret_blocks
@@ -13,6 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import functools
+import json
 
 import pandas as pd
 from typing import List, Tuple
@@ -140,6 +141,66 @@ def transform_block_to_list(blocks, fields_loc):
     return dst_list
 
 
+def transform_block_table_to_buffer(block_table, data_manager):
+    """
+    serialize each partition as one safetensors buffer holding one entry per block, index blocks are stored as
+    their raw bytes viewed as uint8 with their numpy dtype kept in the metadata, non numeric indexes as unicode
+    """
+    from ..manager.block_manager import BlockType
+
+    block_types = [block_schema.block_type for block_schema in data_manager.blocks]
+    for block_type in block_types:
+        if block_type != BlockType.index and not BlockType.is_tensor(block_type):
+            raise ValueError(f"block type {block_type} can not be serialized as buffer")
+
+    def _to_buffer(blocks):
+        import safetensors.torch
+
+        tensors = dict()
+        metadata = dict()
+        for bid, block_type in enumerate(block_types):
+            if block_type == BlockType.index:
+                array = np.asarray(blocks[bid])
+                if array.dtype.kind not in "biuf":
+                    array = array.astype(str)
+                metadata[str(bid)] = array.dtype.str
+                tensors[str(bid)] = torch.from_numpy(np.array(array, order="C").view(np.uint8))
+            else:
+                # safetensors rejects entries sharing storage, so every block gets its own contiguous copy
+                tensors[str(bid)] = blocks[bid].clone(memory_format=torch.contiguous_format)
+
+        return safetensors.torch.save(tensors, metadata=metadata)
+
+    return block_table.mapValues(_to_buffer)
+
+
+def transform_buffer_to_block_table(table, data_manager):
+    def _read_metadata(buffer):
+        header_size = int.from_bytes(buffer[:8], "little")
+        return json.loads(buffer[8 : 8 + header_size]).get("__metadata__", {})
+
+    def _to_block(buffer):
+        import safetensors.torch
+
+        tensors = safetensors.torch.load(buffer)
+        metadata = _read_metadata(buffer)
+
+        convert_blocks = []
+        for bid, block_schema in enumerate(data_manager.blocks):
+            block = tensors[str(bid)]
+            if str(bid) in metadata:
+                block = block.numpy().view(np.dtype(metadata[str(bid)]))
+                if block.dtype.kind in "biuf":
+                    # numeric indexes keep their dtype, converting the block would turn them into str
+                    convert_blocks.append(pd.Index(block))
+                    continue
+            convert_blocks.append(block_schema.convert_block(block))
+
+        return convert_blocks
+
+    return table.mapValues(_to_block)
+
+
 def transform_list_to_block_table(table, data_manager):
     from ..manager.block_manager import BlockType
 
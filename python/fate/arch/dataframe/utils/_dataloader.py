@@ -13,6 +13,10 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 import random
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+import torch
 
 
 class DataLoader(object):
@@ -28,6 +32,7 @@ class DataLoader(object):
         shuffle=False,
         batch_strategy="full",
         random_state=None,
+        prefetch=False,
     ):
         self._ctx = ctx
         self._dataset = dataset
@@ -44,6 +49,9 @@ class DataLoader(object):
         self._mode = mode
         self._role = role
         self._sync_arbiter = sync_arbiter
+        # build the next batch in a background thread while the current one is being consumed, federation calls
+        # are always made from the iterating thread
+        self._prefetch = prefetch
 
         self._init_settings()
 
@@ -59,6 +67,7 @@ class DataLoader(object):
                 random_state=self._random_state,
                 need_align=self._need_align,
                 sync_arbiter=self._sync_arbiter,
+                prefetch=self._prefetch,
             )
         else:
             raise ValueError(f"batch strategy {self._batch_strategy} is not support")
@@ -77,7 +86,14 @@ class DataLoader(object):
 
 
 class FullBatchDataLoader(object):
-    def __init__(self, dataset, ctx, mode, role, batch_size, shuffle, random_state, need_align, sync_arbiter):
+    """
+    batches are assigned lazily: one distributed pass per epoch groups the rows of every block by batch and places
+    each batch in a single partition, a batch is then read from its partition only.
+    """
+
+    def __init__(
+        self, dataset, ctx, mode, role, batch_size, shuffle, random_state, need_align, sync_arbiter, prefetch=False
+    ):
         self._dataset = dataset
         self._ctx = ctx
         self._mode = mode
@@ -89,9 +105,13 @@ class FullBatchDataLoader(object):
         self._random_state = random_state
         self._need_align = need_align
         self._sync_arbiter = sync_arbiter
+        self._prefetch = prefetch
 
         self._batch_num = None
-        self._batch_splits = []  # list of DataFrame
+        self._batch_splits = []  # list of BatchEncoding, kept when every epoch yields the same batches
+        self._block_offsets = None
+        self._random = random.Random(random_state)
+        self._epoch = 0
         self._prepare()
 
     def _prepare(self):
@@ -119,31 +139,140 @@ class FullBatchDataLoader(object):
 
         if self._batch_size == len(self._dataset):
             self._batch_splits.append(BatchEncoding(self._dataset, batch_id=0))
+        elif self._mode == "hetero" and self._role == "host":
+            # hosts follow the batches of guest, reuse them across epochs only if guest does not reshuffle
+            self._shuffle = self._ctx.sub_ctx("dataloader_batch").guest.get("shuffle")
         else:
-            if self._mode in ["homo", "local"] or self._role == "guest":
-                indexer = sorted(list(self._dataset.get_indexer(target="sample_id").collect()))
-                if self._shuffle:
-                    random.seed = self._random_state
-                    random.shuffle(indexer)
-
-                for i, iter_ctx in self._ctx.sub_ctx("dataloader_batch").ctxs_range(self._batch_num):
-                    batch_indexer = indexer[self._batch_size * i : self._batch_size * (i + 1)]
-                    batch_indexer = self._ctx.computing.parallelize(
-                        batch_indexer, include_key=True, partition=self._dataset.block_table.num_partitions
+            if self._mode == "hetero" and self._role == "guest":
+                self._ctx.sub_ctx("dataloader_batch").hosts.put("shuffle", self._shuffle)
+
+            # global row offset of each block, o(block_num) on driver instead of collecting all sample ids
+            block_sizes = sorted(self._dataset.block_table.mapValues(lambda blocks: len(blocks[0])).collect())
+            self._block_offsets = dict()
+            offset = 0
+            for block_id, block_size in block_sizes:
+                self._block_offsets[block_id] = offset
+                offset += block_size
+
+    def _split_batches(self):
+        """
+        one shuffle over the blocks, the rows of a block are cut into one piece per batch.
+        key=block_id * stride + batch_id with integer serdes and partitioner, stride is a multiple of the partition
+        number so that every piece of batch b is in partition b % num_partitions, value=(row blocks, row mask).
+        when shuffling, global row positions are permuted by a keyed permutation that changes every epoch,
+        so batches keep exactly batch_size rows without sorting or collecting the sample ids.
+        """
+        row_num = len(self._dataset)
+        batch_size = self._batch_size
+        block_offsets = self._block_offsets
+        stride = self._dataset.block_table.num_partitions * self._batch_num
+        round_keys = None
+        if self._shuffle:
+            round_keys = [self._random.getrandbits(64) for _ in range(PERMUTATION_ROUNDS)]
+
+        def _split(_, kvs):
+            for block_id, blocks in kvs:
+                positions = np.arange(len(blocks[0]), dtype=np.int64) + block_offsets[block_id]
+                if round_keys is not None:
+                    positions = _permute_positions(positions, row_num, round_keys)
+                batch_ids = positions // batch_size
+                for batch_id in np.unique(batch_ids):
+                    rows = np.flatnonzero(batch_ids == batch_id)
+                    yield block_id * stride + int(batch_id), (
+                        [_take_rows(block, rows) for block in blocks],
+                        np.ones(len(rows), dtype=bool),
                     )
 
-                    sub_frame = self._dataset.loc(batch_indexer, preserve_order=False)
+        return self._dataset.block_table.map_reduce_partitions_with_index(
+            _split, shuffle=True, output_key_serdes_type=1, output_partitioner_type=1
+        )
+
+    def _load_batch(self, batch_id, split_table):
+        """
+        computing only, so that it may run in the prefetch thread, federation calls are left to the caller
+        """
+        from ..ops._dimension_scaling import retrieval_row_by_masked_table
+
+        stride = self._dataset.block_table.num_partitions * self._batch_num
+        partition_id = batch_id % split_table.num_partitions
+
+        def _select(pid, kvs):
+            # other partitions are not read at all
+            if pid != partition_id:
+                return
+            for k, v in kvs:
+                if int.from_bytes(k, "big") % stride == batch_id:
+                    yield k, v
 
-                    if self._mode == "hetero" and self._role == "guest":
-                        iter_ctx.hosts.put("batch_indexes", sub_frame.get_indexer(target="sample_id"))
+        masked_table = split_table.mapPartitionsWithIndexNoSerdes(
+            _select,
+            output_key_serdes_type=split_table.key_serdes_type,
+            output_value_serdes_type=split_table.value_serdes_type,
+            output_partitioner_type=split_table.partitioner_type,
+        )
+        block_table = self._dataset.block_table
+        masked_table = masked_table.repartition(
+            block_table.num_partitions,
+            partitioner_type=block_table.partitioner_type,
+            key_serdes_type=block_table.key_serdes_type,
+        )
+        sub_frame = retrieval_row_by_masked_table(self._dataset, masked_table)
 
-                    self._batch_splits.append(BatchEncoding(sub_frame, batch_id=i))
+        batch_indexer = None
+        if self._mode == "hetero" and self._role == "guest":
+            batch_indexer = sub_frame.get_indexer(target="sample_id")
+
+        return BatchEncoding(sub_frame, batch_id=batch_id), batch_indexer
+
+    def _iter_host_batches(self, epoch_ctx):
+        for batch_id, batch_ctx in epoch_ctx.ctxs_range(self._batch_num):
+            batch_indexes = batch_ctx.guest.get("batch_indexes")
+            sub_frame = self._dataset.loc(batch_indexes, preserve_order=True)
+            yield BatchEncoding(sub_frame, batch_id=batch_id)
+
+    def _iter_local_batches(self, epoch_ctx):
+        split_table = self._split_batches()
+        batch_ctxs = list(epoch_ctx.ctxs_range(self._batch_num))
+
+        if not self._prefetch:
+            loaded = (self._load_batch(batch_id, split_table) for batch_id, _ in batch_ctxs)
+            yield from self._send_batches(loaded, batch_ctxs)
+            return
+
+        def _prefetched():
+            with ThreadPoolExecutor(max_workers=1, thread_name_prefix="dataloader_prefetch") as executor:
+                # build the next batch while the current one is being consumed
+                future = executor.submit(self._load_batch, batch_ctxs[0][0], split_table)
+                for i in range(self._batch_num):
+                    loaded = future.result()
+                    if i + 1 < self._batch_num:
+                        future = executor.submit(self._load_batch, batch_ctxs[i + 1][0], split_table)
+                    yield loaded
+
+        yield from self._send_batches(_prefetched(), batch_ctxs)
+
+    def _send_batches(self, loaded_batches, batch_ctxs):
+        for (batch, batch_indexer), (_, batch_ctx) in zip(loaded_batches, batch_ctxs):
+            if batch_indexer is not None:
+                batch_ctx.hosts.put("batch_indexes", batch_indexer)
+            yield batch
 
-            elif self._mode == "hetero" and self._role == "host":
-                for i, iter_ctx in self._ctx.sub_ctx("dataloader_batch").ctxs_range(self._batch_num):
-                    batch_indexes = iter_ctx.guest.get("batch_indexes")
-                    sub_frame = self._dataset.loc(batch_indexes, preserve_order=True)
-                    self._batch_splits.append(BatchEncoding(sub_frame, batch_id=i))
+    def _iter_batches(self):
+        epoch_ctx = self._ctx.sub_ctx("dataloader_batch").indexed_ctx(self._epoch).on_batches
+        self._epoch += 1
+
+        if self._mode == "hetero" and self._role == "host":
+            batches_iter = self._iter_host_batches(epoch_ctx)
+        else:
+            batches_iter = self._iter_local_batches(epoch_ctx)
+
+        batches = []
+        for batch in batches_iter:
+            batches.append(batch)
+            yield batch
+
+        if not self._shuffle:
+            self._batch_splits = batches
 
     def __next__(self):
         if self._role == "arbiter":
@@ -151,8 +280,12 @@ class FullBatchDataLoader(object):
                 yield BatchEncoding(batch_id=batch_id)
             return
 
-        for batch in self._batch_splits:
-            yield batch
+        if self._batch_splits:
+            for batch in self._batch_splits:
+                yield batch
+            return
+
+        yield from self._iter_batches()
 
     def __iter__(self):
         return self.__next__()
@@ -162,6 +295,45 @@ class FullBatchDataLoader(object):
         return self._batch_num
 
 
+PERMUTATION_ROUNDS = 4
+
+
+def _mix64(x: np.ndarray) -> np.ndarray:
+    # splitmix64 finalizer, uint64 arithmetic wraps around
+    x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return x ^ (x >> np.uint64(31))
+
+
+def _permute_positions(positions: np.ndarray, row_num: int, round_keys) -> np.ndarray:
+    """
+    keyed pseudo random permutation of [0, row_num): a feistel network over the smallest even bit width that
+    covers row_num, values falling outside the range are permuted again (cycle walking) until they are inside.
+    """
+    half_bits = max(1, ((row_num - 1).bit_length() + 1) // 2)
+    shift = np.uint64(half_bits)
+    mask = np.uint64((1 << half_bits) - 1)
+
+    def _encrypt(x):
+        left, right = x >> shift, x & mask
+        for key in round_keys:
+            left, right = right, left ^ (_mix64(right ^ np.uint64(key)) & mask)
+        return (left << shift) | right
+
+    permuted = _encrypt(positions.astype(np.uint64))
+    outside = np.flatnonzero(permuted >= row_num)
+    while len(outside):
+        permuted[outside] = _encrypt(permuted[outside])
+        outside = outside[permuted[outside] >= row_num]
+    return permuted.astype(np.int64)
+
+
+def _take_rows(block, rows: np.ndarray):
+    if isinstance(block, torch.Tensor):
+        return block[torch.from_numpy(rows)]
+    return block[rows]
+
+
 class BatchEncoding(object):
     def __init__(self, batch_df=None, batch_id=None):
         if batch_df:
@@ -118,14 +118,161 @@ class _NumpySafeTensorPersistentId:
         return safetensors.numpy.load(self.bytes)["n"]
 
 
+class _TorchBufferPersistentId:
+    """
+    tensor sent as a pickle protocol 5 out-of-band buffer, so its memory is not copied into the pickle stream
+    """
+
+    def __init__(self, dtype: str, shape, buffer) -> None:
+        self.dtype = dtype
+        self.shape = shape
+        self.buffer = buffer
+
+    @staticmethod
+    def dump(_pickler: "TableRemotePersistentPickler", obj: "torch.Tensor") -> Any:
+        import numpy as np
+
+        try:
+            array = np.ascontiguousarray(obj.detach().cpu().numpy())
+        except TypeError:
+            # dtypes numpy can not represent, such as bfloat16
+            return _TorchSafeTensorPersistentId.dump(_pickler, obj)
+        return _TorchBufferPersistentId(array.dtype.str, tuple(obj.shape), pickle.PickleBuffer(array))
+
+    def load(self, _unpickler: "TableRemotePersistentUnpickler"):
+        import torch
+
+        return torch.from_numpy(_array_from_buffer(self.buffer, self.dtype, self.shape))
+
+
+class _NumpyBufferPersistentId:
+    """
+    array sent as a pickle protocol 5 out-of-band buffer, so its memory is not copied into the pickle stream
+    """
+
+    def __init__(self, dtype: str, shape, buffer) -> None:
+        self.dtype = dtype
+        self.shape = shape
+        self.buffer = buffer
+
+    @staticmethod
+    def dump(_pickler: "TableRemotePersistentPickler", obj: "np.ndarray") -> Any:
+        import numpy as np
+
+        array = np.ascontiguousarray(obj)
+        return _NumpyBufferPersistentId(array.dtype.str, obj.shape, pickle.PickleBuffer(array))
+
+    def load(self, _unpickler: "TableRemotePersistentUnpickler"):
+        return _array_from_buffer(self.buffer, self.dtype, self.shape)
+
+
+def _array_from_buffer(buffer, dtype: str, shape):
+    import numpy as np
+
+    array = np.frombuffer(buffer, dtype=np.dtype(dtype)).reshape(shape)
+    # buffers sliced from received bytes are read only
+    if not array.flags.writeable:
+        array = array.copy()
+    return array
+
+
+class _FederationCompressor:
+    NONE = 0
+    ZSTD = 1
+    LZ4 = 2
+    _CODECS = {"none": NONE, "zstd": ZSTD, "lz4": LZ4}
+
+    @classmethod
+    def get_codec(cls, name: str) -> int:
+        if name not in cls._CODECS:
+            raise ValueError(f"invalid compress codec: {name}, should be one of {list(cls._CODECS)}")
+        codec = cls._CODECS[name]
+        try:
+            if codec == cls.ZSTD:
+                import zstandard  # noqa: F401
+            elif codec == cls.LZ4:
+                import lz4.frame  # noqa: F401
+        except ImportError:
+            logger.warning(f"compress codec `{name}` is not installed, send messages uncompressed")
+            return cls.NONE
+        return codec
+
+    @classmethod
+    def compress(cls, codec: int, v: bytes) -> bytes:
+        if codec == cls.ZSTD:
+            import zstandard
+
+            return zstandard.ZstdCompressor().compress(v)
+        if codec == cls.LZ4:
+            import lz4.frame
+
+            return lz4.frame.compress(v)
+        return v
+
+    @classmethod
+    def decompress(cls, codec: int, v) -> bytes:
+        if codec == cls.ZSTD:
+            import zstandard
+
+            return zstandard.ZstdDecompressor().decompress(v)
+        if codec == cls.LZ4:
+            import lz4.frame
+
+            return lz4.frame.decompress(v)
+        if codec == cls.NONE:
+            return v
+        raise ValueError(f"invalid compress codec: {codec}")
+
+
 class _FederationBytesCoder:
+    """
+    mode 0 and 1 carry a plain pickle, inline or split into a slice table,
+    mode 2 and 3 carry a framed protocol 5 pickle with its out-of-band buffers, inline or split:
+        codec(1) | num_buffers(4) pickle_size(8) buffer_sizes(8 * num_buffers) pickle buffers...
+    everything after the codec byte is compressed as a whole when the codec is not none
+    """
+
+    BASE = 0
+    SPLIT = 1
+    FRAMED_BASE = 2
+    FRAMED_SPLIT = 3
+
     @staticmethod
     def encode_base(v: bytes) -> bytes:
         return struct.pack("!B", 0) + v
 
     @staticmethod
-    def encode_split(slice_table_meta: "TableMeta", total_size: int, num_slice: int, slice_size: int) -> bytes:
-        return struct.pack("!B", 1) + struct.pack(
+    def encode_frame(pickle_bytes: bytes, buffers: List[memoryview], codec: int) -> List[Any]:
+        """
+        segments of a frame, joined lazily by the caller so that buffers are not copied more than once
+        """
+        header = struct.pack(f"!IQ{len(buffers)}Q", len(buffers), len(pickle_bytes), *[b.nbytes for b in buffers])
+        if codec == _FederationCompressor.NONE:
+            return [struct.pack("!B", codec), header, pickle_bytes, *buffers]
+        compressed = _FederationCompressor.compress(codec, b"".join([header, pickle_bytes, *buffers]))
+        return [struct.pack("!B", codec), compressed]
+
+    @staticmethod
+    def decode_frame(v) -> Tuple[memoryview, List[memoryview]]:
+        codec = struct.unpack_from("!B", v, 0)[0]
+        payload = memoryview(_FederationCompressor.decompress(codec, memoryview(v)[1:]))
+        num_buffers, pickle_size = struct.unpack_from("!IQ", payload, 0)
+        offset = struct.calcsize("!IQ")
+        buffer_sizes = struct.unpack_from(f"!{num_buffers}Q", payload, offset)
+        offset += 8 * num_buffers
+        pickle_bytes = payload[offset : offset + pickle_size]
+        offset += pickle_size
+        buffers = []
+        for size in buffer_sizes:
+            buffers.append(payload[offset : offset + size])
+            offset += size
+        return pickle_bytes, buffers
+
+    @staticmethod
+    def encode_split(
+        slice_table_meta: "TableMeta", total_size: int, num_slice: int, slice_size: int, mode: int = SPLIT
+    ) -> bytes:
+        return struct.pack("!B", mode) + struct.pack(
             "!QIIIIII",
             total_size,
             num_slice,
@@ -169,6 +316,27 @@ class _SplitTableUtil:
     def get_split_table_key(name):
         return f"{name}__table_persistent_split__"
 
+    @staticmethod
+    def iter_slices(segments: List[Any], slice_size: int):
+        """
+        cut the concatenation of segments into slices of slice_size without joining the segments first,
+        only the slice being built is held besides the segments
+        """
+        index = 0
+        current = bytearray()
+        for segment in segments:
+            view = memoryview(segment).cast("B")
+            while len(view) > 0:
+                take = slice_size - len(current)
+                current += view[:take]
+                view = view[take:]
+                if len(current) == slice_size:
+                    yield index, bytes(current)
+                    index += 1
+                    current = bytearray()
+        if len(current) > 0:
+            yield index, bytes(current)
+
 
 class TableRemotePersistentPickler(pickle.Pickler):
     def __init__(
@@ -178,6 +346,7 @@ class TableRemotePersistentPickler(pickle.Pickler):
         tag: str,
         parties: List[PartyMeta],
         f,
+        buffers: List[memoryview] = None,
     ) -> None:
         self._federation = federation
         self._name = name
@@ -186,7 +355,11 @@ class TableRemotePersistentPickler(pickle.Pickler):
 
         self._tables = {}
         self._table_index = 0
-        super().__init__(f)
+        self._out_of_band = buffers is not None
+        if self._out_of_band:
+            super().__init__(f, protocol=5, buffer_callback=lambda b: buffers.append(b.raw()))
+        else:
+            super().__init__(f)
 
     def _get_next_table_key(self):
         # or uuid?
@@ -205,9 +378,13 @@ class TableRemotePersistentPickler(pickle.Pickler):
             return _ContextPersistentId.dump(self, obj)
 
         if isinstance(obj, torch.Tensor):
+            if self._out_of_band:
+                return _TorchBufferPersistentId.dump(self, obj)
             return _TorchSafeTensorPersistentId.dump(self, obj)
 
         if isinstance(obj, np.ndarray) and obj.dtype != np.dtype("object"):
+            if self._out_of_band:
+                return _NumpyBufferPersistentId.dump(self, obj)
             return _NumpySafeTensorPersistentId.dump(self, obj)
 
     def _push_table(self, table, key):
@@ -227,6 +404,11 @@ class TableRemotePersistentPickler(pickle.Pickler):
         max_message_size: int,
         num_partitions_of_slice_table: int,
     ):
+        if cfg.federation.pickle.out_of_band:
+            return cls._push_framed(
+                value, federation, computing, name, tag, parties, max_message_size, num_partitions_of_slice_table
+            )
+
         with io.BytesIO() as f:
             pickler = TableRemotePersistentPickler(federation, name, tag, parties, f)
             pickler.dump(value)
@@ -264,6 +446,68 @@ class TableRemotePersistentPickler(pickle.Pickler):
                     v=_FederationBytesCoder.encode_base(f.getvalue()), name=name, tag=tag, parties=parties
                 )
 
+    @classmethod
+    def _push_framed(
+        cls,
+        value,
+        federation: "Federation",
+        computing: "KVTableContext",
+        name: str,
+        tag: str,
+        parties: List[PartyMeta],
+        max_message_size: int,
+        num_partitions_of_slice_table: int,
+    ):
+        buffers = []
+        with io.BytesIO() as f:
+            pickler = TableRemotePersistentPickler(federation, name, tag, parties, f, buffers=buffers)
+            pickler.dump(value)
+            pickle_bytes = f.getvalue()
+        total_size = len(pickle_bytes) + sum(b.nbytes for b in buffers)
+
+        codec = _FederationCompressor.NONE
+        if 0 <= cfg.federation.pickle.compress_threshold <= total_size:
+            codec = _FederationCompressor.get_codec(cfg.federation.pickle.compress_codec)
+        segments = _FederationBytesCoder.encode_frame(pickle_bytes, buffers, codec)
+        total_size = sum(memoryview(segment).nbytes for segment in segments)
+
+        if total_size > max_message_size:
+            num_slice = (total_size - 1) // max_message_size + 1
+            # slices are cut while the slice table is written, the frame is never joined
+            slice_table = computing.parallelize(
+                _SplitTableUtil.iter_slices(segments, max_message_size),
+                partition=num_partitions_of_slice_table,
+                key_serdes_type=0,
+                value_serdes_type=0,
+                partitioner_type=0,
+            )
+            split_table_meta = TableMeta(
+                num_partitions=num_partitions_of_slice_table,
+                key_serdes_type=0,
+                value_serdes_type=0,
+                partitioner_type=0,
+            )
+            federation.push_table(slice_table, _SplitTableUtil.get_split_table_key(name), tag=tag, parties=parties)
+            federation.push_bytes(
+                v=_FederationBytesCoder.encode_split(
+                    split_table_meta,
+                    total_size,
+                    num_slice,
+                    max_message_size,
+                    mode=_FederationBytesCoder.FRAMED_SPLIT,
+                ),
+                name=name,
+                tag=tag,
+                parties=parties,
+            )
+        else:
+            federation.push_bytes(
+                v=b"".join([struct.pack("!B", _FederationBytesCoder.FRAMED_BASE), *segments]),
+                name=name,
+                tag=tag,
+                parties=parties,
+            )
+
 
 class TableRemotePersistentUnpickler(pickle.Unpickler):
     __ALLOW_CLASSES = {
@@ -288,13 +532,14 @@ class TableRemotePersistentUnpickler(pickle.Unpickler):
         tag: str,
         party: PartyMeta,
         f,
+        buffers: List[memoryview] = None,
     ):
         self._ctx = ctx
         self._federation = federation
         self._name = name
         self._tag = tag
         self._party = party
-        super().__init__(f)
+        super().__init__(f, buffers=buffers)
 
     def persistent_load(self, pid: Any) -> Any:
         if isinstance(
@@ -304,6 +549,8 @@ class TableRemotePersistentUnpickler(pickle.Unpickler):
                 _ContextPersistentId,
                 _TorchSafeTensorPersistentId,
                 _NumpySafeTensorPersistentId,
+                _TorchBufferPersistentId,
+                _NumpyBufferPersistentId,
             ),
         ):
             return pid.load(self)
@@ -363,5 +610,24 @@ class TableRemotePersistentUnpickler(pickle.Unpickler):
                 f.seek(0)
                 unpickler = TableRemotePersistentUnpickler(ctx, federation, name, tag, party, f)
                 return unpickler.load()
+        elif mode == _FederationBytesCoder.FRAMED_BASE:
+            return cls._load_frame(memoryview(buffers)[1:], ctx, federation, name, tag, party)
+        elif mode == _FederationBytesCoder.FRAMED_SPLIT:
+            table_meta, total_size, num_slice, slice_size = _FederationBytesCoder.decode_split(buffers)
+            slice_table = federation.pull_table(
+                name=_SplitTableUtil.get_split_table_key(name), tag=tag, parties=[party], table_metas=[table_meta]
+            )[0]
+            # merged into a writable buffer so that arrays can use their out-of-band buffers without copy
+            frame = bytearray(total_size)
+            for i, b in slice_table.collect():
+                frame[i * slice_size : i * slice_size + len(b)] = b
+            return cls._load_frame(frame, ctx, federation, name, tag, party)
         else:
             raise ValueError(f"invalid mode: {mode}")
+
+    @classmethod
+    def _load_frame(cls, frame, ctx: "Context", federation: "Federation", name: str, tag: str, party: PartyMeta):
+        pickle_bytes, buffers = _FederationBytesCoder.decode_frame(frame)
+        with io.BytesIO(pickle_bytes) as f:
+            unpickler = TableRemotePersistentUnpickler(ctx, federation, name, tag, party, f, buffers=buffers)
+            return unpickler.load()
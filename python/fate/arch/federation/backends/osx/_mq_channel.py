@@ -15,7 +15,10 @@
 
 
 import json
+import os
+import threading
 import time
+from collections import deque
 from enum import Enum
 from logging import getLogger
 from typing import Dict, List, Any
@@ -64,6 +67,71 @@ def build_trace_id():
     return timestamp_str + "_" + str(np.random.randint(10000))
 
 
+_CHANNEL_OPTIONS = [
+    ("grpc.max_send_message_length", int((2 << 30) - 1)),
+    ("grpc.max_receive_message_length", int((2 << 30) - 1)),
+    ("grpc.max_metadata_size", 128 << 20),
+    ("grpc.keepalive_time_ms", 7200 * 1000),
+    ("grpc.keepalive_timeout_ms", 3600 * 1000),
+    ("grpc.keepalive_permit_without_calls", int(False)),
+    ("grpc.per_rpc_retry_buffer_size", int(16 << 20)),
+    ("grpc.enable_retries", 1),
+    (
+        "grpc.service_config",
+        '{ "retryPolicy":{ '
+        '"maxAttempts": 4, "initialBackoff": "0.1s", '
+        '"maxBackoff": "1s", "backoffMutiplier": 2, '
+        '"retryableStatusCodes": [ "UNAVAILABLE" ] } }',
+    ),
+]
+
+# grpc channels shared by every MQChannel of a process, keyed by target
+_channel_pool = {}
+_channel_pool_lock = threading.Lock()
+
+
+def _get_pooled_stub(target):
+    """
+    channels inherited through fork are not usable, so each pooled channel remembers the process creating it
+    """
+    pid = os.getpid()
+    with _channel_pool_lock:
+        pooled = _channel_pool.get(target)
+        if pooled is None or pooled[0] != pid:
+            LOGGER.debug(f"creating pooled grpc channel, target={target}, pid={pid}")
+            channel = grpc.insecure_channel(target=target, options=_CHANNEL_OPTIONS)
+            pooled = (pid, channel, PrivateTransferTransportStub(channel))
+            _channel_pool[target] = pooled
+        return pooled[2]
+
+
+def _parse_message(response):
+    message = osx_pb2.Message()
+    message.ParseFromString(response.payload)
+    properties = json.loads(str(message.head, encoding="utf-8"))
+    return properties, message.body
+
+
+def _count_pending_messages(properties, received_keys: dict, message_counts: dict):
+    """
+    number of messages of the same table transfer known to be still on the topic, objects and transfers from
+    peers that do not send a message count only guarantee the final message while it has not arrived
+    """
+    if "headers" not in properties:
+        return 0
+    header = json.loads(properties["headers"])
+    stream = (properties["message_id"], properties["correlation_id"])
+    keys = received_keys.setdefault(stream, set())
+    keys.add(header["message_key"])
+    if "message_count" in header:
+        message_counts[stream] = header["message_count"]
+    if stream in message_counts:
+        return message_counts[stream] - len(keys)
+    if header["partition_size"] < 0:
+        return 1
+    return 0
+
+
 class MQChannel(object):
     def __init__(
         self, host, port, namespace, send_topic, receive_topic, src_party_id, src_role, dst_party_id, dst_role
@@ -81,10 +149,14 @@ class MQChannel(object):
         self._channel = None
         self._stub = None
         self._timeout = None
+        self._pending_pushes = deque()
+
+        from fate.arch.config import cfg
 
         if self._timeout is None:
-            from fate.arch.config import cfg
             self._timeout = cfg.federation.osx.timeout
+        self._push_window = cfg.federation.osx.push_window
+        self._pop_prefetch = cfg.federation.osx.pop_prefetch
 
         LOGGER.debug(f"init, mq={self}")
 
@@ -129,6 +201,33 @@ class MQChannel(object):
         # LOGGER.debug(f"consume, result={result.code}, mq={self}")
         return result
 
+    def consume_prefetched(self):
+        """
+        yield (properties, body) of popped messages, keeping up to pop_prefetch pops in flight while the caller
+        handles the current message. Pops are issued ahead only for messages known to be pending, so a caller that
+        stops after its last message never takes messages of a later transfer from the topic
+        """
+        pending = deque()
+        received_keys = {}
+        message_counts = {}
+        while True:
+            self._get_or_create_channel()
+            if not pending:
+                pending.append(self._pop_future())
+            response = pending.popleft().result()
+            if response.code == "E0000000601":
+                raise LookupError(f"{response}")
+            properties, body = _parse_message(response)
+            prefetch = min(self._pop_prefetch, _count_pending_messages(properties, received_keys, message_counts))
+            while len(pending) < prefetch:
+                pending.append(self._pop_future())
+            yield properties, body
+
+    def _pop_future(self):
+        inbound = osx_pb2.PopInbound(topic=self._receive_topic, timeout=self._timeout)
+        metadata = self.prepare_metadata_consume()
+        return self._stub.pop.future(request=inbound, metadata=metadata)
+
     # @nretry
     def produce(self, body, properties):
         # LOGGER.debug(f"produce body={body}, properties={properties}, mq={self}")
@@ -137,9 +236,17 @@ class MQChannel(object):
         inbound = osx_pb2.PushInbound(topic=self._send_topic, payload=msg.SerializeToString())
         metadata = self.prepare_metadata()
 
-        result = self._stub.push(inbound, metadata=metadata)
+        if self._push_window <= 1:
+            return self._stub.push(inbound, metadata=metadata)
 
-        return result
+        # keep at most push_window pushes in flight, acknowledgements are waited in send order
+        self._pending_pushes.append(self._stub.push.future(inbound, metadata=metadata))
+        while len(self._pending_pushes) > self._push_window:
+            self._pending_pushes.popleft().result()
+
+    def flush(self):
+        while self._pending_pushes:
+            self._pending_pushes.popleft().result()
 
     # @nretry
     def ack(self, offset):
@@ -160,53 +267,8 @@ class MQChannel(object):
         LOGGER.debug(f"close channel")
 
     def _get_or_create_channel(self):
-        LOGGER.debug(f"call _get_or_create_channel, mq={self}")
-        target = f"{self._host}:{self._port}"
-        if self._check_alive():
-            LOGGER.debug(f"channel alive, return, mq={self}")
-            return
-
-        LOGGER.debug(f"channel not alive, creating, mq={self}")
-        self._channel = grpc.insecure_channel(
-            target=target,
-            options=[
-                ("grpc.max_send_message_length", int((2 << 30) - 1)),
-                ("grpc.max_receive_message_length", int((2 << 30) - 1)),
-                ("grpc.max_metadata_size", 128 << 20),
-                ("grpc.keepalive_time_ms", 7200 * 1000),
-                ("grpc.keepalive_timeout_ms", 3600 * 1000),
-                ("grpc.keepalive_permit_without_calls", int(False)),
-                ("grpc.per_rpc_retry_buffer_size", int(16 << 20)),
-                ("grpc.enable_retries", 1),
-                (
-                    "grpc.service_config",
-                    '{ "retryPolicy":{ '
-                    '"maxAttempts": 4, "initialBackoff": "0.1s", '
-                    '"maxBackoff": "1s", "backoffMutiplier": 2, '
-                    '"retryableStatusCodes": [ "UNAVAILABLE" ] } }',
-                ),
-            ],
-        )
-
-        self._stub = PrivateTransferTransportStub(self._channel)
-        LOGGER.debug(f"channel created, mq={self}")
-
-    def _check_alive(self):
-        status = (
-            grpc._common.CYGRPC_CONNECTIVITY_STATE_TO_CHANNEL_CONNECTIVITY[
-                self._channel._channel.check_connectivity_state(True)
-            ]
-            if self._channel is not None
-            else None
-        )
-        LOGGER.debug(f"_check_alive: status={status}, mq={self}")
-
-        if status == grpc.ChannelConnectivity.SHUTDOWN:
-            LOGGER.debug(f"_check_alive: return True, mq={self}")
-            return True
-        else:
-            LOGGER.debug(f"_check_alive: return False, mq={self}")
-            return False
+        if self._stub is None:
+            self._stub = _get_pooled_stub(f"{self._host}:{self._port}")
 
 
 if __name__ == "__main__":
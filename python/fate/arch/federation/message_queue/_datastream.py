@@ -17,28 +17,111 @@
 
 import io
 import json
-import sys
+import struct
+import typing
+
+JSON_CONTENT_TYPE = "application/json"
+BINARY_CONTENT_TYPE = "application/octet-stream"
+
+# every binary record is framed as <key length><value length><key bytes><value bytes>
+_BINARY_RECORD_HEADER = struct.Struct("<II")
 
 
 # Datastream is a wraper of StringIO, it receives kv pairs and dump it to json string
 class Datastream(object):
+    content_type = JSON_CONTENT_TYPE
+
     def __init__(self):
         self._string = io.StringIO()
         self._string.write("[")
+        self._size = 1
+        self._count = 0
+
+    def __len__(self):
+        return self._count
 
     def get_size(self):
-        return sys.getsizeof(self._string.getvalue())
+        return self._size
+
+    def get_record_size(self, k: bytes, v: bytes):
+        # '{"k": "", "v": ""}' plus the separating ',' and the hex encoded key and value
+        return 19 + 2 * (len(k) + len(v))
 
     def get_data(self):
         self._string.write("]")
-        return self._string.getvalue()
+        return self._string.getvalue().encode()
 
-    def append(self, kv: dict):
+    def append(self, k: bytes, v: bytes):
         # add ',' if not the first element
-        if self._string.getvalue() != "[":
-            self._string.write(",")
-        json.dump(kv, self._string)
+        if self._count > 0:
+            self._size += self._string.write(",")
+        self._size += self._string.write(json.dumps({"k": k.hex(), "v": v.hex()}))
+        self._count += 1
 
     def clear(self):
         self._string.close()
         self.__init__()
+
+
+# BinaryDatastream packs kv pairs as length-prefixed records, so no hex/json encoding is needed
+class BinaryDatastream(object):
+    content_type = BINARY_CONTENT_TYPE
+
+    def __init__(self):
+        self._buffer = bytearray()
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    def get_size(self):
+        return len(self._buffer)
+
+    def get_record_size(self, k: bytes, v: bytes):
+        return _BINARY_RECORD_HEADER.size + len(k) + len(v)
+
+    def get_data(self):
+        return bytes(self._buffer)
+
+    def append(self, k: bytes, v: bytes):
+        self._buffer += _BINARY_RECORD_HEADER.pack(len(k), len(v))
+        self._buffer += k
+        self._buffer += v
+        self._count += 1
+
+    def clear(self):
+        self.__init__()
+
+
+def create_datastream(content_type: str):
+    if content_type == BINARY_CONTENT_TYPE:
+        return BinaryDatastream()
+    if content_type == JSON_CONTENT_TYPE:
+        return Datastream()
+    raise ValueError(f"content_type `{content_type}` not supported for table transfer")
+
+
+def decode_datastream(content_type: str, body: bytes) -> typing.List[typing.Tuple[bytes, bytes]]:
+    if content_type == BINARY_CONTENT_TYPE:
+        return _decode_binary(body)
+    if content_type == JSON_CONTENT_TYPE:
+        return [(bytes.fromhex(el["k"]), bytes.fromhex(el["v"])) for el in json.loads(body.decode())]
+    raise ValueError(f"content_type `{content_type}` not supported for table transfer")
+
+
+def _decode_binary(body: bytes):
+    view = memoryview(body)
+    offset = 0
+    total = len(view)
+    header_size = _BINARY_RECORD_HEADER.size
+    kvs = []
+    while offset < total:
+        k_len, v_len = _BINARY_RECORD_HEADER.unpack_from(view, offset)
+        offset += header_size
+        k_end = offset + k_len
+        v_end = k_end + v_len
+        if v_end > total:
+            raise ValueError(f"truncated binary datastream: record ends at {v_end}, got {total} bytes")
+        kvs.append((bytes(view[offset:k_end]), bytes(view[k_end:v_end])))
+        offset = v_end
+    return kvs
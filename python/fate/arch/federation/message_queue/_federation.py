@@ -17,19 +17,20 @@
 
 import json
 import logging
-import sys
 import typing
 from typing import List
 
 from fate.arch.computing.api import KVTableContext
 from fate.arch.federation.api import Federation, PartyMeta, TableMeta
-from ._datastream import Datastream
+from ._datastream import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE, create_datastream, decode_datastream
 from ._parties import Party
 
 LOGGER = logging.getLogger(__name__)
 
 _SPLIT_ = "^"
 
+_TABLE_WIRE_FORMATS = {"binary": BINARY_CONTENT_TYPE, "json": JSON_CONTENT_TYPE}
+
 
 class MessageQueueBasedFederation(Federation):
     def __init__(
@@ -42,6 +43,7 @@ class MessageQueueBasedFederation(Federation):
         max_message_size,
         conf=None,
         default_partition_num=None,
+        table_wire_format=None,
     ):
         self._mq = mq
         self._topic_map = {}
@@ -51,6 +53,11 @@ class MessageQueueBasedFederation(Federation):
         if self._max_message_size is None:
             self._max_message_size = self.get_default_max_message_size()
         self._default_partition_num = default_partition_num
+        if table_wire_format is None:
+            table_wire_format = self.get_default_table_wire_format()
+        if table_wire_format not in _TABLE_WIRE_FORMATS:
+            raise ValueError(f"table_wire_format `{table_wire_format}` not in {list(_TABLE_WIRE_FORMATS)}")
+        self._table_content_type = _TABLE_WIRE_FORMATS[table_wire_format]
         self._conf = conf
         self.computing_session = computing_session
 
@@ -81,6 +88,9 @@ class MessageQueueBasedFederation(Federation):
     def _consume_ack(self, channel_info, id):
         return
 
+    def _flush_channel(self, channel_info):
+        return
+
     def get_default_max_message_size(self):
         if self._max_message_size is None:
             return super().get_default_max_message_size()
@@ -93,6 +103,11 @@ class MessageQueueBasedFederation(Federation):
         else:
             return self._default_partition_num
 
+    def get_default_table_wire_format(self):
+        from fate.arch.config import cfg
+
+        return cfg.federation.message_queue.table_wire_format
+
     def _pull_bytes(self, name: str, tag: str, parties: typing.List[PartyMeta]) -> typing.List:
         _parties = [Party(role=p[0], party_id=p[1]) for p in parties]
         rtn = []
@@ -166,6 +181,7 @@ class MessageQueueBasedFederation(Federation):
             mq=self._mq,
             max_message_size=self._max_message_size,
             conf=self._conf,
+            content_type=self._table_content_type,
         )
         # noinspection PyProtectedMember
         table.mapPartitionsWithIndexNoSerdes(
@@ -256,18 +272,33 @@ class MessageQueueBasedFederation(Federation):
             }
             LOGGER.debug(f"[federation._send_obj]properties:{properties}.")
             info.produce(body=data, properties=properties)
+        for info in channel_infos:
+            self._flush_channel(info)
 
-    def _send_kv(self, name, tag, data, channel_infos, partition_size, partitions, message_key):
-        headers = json.dumps(
-            {
-                "partition_size": partition_size,
-                "partitions": partitions,
-                "message_key": message_key,
-            }
-        )
+    def _send_kv(
+        self,
+        name,
+        tag,
+        data,
+        channel_infos,
+        partition_size,
+        partitions,
+        message_key,
+        content_type=JSON_CONTENT_TYPE,
+        message_count=None,
+    ):
+        headers = {
+            "partition_size": partition_size,
+            "partitions": partitions,
+            "message_key": message_key,
+        }
+        # the last message of a partition tells how many messages the partition was sent in
+        if message_count is not None:
+            headers["message_count"] = message_count
+        headers = json.dumps(headers)
         for info in channel_infos:
             properties = {
-                "content_type": "application/json",
+                "content_type": content_type,
                 "app_id": info._dst_party_id,
                 "message_id": name,
                 "correlation_id": tag,
@@ -287,6 +318,7 @@ class MessageQueueBasedFederation(Federation):
         mq,
         max_message_size,
         conf: dict,
+        content_type=JSON_CONTENT_TYPE,
     ):
         def _fn(index, kvs):
             return self._partition_send(
@@ -301,6 +333,7 @@ class MessageQueueBasedFederation(Federation):
                 mq=mq,
                 max_message_size=max_message_size,
                 conf=conf,
+                content_type=content_type,
             )
 
         return _fn
@@ -318,6 +351,7 @@ class MessageQueueBasedFederation(Federation):
         mq,
         max_message_size,
         conf: dict,
+        content_type=JSON_CONTENT_TYPE,
     ):
         channel_infos = self._get_channels_index(
             index=index,
@@ -328,30 +362,30 @@ class MessageQueueBasedFederation(Federation):
             conf=conf,
         )
 
-        datastream = Datastream()
+        datastream = create_datastream(content_type)
         base_message_key = str(index)
         message_key_idx = 0
         count = 0
 
         for k, v in kvs:
             count += 1
-            el = {"k": k.hex(), "v": v.hex()}
-            # roughly caculate the size of package to avoid serialization ;)
-            if datastream.get_size() + sys.getsizeof(el["k"]) + sys.getsizeof(el["v"]) >= max_message_size:
+            # flush before the encoded batch would exceed max_message_size, a single oversized record is sent alone
+            if len(datastream) > 0 and datastream.get_size() + datastream.get_record_size(k, v) >= max_message_size:
                 LOGGER.debug(f"[federation._partition_send]The size of message is: {datastream.get_size()}")
                 message_key_idx += 1
                 message_key = base_message_key + "_" + str(message_key_idx)
                 self._send_kv(
                     name=name,
                     tag=tag,
-                    data=datastream.get_data().encode(),
+                    data=datastream.get_data(),
                     channel_infos=channel_infos,
                     partition_size=-1,
                     partitions=partitions,
                     message_key=message_key,
+                    content_type=content_type,
                 )
                 datastream.clear()
-            datastream.append(el)
+            datastream.append(k, v)
 
         message_key_idx += 1
         message_key = _SPLIT_.join([base_message_key, str(message_key_idx)])
@@ -359,12 +393,16 @@ class MessageQueueBasedFederation(Federation):
         self._send_kv(
             name=name,
             tag=tag,
-            data=datastream.get_data().encode(),
+            data=datastream.get_data(),
             channel_infos=channel_infos,
             partition_size=count,
             partitions=partitions,
             message_key=message_key,
+            content_type=content_type,
+            message_count=message_key_idx,
         )
+        for info in channel_infos:
+            self._flush_channel(info)
 
         return []
 
@@ -440,6 +478,13 @@ class MessageQueueBasedFederation(Federation):
         mq,
         conf: dict,
     ):
+        """
+        yield received kv pairs message by message instead of buffering the whole partition,
+        a message is acked only after all of its pairs have been consumed by the caller,
+        that is, written to the output transaction, so at most one message batch is held in memory.
+        a caller that stops early or raises leaves the message being consumed unacked on purpose: its pairs may not
+        have been written, so it is redelivered to the next consumer of the channel, messages before it stay acked.
+        """
         _, _, topic_pair = topic_infos[index]
         channel_info = self._get_channel(
             topic_pair=topic_pair,
@@ -454,7 +499,6 @@ class MessageQueueBasedFederation(Federation):
         message_key_cache = set()
         count = 0
         partition_size = -1
-        all_data = []
 
         while True:
             try:
@@ -468,7 +512,7 @@ class MessageQueueBasedFederation(Federation):
                         )
                         continue
 
-                    if properties["content_type"] == "application/json":
+                    if properties["content_type"] in (JSON_CONTENT_TYPE, BINARY_CONTENT_TYPE):
                         header = json.loads(properties["headers"])
                         message_key = header["message_key"]
                         if message_key in message_key_cache:
@@ -481,25 +525,20 @@ class MessageQueueBasedFederation(Federation):
                         if header["partition_size"] >= 0:
                             partition_size = header["partition_size"]
 
-                        data = json.loads(body.decode())
-                        data_iter = (
-                            (
-                                bytes.fromhex(el["k"]),
-                                bytes.fromhex(el["v"]),
-                            )
-                            for el in data
-                        )
+                        data = decode_datastream(properties["content_type"], body)
                         count += len(data)
                         LOGGER.debug(f"[federation._partition_receive] count: {count}")
-                        all_data.extend(data_iter)
+                        yield from data
+                        del data
                         self._consume_ack(channel_info, id)
 
                         if count == partition_size:
                             channel_info.cancel()
-                            return all_data
+                            return
                     else:
-                        ValueError(
-                            f"[federation._partition_receive]properties.content_type is {properties['content_type']}, but must be application/json"
+                        raise ValueError(
+                            f"[federation._partition_receive]properties.content_type is {properties['content_type']}, "
+                            f"but must be {JSON_CONTENT_TYPE} or {BINARY_CONTENT_TYPE}"
                         )
 
             except Exception as e:
@@ -507,7 +546,7 @@ class MessageQueueBasedFederation(Federation):
                 # avoid hang on consume()
                 if count == partition_size:
                     channel_info.cancel()
-                    return all_data
+                    return
                 else:
                     raise e
 
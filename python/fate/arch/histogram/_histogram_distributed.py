@@ -246,6 +246,30 @@ class DistributedHistogram:
         data = HistogramSplits.cat([split for _, split in out])
         return Histogram(HistogramIndexer(self._node_size, [self._node_data_size]), data)
 
+    def decrypt_map_reduce(
+        self,
+        sk_map: MutableMapping[str, typing.Any],
+        coder_map: MutableMapping[str, typing.Tuple[typing.Any, torch.dtype]],
+        unpacker_map: Optional[MutableMapping[str, typing.Tuple[typing.Any, int, int, int, int, int]]],
+        map_func: typing.Callable[[int, Histogram], typing.Any],
+        reduce_func: typing.Callable[[typing.Any, typing.Any], typing.Any],
+    ):
+        """
+        Decrypt each split where it lives and reduce the results, without collecting the whole histogram.
+
+        Args:
+            map_func: (start, histogram) -> result, histogram holds data index [start, end) of every node
+            reduce_func: merge two results of map_func
+        """
+        decrypt = _decrypt_func(sk_map, coder_map, self._squeezed, unpacker_map)
+
+        def _map(split: HistogramSplits):
+            split = decrypt(split)
+            data = HistogramSplits.cat([split])
+            return map_func(split.start, Histogram(HistogramIndexer(split.num_node, [split.end - split.start]), data))
+
+        return self._splits.mapValues(_map).reduce(reduce_func)
+
     # def decrypt_(self, sk_map: MutableMapping[str, typing.Any]):
     #     """
     #     Decrypt the histogram values.
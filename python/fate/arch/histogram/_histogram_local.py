@@ -67,15 +67,13 @@ class Histogram:
 
     def i_update(self, fids, nids, targets, node_mapping):
         if node_mapping is None:
-            positions = self._indexer.get_positions(
-                nids.flatten().detach().numpy().tolist(), fids.detach().numpy().tolist()
-            )
+            positions = self._indexer.get_positions_array(nids.detach().numpy(), fids.detach().numpy())
             if len(positions) == 0:
                 return self
             self._data.i_update(targets, positions)
         else:
-            positions, masks = self._indexer.get_positions_with_node_mapping(
-                nids.flatten().detach().numpy().tolist(), fids.detach().numpy().tolist(), node_mapping
+            positions, masks = self._indexer.get_positions_array_with_node_mapping(
+                nids.detach().numpy(), fids.detach().numpy(), node_mapping
             )
             if len(positions) == 0:
                 return self
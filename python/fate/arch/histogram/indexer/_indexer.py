@@ -156,6 +156,47 @@ class HistogramIndexer:
             positions.append([self.get_position(nid, fid, bid) for fid, bid in enumerate(bids)])
         return positions
 
+    def get_positions_array(self, nids: np.ndarray, bids: np.ndarray) -> np.ndarray:
+        """
+        vectorized version of `get_positions`
+        Args:
+            nids: node ids, shape (n,) or (n, 1)
+            bids: bin ids, shape (n, feature_size)
+
+        Returns: data positions, int64 array with shape (n, feature_size)
+        """
+        nids = np.asarray(nids, dtype=np.int64).reshape(-1)
+        bids = np.asarray(bids)
+        assert len(nids) == len(bids), f"nids length {len(nids)} is not equal to bids length {len(bids)}"
+        return (nids * self.node_axis_stride)[:, None] + self.feature_axis_stride[None, :-1] + bids
+
+    def get_positions_array_with_node_mapping(
+        self, nids: np.ndarray, bids: np.ndarray, node_mapping: Dict[int, int]
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        vectorized version of `get_positions_with_node_mapping`, the node mapping is applied through a dense
+        lookup array indexed by node id
+        Args:
+            nids: node ids, shape (n,) or (n, 1)
+            bids: bin ids, shape (n, feature_size)
+            node_mapping: node mapping
+
+        Returns: data positions of the mapped rows with shape (m, feature_size), and the bool masks with shape (n,)
+        """
+        nids = np.asarray(nids, dtype=np.int64).reshape(-1)
+        bids = np.asarray(bids)
+        assert len(nids) == len(bids), f"nids length {len(nids)} is not equal to bids length {len(bids)}"
+        if len(node_mapping) == 0:
+            return np.empty((0, self.feature_size), dtype=np.int64), np.zeros(len(nids), dtype=bool)
+        lookup = np.full(max(node_mapping) + 1, -1)
+        lookup[list(node_mapping.keys())] = list(node_mapping.values())
+        in_range = (nids >= 0) & (nids < len(lookup))
+        mapped = np.full(len(nids), -1)
+        mapped[in_range] = lookup[nids[in_range]]
+        masks = mapped >= 0
+        positions = self.get_positions_array(mapped[masks], bids[masks])
+        return positions, masks
+
     def get_reverse_position(self, position) -> Tuple[int, int, int]:
         """
         get node_id, feature_id, bin_id by data position
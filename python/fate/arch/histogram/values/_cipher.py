@@ -17,6 +17,7 @@ import logging
 import typing
 from typing import List, Tuple
 
+import numpy as np
 import torch
 
 from ._encoded import HistogramEncodedValues
@@ -46,7 +47,7 @@ class HistogramEncryptedValues(HistogramValues):
         if isinstance(value, PHETensor):
             value = value.data
 
-        return self.evaluator.i_update(self.pk, self.data, value, positions, self.stride)
+        return self.evaluator.i_update(self.pk, self.data, value, _as_list(positions), self.stride)
 
     def i_update_with_masks(self, value, positions, masks):
         from fate.arch.tensor.phe import PHETensor
@@ -54,7 +55,9 @@ class HistogramEncryptedValues(HistogramValues):
         if isinstance(value, PHETensor):
             value = value.data
 
-        return self.evaluator.i_update_with_masks(self.pk, self.data, value, positions, masks, self.stride)
+        return self.evaluator.i_update_with_masks(
+            self.pk, self.data, value, _as_list(positions), _as_list(masks), self.stride
+        )
 
     def iadd(self, other):
         self.evaluator.i_add(self.pk, self.data, other.data)
@@ -152,3 +155,10 @@ class HistogramEncryptedValues(HistogramValues):
 
     def extract_node_data(self, node_data_size, node_size):
         raise NotImplementedError
+
+
+def _as_list(array):
+    # the evaluators of cipher vectors accept nested lists only, `tolist` converts the positions array in one C call
+    if isinstance(array, np.ndarray):
+        return array.tolist()
+    return array
@@ -67,12 +67,12 @@ class HistogramPlainValues(HistogramValues):
 
     def i_update(self, value, positions):
         if self.stride == 1:
-            index = torch.LongTensor(positions)
+            index = torch.as_tensor(positions, dtype=torch.int64)
             value = value.view(-1, 1).expand(-1, index.shape[1]).flatten()
             index = index.flatten()
             data = self.data
         else:
-            index = torch.LongTensor(positions)
+            index = torch.as_tensor(positions, dtype=torch.int64)
             data = self.data.view(-1, self.stride)
             value = (
                 value.view(-1, self.stride)
@@ -87,14 +87,15 @@ class HistogramPlainValues(HistogramValues):
         data.scatter_add_(0, index, value)
 
     def i_update_with_masks(self, value, positions, masks):
+        masks = torch.as_tensor(masks, dtype=torch.bool)
         if self.stride == 1:
-            value = value[masks]
-            index = torch.LongTensor(positions)
+            value = value.view(-1)[masks]
+            index = torch.as_tensor(positions, dtype=torch.int64)
             value = value.view(-1, 1).expand(-1, index.shape[1]).flatten()
             index = index.flatten()
             data = self.data
         else:
-            index = torch.LongTensor(positions)
+            index = torch.as_tensor(positions, dtype=torch.int64)
             data = self.data.view(-1, self.stride)
             value = value.view(-1, self.stride)[masks]
             value = value.unsqueeze(1).expand(-1, index.shape[1], self.stride).reshape(-1, self.stride)
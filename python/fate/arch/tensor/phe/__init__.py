@@ -13,7 +13,14 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from ._keypair import PHETensorCipher, PHETensorCipherPublic, PHETensorEncryptor, PHETensorDecryptor, PHETensorCoder
+from ._keypair import (
+    PHEObfuscatorPool,
+    PHETensorCipher,
+    PHETensorCipherPublic,
+    PHETensorEncryptor,
+    PHETensorDecryptor,
+    PHETensorCoder,
+)
 from ._ops import *
 from ._tensor import PHETensor
 
@@ -24,4 +31,5 @@ __all__ = [
     "PHETensorEncryptor",
     "PHETensorDecryptor",
     "PHETensorCoder",
+    "PHEObfuscatorPool",
 ]
@@ -13,7 +13,11 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import logging
+import threading
 import typing
+import weakref
+from collections import deque
 
 import torch
 
@@ -22,6 +26,8 @@ if typing.TYPE_CHECKING:
 
     from ._tensor import PHETensor, PHETensorEncoded
 
+logger = logging.getLogger(__name__)
+
 
 class PHETensorCipherPublic:
     def __init__(self, pk: "PHETensorEncryptor", coder: "PHETensorCoder", evaluator) -> None:
@@ -44,9 +50,11 @@ class PHETensorCipher(PHETensorCipherPublic):
         self._sk = sk
 
     @classmethod
-    def from_raw_cipher(cls, pk: "PK", coder: "Coder", sk: "SK", evaluator):
+    def from_raw_cipher(
+        cls, pk: "PK", coder: "Coder", sk: "SK", evaluator, obfuscator: typing.Optional["PHEObfuscatorPool"] = None
+    ):
         coder = PHETensorCoder(coder)
-        encryptor = PHETensorEncryptor(pk, coder, evaluator)
+        encryptor = PHETensorEncryptor(pk, coder, evaluator, obfuscator)
         decryptor = PHETensorDecryptor(sk, coder)
         return cls(encryptor, coder, decryptor, evaluator)
 
@@ -57,6 +65,9 @@ class PHETensorCipher(PHETensorCipherPublic):
     def to_public(self):
         return PHETensorCipherPublic(self.pk, self.coder, self._evaluator)
 
+    def close(self):
+        self._pk.close()
+
 
 class PHETensorCoder:
     def __init__(self, coder: "Coder") -> None:
@@ -113,17 +124,174 @@ class PHETensorCoder:
             raise NotImplementedError(f"`{tensor}` not supported")
 
 
+class PHEObfuscatorPool:
+    """
+    pool of obfuscated encryptions of zero, kept filled by background threads.
+
+    adding an obfuscated zero to a plain encryption gives a ciphertext distributed exactly like an obfuscated
+    encryption, so the costly noise term (`r^n mod n^2` for paillier) is computed ahead of time instead of on
+    the encryption path. the bindings hold the gil while generating, so refilling mostly overlaps federation
+    and io waits. requests larger than the pool take what is available and generate the rest on the fly.
+    """
+
+    def __init__(self, pk: "PK", coder: "Coder", evaluator, pool_size: int, refill_threads: int = 1, chunk_size=256):
+        self._pk = pk
+        self._coder = coder
+        self._evaluator = evaluator
+        self._pool_size = pool_size
+        self._chunk_size = max(1, min(chunk_size, pool_size))
+        self._chunks = deque()
+        self._available = 0
+        self._generating = 0
+        self._hits = 0
+        self._misses = 0
+        self._closed = False
+        self._cond = threading.Condition()
+
+        # threads hold the pool weakly while waiting, an unreferenced pool is collected and its threads exit
+        pool_ref = weakref.ref(self)
+        for i in range(refill_threads):
+            threading.Thread(
+                target=_refill_obfuscator_pool, args=(pool_ref, self._cond), name=f"phe-obfuscator-{i}", daemon=True
+            ).start()
+
+    @property
+    def hits(self):
+        return self._hits
+
+    @property
+    def misses(self):
+        return self._misses
+
+    @property
+    def hit_rate(self):
+        total = self._hits + self._misses
+        return self._hits / total if total else 0.0
+
+    @property
+    def available(self):
+        return self._available
+
+    def _generate(self, size):
+        zeros = self._coder.encode_vec(torch.zeros(size, dtype=torch.int64), dtype=torch.int64)
+        return self._pk.encrypt_encoded(zeros, obfuscate=True)
+
+    def _reserve_chunk(self):
+        with self._cond:
+            if self._available + self._generating >= self._pool_size:
+                return False
+            self._generating += self._chunk_size
+            return True
+
+    def _fill_chunk(self):
+        try:
+            chunk = self._generate(self._chunk_size)
+        except Exception:
+            logger.exception("failed to generate obfuscators, stop refilling")
+            with self._cond:
+                self._generating -= self._chunk_size
+            return False
+        with self._cond:
+            self._generating -= self._chunk_size
+            if self._closed:
+                return False
+            self._chunks.append((chunk, self._chunk_size))
+            self._available += self._chunk_size
+        return True
+
+    def take(self, size: int):
+        """
+        take `size` obfuscated zeros, drawn from the pool first and generated on the fly for the rest
+        """
+        parts = []
+        taken = 0
+        with self._cond:
+            while taken < size and self._chunks:
+                chunk, chunk_size = self._chunks.popleft()
+                n = min(chunk_size, size - taken)
+                if n < chunk_size:
+                    self._chunks.appendleft((self._evaluator.slice(chunk, n, chunk_size - n), chunk_size - n))
+                    chunk = self._evaluator.slice(chunk, 0, n)
+                parts.append(chunk)
+                taken += n
+            self._available -= taken
+            self._hits += taken
+            self._misses += size - taken
+            self._cond.notify_all()
+        if taken < size:
+            parts.append(self._generate(size - taken))
+        if len(parts) == 1:
+            return parts[0]
+        return self._evaluator.cat(parts)
+
+    def obfuscate(self, data):
+        return self._evaluator.add(data, self.take(len(data)), self._pk)
+
+    def close(self):
+        with self._cond:
+            self._closed = True
+            self._chunks.clear()
+            self._available = 0
+            self._cond.notify_all()
+        logger.debug(f"obfuscator pool closed, hits={self._hits}, misses={self._misses}, hit_rate={self.hit_rate:.4f}")
+
+
+def _refill_obfuscator_pool(pool_ref, cond: threading.Condition, timeout=1.0):
+    while True:
+        with cond:
+            pool = pool_ref()
+            if pool is None or pool._closed:
+                return
+            reserved = pool._reserve_chunk()
+            del pool
+            if not reserved:
+                cond.wait(timeout)
+                continue
+        pool = pool_ref()
+        if pool is None or not pool._fill_chunk():
+            return
+        del pool
+
+
 class PHETensorEncryptor:
-    def __init__(self, pk: "PK", coder: "PHETensorCoder", evaluator) -> None:
+    def __init__(
+        self, pk: "PK", coder: "PHETensorCoder", evaluator, obfuscator: typing.Optional[PHEObfuscatorPool] = None
+    ) -> None:
         self._pk = pk
         self._coder = coder
         self._evaluator = evaluator
+        self._obfuscator = obfuscator
+
+    def __getstate__(self):
+        # the pool owns refill threads and stays with the party that set up the cipher
+        state = self.__dict__.copy()
+        state["_obfuscator"] = None
+        return state
+
+    def __setstate__(self, state):
+        state.setdefault("_obfuscator", None)
+        self.__dict__.update(state)
+
+    @property
+    def obfuscator(self) -> typing.Optional[PHEObfuscatorPool]:
+        return self._obfuscator
+
+    def close(self):
+        """
+        stop refilling the obfuscator pool and drop it, encryption keeps working without it
+        """
+        if self._obfuscator is not None:
+            self._obfuscator.close()
+            self._obfuscator = None
 
     def encrypt_encoded(self, tensor: "PHETensorEncoded", obfuscate=False):
         from ._tensor import PHETensor, PHETensorEncoded
 
         if isinstance(tensor, PHETensorEncoded):
-            data = self._pk.encrypt_encoded(tensor.data, obfuscate)
+            if obfuscate and self._obfuscator is not None:
+                data = self._obfuscator.obfuscate(self._pk.encrypt_encoded(tensor.data, False))
+            else:
+                data = self._pk.encrypt_encoded(tensor.data, obfuscate)
             return PHETensor(self._pk, self._evaluator, tensor.coder, tensor.shape, data, tensor.dtype, tensor.device)
         elif hasattr(tensor, "encrypt_encoded"):
             return tensor.encrypt_encoded(self)
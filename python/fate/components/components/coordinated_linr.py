@@ -72,6 +72,13 @@ def train(
         desc="homomorphic encryption param",
     ),
     floating_point_precision: cpn.parameter(type=params.conint(ge=0), default=23, desc="floating point precision, "),
+    pipeline_staleness: cpn.parameter(
+        type=params.conint(ge=0),
+        default=0,
+        desc="number of batches whose gradient updates may still be in flight when the next batch starts, "
+        "a positive value overlaps encryption and host side encrypted matmul with the arbiter round, "
+        "0 trains synchronously",
+    ),
     train_output_data: cpn.dataframe_output(roles=[GUEST, HOST]),
     output_model: cpn.json_model_output(roles=[GUEST, HOST, ARBITER]),
     warm_start_model: cpn.json_model_input(roles=[GUEST, HOST, ARBITER], optional=True),
@@ -96,6 +103,7 @@ def train(
             learning_rate_scheduler,
             init_param,
             floating_point_precision,
+            pipeline_staleness,
             warm_start_model,
         )
     elif role.is_host:
@@ -111,6 +119,7 @@ def train(
             learning_rate_scheduler,
             init_param,
             floating_point_precision,
+            pipeline_staleness,
             warm_start_model,
         )
     elif role.is_arbiter:
@@ -280,6 +289,7 @@ def train_guest(
     learning_rate_param,
     init_param,
     floating_point_precision,
+    pipeline_staleness,
     input_model,
 ):
     if input_model is not None:
@@ -288,6 +298,7 @@ def train_guest(
         module = CoordinatedLinRModuleGuest.from_model(model)
         module.set_epochs(epochs)
         module.set_batch_size(batch_size)
+        module.set_pipeline_staleness(pipeline_staleness)
     else:
         module = CoordinatedLinRModuleGuest(
             epochs=epochs,
@@ -296,6 +307,7 @@ def train_guest(
             learning_rate_param=learning_rate_param,
             init_param=init_param,
             floating_point_precision=floating_point_precision,
+            pipeline_staleness=pipeline_staleness,
         )
     logger.info(f"coordinated linr guest start train")
     sub_ctx = ctx.sub_ctx("train")
@@ -338,6 +350,7 @@ def train_host(
     learning_rate_param,
     init_param,
     floating_point_precision,
+    pipeline_staleness,
     input_model,
 ):
     if input_model is not None:
@@ -346,6 +359,7 @@ def train_host(
         module = CoordinatedLinRModuleHost.from_model(model)
         module.set_epochs(epochs)
         module.set_batch_size(batch_size)
+        module.set_pipeline_staleness(pipeline_staleness)
     else:
         module = CoordinatedLinRModuleHost(
             epochs=epochs,
@@ -354,6 +368,7 @@ def train_host(
             learning_rate_param=learning_rate_param,
             init_param=init_param,
             floating_point_precision=floating_point_precision,
+            pipeline_staleness=pipeline_staleness,
         )
     logger.info(f"coordinated linr host start train")
     sub_ctx = ctx.sub_ctx("train")
@@ -56,6 +56,19 @@ def train(
         ),
     ),
     floating_point_precision: cpn.parameter(type=params.conint(ge=0), default=23, desc="floating point precision, "),
+    pipeline_staleness: cpn.parameter(
+        type=params.conint(ge=0),
+        default=0,
+        desc="number of batches whose gradient updates may still be in flight when the next batch starts, "
+        "a positive value overlaps encryption and host side encrypted matmul with the arbiter round, "
+        "0 trains synchronously",
+    ),
+    ovr_max_workers: cpn.parameter(
+        type=params.conint(ge=1),
+        default=1,
+        desc="number of one-vs-rest classes trained concurrently for multi-class data, "
+        "1 trains them one after another, values above 1 require a thread-safe federation such as standalone",
+    ),
     tol: cpn.parameter(type=params.confloat(ge=0), default=1e-4),
     early_stop: cpn.parameter(
         type=params.string_choice(["weight_diff", "diff", "abs"]),
@@ -100,6 +113,8 @@ def train(
             init_param,
             threshold,
             floating_point_precision,
+            pipeline_staleness,
+            ovr_max_workers,
             warm_start_model,
         )
     elif role.is_host:
@@ -115,6 +130,8 @@ def train(
             learning_rate_scheduler,
             init_param,
             floating_point_precision,
+            pipeline_staleness,
+            ovr_max_workers,
             warm_start_model,
         )
     elif role.is_arbiter:
@@ -126,6 +143,7 @@ def train(
             batch_size,
             optimizer,
             learning_rate_scheduler,
+            ovr_max_workers,
             output_model,
             warm_start_model,
         )
@@ -290,6 +308,8 @@ def train_guest(
     init_param,
     threshold,
     floating_point_precision,
+    pipeline_staleness,
+    ovr_max_workers,
     input_model,
 ):
     if input_model is not None:
@@ -298,6 +318,8 @@ def train_guest(
         module = CoordinatedLRModuleGuest.from_model(model)
         module.set_epochs(epochs)
         module.set_batch_size(batch_size)
+        module.set_pipeline_staleness(pipeline_staleness)
+        module.ovr_max_workers = ovr_max_workers
 
     else:
         module = CoordinatedLRModuleGuest(
@@ -308,6 +330,8 @@ def train_guest(
             init_param=init_param,
             threshold=threshold,
             floating_point_precision=floating_point_precision,
+            pipeline_staleness=pipeline_staleness,
+            ovr_max_workers=ovr_max_workers,
         )
     # optimizer = optimizer_factory(optimizer_param)
     logger.info(f"coordinated lr guest start train")
@@ -357,6 +381,8 @@ def train_host(
     learning_rate_param,
     init_param,
     floating_point_precision,
+    pipeline_staleness,
+    ovr_max_workers,
     input_model,
 ):
     if input_model is not None:
@@ -365,6 +391,8 @@ def train_host(
         module = CoordinatedLRModuleHost.from_model(model)
         module.set_epochs(epochs)
         module.set_batch_size(batch_size)
+        module.set_pipeline_staleness(pipeline_staleness)
+        module.ovr_max_workers = ovr_max_workers
     else:
         module = CoordinatedLRModuleHost(
             epochs=epochs,
@@ -373,6 +401,8 @@ def train_host(
             learning_rate_param=learning_rate_param,
             init_param=init_param,
             floating_point_precision=floating_point_precision,
+            pipeline_staleness=pipeline_staleness,
+            ovr_max_workers=ovr_max_workers,
         )
     logger.info(f"coordinated lr host start train")
     sub_ctx = ctx.sub_ctx("train")
@@ -393,7 +423,16 @@ def train_host(
 
 
 def train_arbiter(
-    ctx, epochs, early_stop, tol, batch_size, optimizer_param, learning_rate_scheduler, output_model, input_model
+    ctx,
+    epochs,
+    early_stop,
+    tol,
+    batch_size,
+    optimizer_param,
+    learning_rate_scheduler,
+    ovr_max_workers,
+    output_model,
+    input_model,
 ):
     if input_model is not None:
         logger.info(f"warm start model provided")
@@ -401,6 +440,7 @@ def train_arbiter(
         module = CoordinatedLRModuleArbiter.from_model(model)
         module.set_epochs(epochs)
         module.set_batch_size(batch_size)
+        module.ovr_max_workers = ovr_max_workers
     else:
         module = CoordinatedLRModuleArbiter(
             epochs=epochs,
@@ -409,6 +449,7 @@ def train_arbiter(
             batch_size=batch_size,
             optimizer_param=optimizer_param,
             learning_rate_param=learning_rate_scheduler,
+            ovr_max_workers=ovr_max_workers,
         )
     logger.info(f"coordinated lr arbiter start train")
     sub_ctx = ctx.sub_ctx("train")
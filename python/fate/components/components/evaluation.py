@@ -17,6 +17,7 @@ from typing import Dict
 from fate.arch import Context
 import numpy as np
 import pandas as pd
+import torch
 from fate.arch import Context
 from fate.components.core import ARBITER, GUEST, HOST, Role, cpn
 from fate.components.core.params import string_choice
@@ -63,6 +64,13 @@ def evaluation(
         desc="label data column namem if None(default), \
                                      will use 'label' in the input dataframe",
     ),
+    evaluate_by_states: cpn.parameter(
+        type=bool,
+        default=False,
+        optional=True,
+        desc="whether compute metrics from per-partition states merged by reduce instead of collecting the "
+        "predictions, scores are binned on a fixed grid so auc, ks and the curves are approximate",
+    ),
 ):
     if role.is_arbiter:
         return
@@ -91,13 +99,33 @@ def evaluation(
         eval_rs = {}
         logger.info("components names are {}".format(task_names))
         for name, df in zip(task_names, df_list):
-            rs_ = evaluate(df, metrics_ensemble, predict_col, label_col)
+            rs_ = evaluate(df, metrics_ensemble, predict_col, label_col, by_states=evaluate_by_states)
             eval_rs[name] = rs_
 
     ctx.metrics.log_metrics(eval_rs, name="evaluation", type="evaluation")
 
 
-def evaluate(input_datas, metrics, predict_col, label_col):
+def _block_column(blocks, block_loc):
+    bid, offset = block_loc
+    block = blocks[bid]
+    if isinstance(block, torch.Tensor):
+        return block[:, offset].detach().cpu().numpy()
+    elif isinstance(block, np.ndarray):
+        column = block[:, offset]
+    else:
+        column = np.asarray(block)
+    if column.dtype == object:
+        # object columns hold python scalars, or lists for multi-dimension scores
+        column = np.array(column.tolist())
+    return column
+
+
+def evaluate(input_datas, metrics, predict_col, label_col, by_states=False):
+    if by_states:
+        if metrics.is_mergeable():
+            return evaluate_by_states(input_datas, metrics, predict_col, label_col)
+        logger.info("some metrics can not be computed from states, evaluate on collected predictions")
+
     data = input_datas.as_pd_df()
     split_dict = split_dataframe_by_type(data)
     rs_dict = {}
@@ -109,3 +137,36 @@ def evaluate(input_datas, metrics, predict_col, label_col):
         rs_dict[name] = rs
 
     return rs_dict
+
+
+def evaluate_by_states(input_datas, metrics, predict_col, label_col):
+    """
+    every block computes the states of the metrics on each data type it holds and the states are merged by reduce,
+    so no node gathers the predictions and memory does not grow with the data size
+    """
+    data_manager = input_datas.data_manager
+    predict_loc = data_manager.loc_block(predict_col)
+    label_loc = data_manager.loc_block(label_col)
+    type_loc = data_manager.loc_block("type") if "type" in data_manager.get_field_name_list() else None
+
+    def _partial_states(blocks):
+        predict = _block_column(blocks, predict_loc)
+        label = _block_column(blocks, label_loc)
+        if type_loc is None:
+            return {"origin": metrics.partial_states(predict, label)}
+
+        data_types = _block_column(blocks, type_loc)
+        split_states = {}
+        for dataset_type in np.unique(data_types):
+            mask = data_types == dataset_type
+            split_states[dataset_type] = metrics.partial_states(predict[mask], label[mask])
+        return split_states
+
+    def _merge_states(split_states, other_split_states):
+        merged = dict(split_states)
+        for name, states in other_split_states.items():
+            merged[name] = metrics.merge_states(merged[name], states) if name in merged else states
+        return merged
+
+    split_states = input_datas.block_table.mapValues(_partial_states).reduce(_merge_states)
+    return {str(name): metrics.from_states(states) for name, states in split_states.items()}
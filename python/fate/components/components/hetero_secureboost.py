@@ -72,6 +72,11 @@ def train(
     gh_pack: cpn.parameter(type=bool, default=True, desc="whether to pack gradient and hessian together"),
     split_info_pack: cpn.parameter(type=bool, default=True, desc="for host side, whether to pack split info together"),
     hist_sub: cpn.parameter(type=bool, default=True, desc="whether to use histogram subtraction"),
+    distributed_split: cpn.parameter(
+        type=bool,
+        default=False,
+        desc="for guest side, whether to find best splits on each histogram partition instead of on the driver",
+    ),
     he_param: cpn.parameter(
         type=params.he_param(),
         default=params.HEParam(kind="paillier", key_length=1024),
@@ -109,6 +114,7 @@ def train(
             gh_pack=gh_pack,
             split_info_pack=split_info_pack,
             hist_sub=hist_sub,
+            distributed_split=distributed_split,
             top_rate=top_rate,
             other_rate=other_rate,
             goss_start_iter=goss_start_iter,
@@ -212,6 +218,11 @@ def cross_validation(
     gh_pack: cpn.parameter(type=bool, default=True, desc="whether to pack gradient and hessian together"),
     split_info_pack: cpn.parameter(type=bool, default=True, desc="for host side, whether to pack split info together"),
     hist_sub: cpn.parameter(type=bool, default=True, desc="whether to use histogram subtraction"),
+    distributed_split: cpn.parameter(
+        type=bool,
+        default=False,
+        desc="for guest side, whether to find best splits on each histogram partition instead of on the driver",
+    ),
     he_param: cpn.parameter(
         type=params.he_param(),
         default=params.HEParam(kind="paillier", key_length=1024),
@@ -255,6 +266,7 @@ def cross_validation(
                 gh_pack=gh_pack,
                 split_info_pack=split_info_pack,
                 hist_sub=hist_sub,
+                distributed_split=distributed_split,
                 goss_start_iter=goss_start_iter,
                 goss=goss,
                 top_rate=top_rate,
@@ -65,6 +65,12 @@ def _parse_data(data):
     return data
 
 
+def _set_input_uris(runner: NNRunner, cpn_input_data, input_data):
+    for cpn_input, data in zip(cpn_input_data, input_data):
+        if isinstance(cpn_input, DataframeReader):
+            runner.set_input_uri(data, str(cpn_input.artifact.uri))
+
+
 def get_input_data(stage, cpn_input_data):
     if stage == "train":
         train_data, validate_data = cpn_input_data
@@ -151,6 +157,7 @@ def train_procedure(
 
     output_dir = str(train_model_output.get_directory())
     train_data_, validate_data_ = get_input_data(consts.TRAIN, [train_data, validate_data])
+    _set_input_uris(runner, [train_data, validate_data], [train_data_, validate_data_])
 
     runner.train(train_data_, validate_data_, output_dir, saved_model_path)
 
@@ -202,6 +209,7 @@ def predict_procedure(
     test_data_ = get_input_data(consts.PREDICT, test_data)
     runner: NNRunner = prepare_runner_class(runner_module, runner_class, runner_conf, source)
     prepare_context_and_role(runner, ctx, role, consts.PREDICT)
+    _set_input_uris(runner, [test_data], [test_data_])
     test_pred = runner.predict(test_data_, saved_model_path=saved_model_path)
     if test_pred is not None:
         assert isinstance(test_pred, DataFrame), "test predict result should be a DataFrame"
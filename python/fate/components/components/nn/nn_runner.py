@@ -144,6 +144,20 @@ class NNRunner(object):
         assert isinstance(self._party_id, int)
         self._party_id = party_id
 
+    def set_input_uri(self, data, uri: str):
+        """
+        uri of the input artifact data was read from, datasets caching their input use it as cache key
+        """
+        if not hasattr(self, "_input_uris"):
+            self._input_uris = []
+        self._input_uris.append((data, uri))
+
+    def get_input_uri(self, data) -> Optional[str]:
+        for input_data, uri in getattr(self, "_input_uris", []):
+            if input_data is data:
+                return uri
+        return None
+
     def get_fateboard_tracker(self):
         pass
 
@@ -92,7 +92,11 @@ class DefaultRunner(NNRunner):
         else:
             dataset = loader_load_from_conf(self.dataset_conf)
             if hasattr(dataset, "load"):
-                dataset.load(data)
+                if isinstance(data, DataFrame) and getattr(dataset, "cache_dir", None) is not None:
+                    # dataframes are cached by the uri of the artifact they were read from
+                    dataset.load(data, cache_key=self.get_input_uri(data))
+                else:
+                    dataset.load(data)
             else:
                 raise ValueError(
                     f"The dataset {dataset} lacks a load() method, which is required for data parsing in the DefaultRunner.Please implement this method in your dataset class. You can refer to the base class 'Dataset' in 'fate.ml.nn.dataset.base' \
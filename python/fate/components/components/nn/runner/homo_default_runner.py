@@ -147,7 +147,11 @@ class DefaultRunner(NNRunner):
             dataset = loader_load_from_conf(self.dataset_conf)
             if hasattr(dataset, "load"):
                 logger.info("load path is {}".format(data))
-                load_output = dataset.load(data)
+                if isinstance(data, DataFrame) and getattr(dataset, "cache_dir", None) is not None:
+                    # dataframes are cached by the uri of the artifact they were read from
+                    load_output = dataset.load(data, cache_key=self.get_input_uri(data))
+                else:
+                    load_output = dataset.load(data)
                 if load_output is not None:
                     dataset = load_output
                     return dataset
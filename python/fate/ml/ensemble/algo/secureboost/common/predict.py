@@ -12,118 +12,144 @@
 #  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
-import pandas as pd
 import numpy as np
 from typing import List
 from fate.arch import Context
 from fate.arch.dataframe import DataFrame
-import copy
-from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import DecisionTree, _make_decision, Node
+from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import DecisionTree, Node, FLOAT_ZERO
 import functools
 from logging import getLogger
 
 logger = getLogger(__name__)
 
 
-def get_dtype(max_int):
-    if max_int < (2**8) / 2:
-        return np.int8
-    elif max_int < (2**16) / 2:
-        return np.int16
-    else:
-        return np.int64
-
-
-def all_reach_leaf(pos: np.array):
-    if isinstance(pos, list):
-        pos = np.array(pos)
-    return np.all(pos < 0)
-
-
-def not_finished(pos: np.array):
-    if isinstance(pos, list):
-        pos = np.array(pos)
-    return not np.all(pos < 0)
-
-
-def generate_pos_array(tree_num, max_node_num):
-    dtype = get_dtype(max_node_num)
-    # return list as a column of dataframe
-    return [np.zeros(tree_num, dtype=dtype)]
-
-
-def go_deep(s: pd.Series, tree: List[Node], sitename, cur_node_id, tree_idx=None):
-    node: Node = tree[cur_node_id]
-    while True:
-        if node.is_leaf:
-            return -(node.nid + 1)
-        elif node.sitename != sitename:
-            return node.nid
-        else:
-            fid = node.fid
-            split_val = node.bid
-            sample_feat_val = s[fid]
-            is_left = _make_decision(sample_feat_val, split_val)
-            if is_left:
-                node = tree[node.l]
-            else:
-                node = tree[node.r]
-
-
-def traverse_tree(s: pd.Series, trees: List[List[Node]], sitename: str):
-    sample_pos = s["sample_pos"]
-    new_sample_pos = np.copy(sample_pos)  # deepcopy to avoid inplace modification, for spark
-
-    tree_idx = 0
-    for node_pos, tree in zip(sample_pos, trees):
-        if node_pos < 0:  # sample already reaches leaf node in this tree
-            tree_idx += 1
-            continue
-
-        cur_node_id = node_pos
-        end_node_id = go_deep(s, tree, sitename, cur_node_id, tree_idx=tree_idx)
-        new_sample_pos[tree_idx] = end_node_id
-        tree_idx += 1
-
-    return [new_sample_pos]
-
-
-def _merge_pos_arr(s: pd.Series):
-    arr_1 = s["sample_pos"]
-    arr_2 = s["host_sample_pos"]
-    arr_1 = np.array(arr_1)
-    arr_2 = np.array(arr_2)
-    assert len(arr_1) == len(arr_2)
-    merge_rs = np.copy(arr_1)
-    already_on_leaf = arr_1 < 0
-    on_leaf = arr_2 < 0
-    updated = ~already_on_leaf & (on_leaf | (arr_2 > arr_1))
-    merge_rs[updated] = arr_2[updated]
-    return [merge_rs]
-
-
-def _merge_pos(guest_pos: DataFrame, host_pos: List[DataFrame]):
+SAMPLE_POS_PREFIX = "sample_pos_"
+HOST_SAMPLE_POS_PREFIX = "host_sample_pos_"
+
+
+def get_pos_columns(tree_num, prefix=SAMPLE_POS_PREFIX):
+    return [f"{prefix}{i}" for i in range(tree_num)]
+
+
+class CompiledTrees(object):
+    """
+    Flat array layout of a list of trees, row t holds the nodes of tree t indexed by their position in the node list.
+
+    Sample positions follow the convention of the tree learners: a non-negative value is the node id a sample
+    is waiting on, a negative value -(nid + 1) means the sample reached leaf nid.
+    """
+
+    def __init__(self, trees: List[List[Node]], sitename: str, feature_names: List[str] = None):
+        tree_num = len(trees)
+        max_node_num = max([len(tree) for tree in trees])
+        feature_idx = {name: idx for idx, name in enumerate(feature_names)} if feature_names is not None else {}
+
+        self.tree_num = tree_num
+        self.nid = np.zeros((tree_num, max_node_num), dtype=np.int64)
+        self.fid = np.zeros((tree_num, max_node_num), dtype=np.int64)
+        self.bid = np.zeros((tree_num, max_node_num), dtype=np.float64)
+        self.left = np.zeros((tree_num, max_node_num), dtype=np.int64)
+        self.right = np.zeros((tree_num, max_node_num), dtype=np.int64)
+        self.is_leaf = np.zeros((tree_num, max_node_num), dtype=bool)
+        self.on_local = np.zeros((tree_num, max_node_num), dtype=bool)
+        self.weight = np.zeros((tree_num, max_node_num), dtype=np.float64)
+
+        for tree_idx, tree in enumerate(trees):
+            for node_idx, node in enumerate(tree):
+                self.nid[tree_idx, node_idx] = node.nid
+                self.is_leaf[tree_idx, node_idx] = node.is_leaf
+                if node.is_leaf:
+                    self.weight[tree_idx, node_idx] = node.weight
+                    continue
+                self.left[tree_idx, node_idx] = node.l
+                self.right[tree_idx, node_idx] = node.r
+                if node.sitename == sitename:
+                    if node.fid not in feature_idx:
+                        raise ValueError(f"split feature {node.fid} of tree {tree_idx} not found in predict data")
+                    self.on_local[tree_idx, node_idx] = True
+                    self.fid[tree_idx, node_idx] = feature_idx[node.fid]
+                    self.bid[tree_idx, node_idx] = node.bid
+
+    def traverse(self, features: np.ndarray, sample_pos: np.ndarray) -> np.ndarray:
+        """
+        move every pending (sample, tree) pair down the local split nodes until it reaches a leaf or a node of
+        another site, features has shape (n, feature_num) and sample_pos has shape (n, tree_num)
+        """
+        sample_pos = sample_pos.astype(np.int64)
+        rows, trees = np.nonzero(sample_pos >= 0)
+        cur = sample_pos[rows, trees]
+        while len(cur):
+            is_leaf = self.is_leaf[trees, cur]
+            on_remote = ~is_leaf & ~self.on_local[trees, cur]
+            sample_pos[rows[is_leaf], trees[is_leaf]] = -(self.nid[trees[is_leaf], cur[is_leaf]] + 1)
+            sample_pos[rows[on_remote], trees[on_remote]] = self.nid[trees[on_remote], cur[on_remote]]
+
+            go_deep = ~(is_leaf | on_remote)
+            rows, trees, cur = rows[go_deep], trees[go_deep], cur[go_deep]
+            feat_val = features[rows, self.fid[trees, cur]]
+            is_left = feat_val <= self.bid[trees, cur] + FLOAT_ZERO
+            cur = np.where(is_left, self.left[trees, cur], self.right[trees, cur])
+
+        return sample_pos
+
+    def leaf_weights(self, sample_pos: np.ndarray) -> np.ndarray:
+        """
+        weights of the leaves the samples reached, sample_pos has shape (n, tree_num)
+        """
+        leaf_idx = -(sample_pos.astype(np.int64) + 1)
+        return self.weight[np.arange(self.tree_num)[None, :], leaf_idx]
+
+
+def _traverse_block(values: np.ndarray, compiled_trees: CompiledTrees, feature_num: int):
+    return compiled_trees.traverse(values[:, :feature_num], values[:, feature_num:])
+
+
+def _merge_pos_block(values: np.ndarray, tree_num: int):
+    guest_pos = values[:, :tree_num].astype(np.int64)
+    host_pos = values[:, tree_num:].astype(np.int64)
+    already_on_leaf = guest_pos < 0
+    on_leaf = host_pos < 0
+    updated = ~already_on_leaf & (on_leaf | (host_pos > guest_pos))
+    return np.where(updated, host_pos, guest_pos)
+
+
+def _all_reach_leaf_block(values: np.ndarray):
+    return np.all(values < 0, axis=1, keepdims=True)
+
+
+def _pending_block(values: np.ndarray):
+    return ~np.all(values < 0, axis=1, keepdims=True)
+
+
+def _merge_pos(guest_pos: DataFrame, host_pos: List[DataFrame], tree_num: int):
+    pos_columns = get_pos_columns(tree_num)
+    merge_func = functools.partial(_merge_pos_block, tree_num=tree_num)
     for host_df in host_pos:
         # assert alignment
         indexer = guest_pos.get_indexer(target="sample_id")
         host_df = host_df.loc(indexer=indexer, preserve_order=True)
         stack_df = DataFrame.hstack([guest_pos, host_df])
-        guest_pos["sample_pos"] = stack_df.apply_row(_merge_pos_arr)
+        guest_pos = stack_df.apply_block(merge_func, columns=pos_columns, dtype="int64")
 
     return guest_pos
 
 
 def predict_leaf_guest(ctx: Context, trees: List[DecisionTree], data: DataFrame):
+    """
+    Returns a frame with one column per tree, `sample_pos_{tree_idx}`, holding -(leaf_nid + 1) of each sample
+    """
     predict_data = data
-    tree_list = [tree.get_nodes() for tree in trees]
-    max_node_num = max([len(tree) for tree in tree_list])
-    map_func = functools.partial(generate_pos_array, tree_num=len(trees), max_node_num=max_node_num)
+    feature_names = data.schema.columns.tolist()
+    sitename = ctx.local.name
+    compiled_trees = CompiledTrees([tree.get_nodes() for tree in trees], sitename, feature_names)
+    tree_num = compiled_trees.tree_num
+    pos_columns = get_pos_columns(tree_num)
 
     sample_pos = data.create_frame()
-    sample_pos["sample_pos"] = data.apply_row(lambda x: map_func())
+    sample_pos[pos_columns] = 0
     result_sample_pos = sample_pos.empty_frame()
 
-    sitename = ctx.local.name
+    traverse_func = functools.partial(_traverse_block, compiled_trees=compiled_trees, feature_num=len(feature_names))
 
     # start loop here
     comm_round = 0
@@ -136,16 +162,9 @@ def predict_leaf_guest(ctx: Context, trees: List[DecisionTree], data: DataFrame)
 
         sample_with_pos = DataFrame.hstack([predict_data, sample_pos])
         logger.info("predict round {} has {} samples to predict".format(comm_round, len(sample_with_pos)))
-        map_func = functools.partial(traverse_tree, trees=tree_list, sitename=sitename)
-        new_pos = sample_with_pos.create_frame()
-        new_pos["sample_pos"] = sample_with_pos.apply_row(map_func)
-        done_sample_idx = new_pos.apply_row(
-            lambda x: all_reach_leaf(x["sample_pos"])
-        )  # samples that reach leaf node in all trees
-        # not_finished_sample_idx = ~done_sample_idx
-        not_finished_sample_idx = new_pos.apply_row(
-            lambda x: not_finished(x["sample_pos"])
-        )  # samples that not reach leaf node in all trees
+        new_pos = sample_with_pos.apply_block(traverse_func, columns=pos_columns, dtype="int64")
+        # samples that reach leaf node in all trees
+        done_sample_idx = new_pos.apply_block(_all_reach_leaf_block, columns=["done"], dtype="bool")
 
         done_sample = new_pos.iloc(done_sample_idx)
         result_sample_pos = DataFrame.vstack([result_sample_pos, done_sample])
@@ -154,13 +173,14 @@ def predict_leaf_guest(ctx: Context, trees: List[DecisionTree], data: DataFrame)
             break
 
         sub_ctx.hosts.put("need_stop", False)
-        pending_samples = new_pos.iloc(not_finished_sample_idx)
+        pending_sample_idx = new_pos.apply_block(_pending_block, columns=["pending"], dtype="bool")
+        pending_samples = new_pos.iloc(pending_sample_idx)
 
         # send not-finished samples to host
         sub_ctx.hosts.put("pending_samples", (pending_samples))
         # get result from host and merge
         updated_pos = sub_ctx.hosts.get("updated_pos")
-        sample_pos = _merge_pos(pending_samples, updated_pos)
+        sample_pos = _merge_pos(pending_samples, updated_pos, tree_num)
         comm_round += 1
 
     logger.info("predict done")
@@ -172,9 +192,11 @@ def predict_leaf_guest(ctx: Context, trees: List[DecisionTree], data: DataFrame)
 
 
 def predict_leaf_host(ctx: Context, trees: List[DecisionTree], data: DataFrame):
-    tree_list = [tree.get_nodes() for tree in trees]
+    feature_names = data.schema.columns.tolist()
     sitename = ctx.local.name
-    map_func = functools.partial(traverse_tree, trees=tree_list, sitename=sitename)
+    compiled_trees = CompiledTrees([tree.get_nodes() for tree in trees], sitename, feature_names)
+    host_pos_columns = get_pos_columns(compiled_trees.tree_num, prefix=HOST_SAMPLE_POS_PREFIX)
+    traverse_func = functools.partial(_traverse_block, compiled_trees=compiled_trees, feature_num=len(feature_names))
 
     # help guest to traverse tree
     comm_round = 0
@@ -189,8 +211,7 @@ def predict_leaf_host(ctx: Context, trees: List[DecisionTree], data: DataFrame):
         logger.info("got {} pending samples".format(len(pending_samples)))
         sample_features = data.loc(pending_samples.get_indexer("sample_id"), preserve_order=True)
         sample_with_pos = DataFrame.hstack([sample_features, pending_samples])
-        new_pos = sample_with_pos.create_frame()
-        new_pos["host_sample_pos"] = sample_with_pos.apply_row(map_func)
+        new_pos = sample_with_pos.apply_block(traverse_func, columns=host_pos_columns, dtype="int64")
         sub_ctx.guest.put("updated_pos", (new_pos))
         comm_round += 1
 
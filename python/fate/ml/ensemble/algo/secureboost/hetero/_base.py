@@ -17,6 +17,7 @@ import functools
 from fate.arch.dataframe import DataFrame
 from fate.ml.abc.module import HeteroModule, Model
 from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import FeatureImportance, Node
+from fate.ml.ensemble.algo.secureboost.common.predict import CompiledTrees, get_pos_columns
 from typing import Dict
 import numpy as np
 
@@ -37,21 +38,23 @@ class HeteroBoostingTree(HeteroModule):
                 self._global_feature_importance[fid] = self._global_feature_importance[fid] + fi
 
     def _sum_leaf_weights(self, leaf_pos: DataFrame, trees, learing_rate: float, num_dim=1):
-        def _compute_score(leaf_pos_: np.array, trees_: List[List[Node]], learning_rate: float, num_dim_=1):
-            score = np.zeros(num_dim_)
-            leaf_pos_ = leaf_pos_["sample_pos"]
-            tree_idx = 0
-            for node_idx, tree in zip(leaf_pos_, trees_):
-                recovered_idx = -(node_idx + 1)
-                score[tree_idx % num_dim_] += tree[recovered_idx].weight * learning_rate
-                tree_idx += 1
-
-            return float(score[0]) if num_dim_ == 1 else [score]
-
-        tree_list = [tree.get_nodes() for tree in trees]
-        apply_func = functools.partial(_compute_score, trees_=tree_list, learning_rate=learing_rate, num_dim_=num_dim)
+        compiled_trees = CompiledTrees([tree.get_nodes() for tree in trees], sitename=None)
+        pos_columns = get_pos_columns(compiled_trees.tree_num)
+
+        def _compute_score(leaf_pos_: np.ndarray, num_dim_=1):
+            weights = compiled_trees.leaf_weights(leaf_pos_) * learing_rate
+            # trees of class k are placed at k, k + num_dim, k + 2 * num_dim, ...
+            return weights.reshape(len(weights), -1, num_dim_).sum(axis=1)
+
+        if num_dim == 1:
+            apply_func = functools.partial(_compute_score, num_dim_=num_dim)
+            return leaf_pos[pos_columns].apply_block(apply_func, columns=["score"], dtype="float64")
+
+        def _compute_multi_score(s):
+            return [_compute_score(s[pos_columns].to_numpy()[None, :], num_dim_=num_dim)[0]]
+
         predict_score = leaf_pos.create_frame()
-        predict_score["score"] = leaf_pos.apply_row(apply_func)
+        predict_score["score"] = leaf_pos.apply_row(_compute_multi_score)
         return predict_score
 
     def _get_fid_name_mapping(self, data_instances: DataFrame):
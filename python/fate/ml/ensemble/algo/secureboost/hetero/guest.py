@@ -115,6 +115,7 @@ class HeteroSecureBoostGuest(HeteroBoostingTree):
         split_info_pack=True,
         hist_sub=True,
         random_seed=42,
+        distributed_split=False,
     ):
         super().__init__()
         self.num_trees = num_trees
@@ -143,6 +144,7 @@ class HeteroSecureBoostGuest(HeteroBoostingTree):
         self._loss_func: Union[BINARY_BCE, MULTI_CE, REGRESSION_L2] = None
         self._train_predict = None
         self._hist_sub = hist_sub
+        self._distributed_split = distributed_split
         self._complete_secure = complete_secure
 
         # encryption
@@ -306,6 +308,7 @@ class HeteroSecureBoostGuest(HeteroBoostingTree):
                     split_info_pack=self._split_info_pack,
                     hist_sub=self._hist_sub,
                     tree_mode=tree_mode,
+                    distributed_split=self._distributed_split,
                 )
                 tree.set_encrypt_kit(self._encrypt_kit)
 
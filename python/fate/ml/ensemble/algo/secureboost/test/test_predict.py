@@ -0,0 +1,187 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import multiprocessing
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.ml.ensemble.algo.secureboost.common.predict import (
+    CompiledTrees,
+    get_pos_columns,
+    predict_leaf_guest,
+    predict_leaf_host,
+)
+from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import Node
+
+GUEST = ("guest", "10000")
+HOST = ("host", "9999")
+GUEST_FEATURES = ["x0", "x1"]
+HOST_FEATURES = ["x2", "x3"]
+GUEST_SITE = "guest_10000"
+HOST_SITE = "host_9999"
+SAMPLE_NUM = 200
+
+
+class _Tree(object):
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def get_nodes(self):
+        return self._nodes
+
+
+def _split(nid, sitename, fid, bid, l, r):
+    return Node(nid=nid, sitename=sitename, fid=fid, bid=bid, l=l, r=r)
+
+
+def _leaf(nid, weight):
+    return Node(nid=nid, weight=weight, is_leaf=True)
+
+
+def _make_trees():
+    return [
+        # guest root, one host split below it
+        _Tree(
+            [
+                _split(0, GUEST_SITE, "x0", 0.5, 1, 2),
+                _leaf(1, 0.1),
+                _split(2, HOST_SITE, "x2", 0.3, 3, 4),
+                _leaf(3, 0.2),
+                _leaf(4, 0.3),
+            ]
+        ),
+        # host root, guest and host splits alternate down one path
+        _Tree(
+            [
+                _split(0, HOST_SITE, "x3", 0.5, 1, 2),
+                _split(1, GUEST_SITE, "x1", 0.2, 3, 4),
+                _leaf(2, -0.1),
+                _leaf(3, -0.2),
+                _split(4, HOST_SITE, "x2", 0.7, 5, 6),
+                _leaf(5, -0.3),
+                _leaf(6, -0.4),
+            ]
+        ),
+        # a single leaf
+        _Tree([_leaf(0, 1.0)]),
+    ]
+
+
+def _walk(tree, features: dict):
+    nodes = tree.get_nodes()
+    node = nodes[0]
+    while not node.is_leaf:
+        node = nodes[node.l] if features[node.fid] <= node.bid else nodes[node.r]
+    return -(node.nid + 1)
+
+
+def _create_ctx(computing, federation_id, local):
+    federation = StandaloneFederation(computing, federation_id, local, [GUEST, HOST])
+    return Context(computing=computing, federation=federation)
+
+
+@pytest.fixture(scope="module")
+def features():
+    rng = np.random.default_rng(42)
+    return pd.DataFrame(rng.random((SAMPLE_NUM, 4)), columns=GUEST_FEATURES + HOST_FEATURES)
+
+
+def test_traverse_local_trees(features):
+    trees = _make_trees()
+    feature_names = features.columns.tolist()
+    # a single site owning every feature
+    for tree in trees:
+        for node in tree.get_nodes():
+            node.sitename = "local"
+    compiled_trees = CompiledTrees([tree.get_nodes() for tree in trees], "local", feature_names)
+    sample_pos = np.zeros((len(features), compiled_trees.tree_num), dtype=np.int64)
+    leaf_pos = compiled_trees.traverse(features.to_numpy(), sample_pos)
+
+    expected = np.array([[_walk(tree, row) for tree in trees] for row in features.to_dict("records")])
+    np.testing.assert_array_equal(leaf_pos, expected)
+    weights = compiled_trees.leaf_weights(leaf_pos)
+    expected_weights = [[tree.get_nodes()[-(p + 1)].weight for tree, p in zip(trees, row)] for row in expected]
+    np.testing.assert_allclose(weights, expected_weights)
+
+
+def test_traverse_stops_at_remote_nodes(features):
+    trees = _make_trees()
+    compiled_trees = CompiledTrees([tree.get_nodes() for tree in trees], GUEST_SITE, GUEST_FEATURES)
+    sample_pos = np.zeros((len(features), compiled_trees.tree_num), dtype=np.int64)
+    pos = compiled_trees.traverse(features[GUEST_FEATURES].to_numpy(), sample_pos)
+
+    goes_left = features["x0"].to_numpy() <= 0.5
+    np.testing.assert_array_equal(pos[goes_left, 0], -2)
+    np.testing.assert_array_equal(pos[~goes_left, 0], 2)
+    # the root of tree 1 is on host, samples wait there
+    np.testing.assert_array_equal(pos[:, 1], 0)
+    np.testing.assert_array_equal(pos[:, 2], -1)
+
+
+def _predict_leaf(data_dir, federation_id, local, columns, features, result_queue):
+    try:
+        computing = CSession(data_dir=data_dir)
+        ctx = _create_ctx(computing, federation_id, local)
+        df = features[columns].copy()
+        df["sample_id"] = np.arange(len(df))
+        df["id"] = df["sample_id"]
+        data = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64").to_frame(ctx, df)
+        if local == GUEST:
+            result_queue.put((local, predict_leaf_guest(ctx, _make_trees(), data).as_pd_df()))
+        else:
+            predict_leaf_host(ctx, _make_trees(), data)
+            result_queue.put((local, None))
+    except Exception as e:
+        result_queue.put((local, e))
+
+
+def test_predict_leaf_guest_and_host(features, tmp_path):
+    # parties of the standalone federation run in their own processes
+    mp_ctx = multiprocessing.get_context("spawn")
+    result_queue = mp_ctx.Queue()
+    federation_id = uuid.uuid1().hex
+    processes = [
+        mp_ctx.Process(
+            target=_predict_leaf,
+            args=(tmp_path.as_posix(), federation_id, local, columns, features, result_queue),
+        )
+        for local, columns in [(GUEST, GUEST_FEATURES), (HOST, HOST_FEATURES)]
+    ]
+    for process in processes:
+        process.start()
+    results = {}
+    try:
+        # a failed party leaves the other one waiting, so stop at the first error
+        while len(results) < len(processes):
+            local, result = result_queue.get(timeout=300)
+            if isinstance(result, Exception):
+                raise result
+            results[local] = result
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+    trees = _make_trees()
+    leaf_pos = results[GUEST]
+    leaf_pos = leaf_pos.set_index(leaf_pos["sample_id"].astype(int)).sort_index()
+    expected = np.array([[_walk(tree, row) for tree in trees] for row in features.to_dict("records")])
+    np.testing.assert_array_equal(leaf_pos[get_pos_columns(len(trees))].to_numpy(), expected)
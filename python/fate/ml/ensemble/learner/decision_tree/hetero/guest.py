@@ -15,8 +15,9 @@
 from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import (
     DecisionTree,
     Node,
-    _update_sample_pos_on_local_nodes,
-    _merge_sample_pos,
+    _update_sample_pos_blocks,
+    _merge_sample_pos_update,
+    _set_sample_pos,
 )
 from fate.ml.ensemble.learner.decision_tree.tree_core.hist import SBTHistogramBuilder
 from fate.ml.ensemble.learner.decision_tree.tree_core.splitter import SBTSplitter
@@ -26,10 +27,7 @@ from fate.ml.utils.predict_tools import BINARY, MULTI, REGRESSION
 from fate.arch import Context
 from fate.arch.dataframe import DataFrame
 from typing import List
-import functools
 import logging
-import pandas as pd
-import torch as t
 import math
 
 
@@ -57,6 +55,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
         split_info_pack=True,
         hist_sub=True,
         tree_mode=ALL_FEAT,
+        distributed_split=False,
     ):
         super().__init__(
             max_depth, use_missing=use_missing, zero_as_missing=zero_as_missing, valid_features=valid_features
@@ -89,6 +88,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
         # other
         self._valid_features = valid_features
         self._hist_sub = hist_sub
+        self._distributed_split = distributed_split
 
         # homographic encryption
         self._encrypt_kit = None
@@ -97,6 +97,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
         self._coder = None
         self._evaluator = None
         self._encryptor = None
+        self._tensor_coder = None
         self._decryptor = None
 
         # for g, h packing
@@ -125,6 +126,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
             kit.evaluator,
             kit.get_tensor_encryptor(),
         )
+        self._tensor_coder = kit.get_tensor_coder()
         self._decryptor = kit.get_tensor_decryptor()
         logger.info("encrypt kit setup through setter")
 
@@ -138,6 +140,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
             kit.evaluator,
             kit.get_tensor_encryptor(),
         )
+        self._tensor_coder = kit.get_tensor_coder()
         self._decryptor = kit.get_tensor_decryptor()
         logger.info("encrypt kit is not setup, auto initializing")
 
@@ -162,44 +165,24 @@ class HeteroDecisionTreeGuest(DecisionTree):
         local_update=False,
     ):
         sitename = ctx.local.name
-        data_with_pos = DataFrame.hstack([data, sample_pos])
-        map_func = functools.partial(
-            _update_sample_pos_on_local_nodes, cur_layer_node=cur_layer_nodes, node_map=node_map, sitename=sitename
-        )
+        updated_pos = _update_sample_pos_blocks(data, sample_pos, cur_layer_nodes, sitename)
 
         if local_update:
-            updated_sample_pos = data_with_pos.apply_row(map_func, columns=["g_on_local", "node_idx"])
-            return updated_sample_pos["node_idx"]
-        else:
-            updated_sample_pos = data_with_pos.apply_row(map_func, columns=["g_on_local", "g_node_idx"])
+            return _set_sample_pos(sample_pos, updated_pos.mapValues(lambda update: update[1]))
 
-        # synchronize sample pos
+        # synchronize sample pos, hosts send a bitmap of the samples they moved with the new node idx of them
         host_update_sample_pos = ctx.hosts.get("updated_data")
+        for host_update in host_update_sample_pos:
+            updated_pos = updated_pos.join(host_update, _merge_sample_pos_update)
 
-        merge_func = functools.partial(_merge_sample_pos)
-        for host_data in host_update_sample_pos:
-            updated_sample_pos = DataFrame.hstack([updated_sample_pos, host_data]).apply_row(
-                merge_func, columns=["g_on_local", "g_node_idx"]
-            )
-
-        new_sample_pos = updated_sample_pos.create_frame(columns=["g_node_idx"])
-        new_sample_pos.rename(columns={"g_node_idx": "node_idx"})
-        ctx.hosts.put("new_sample_pos", new_sample_pos)
+        node_idx_table = updated_pos.mapValues(lambda update: update[1])
+        new_sample_pos = _set_sample_pos(sample_pos, node_idx_table)
+        ctx.hosts.put("new_sample_pos", node_idx_table)
         self.sample_pos = new_sample_pos
 
         return new_sample_pos
 
     def _g_h_process(self, grad_and_hess: DataFrame):
-        en_grad_hess = grad_and_hess.create_frame()
-
-        def make_long_tensor(s: pd.Series, coder, pk, offset, shift_bit, precision, encryptor, pack_num=2):
-            pack_tensor = t.Tensor(s.values)
-            pack_tensor[0] = pack_tensor[0] + offset
-            pack_vec = coder.pack_floats(pack_tensor, shift_bit, pack_num, precision)
-            en = pk.encrypt_encoded(pack_vec, obfuscate=True)
-            ret = encryptor.lift(en, (len(en), 1), pack_tensor.dtype, pack_tensor.device)
-            return ret
-
         def compute_offset_bit(sample_num, g_max, h_max):
             g_bit = int(math.log2(2**FIX_POINT_PRECISION * sample_num * g_max) + 1)  # add 1 more bit for safety
             h_bit = int(math.log2(2**FIX_POINT_PRECISION * sample_num * h_max) + 1)
@@ -221,17 +204,15 @@ class HeteroDecisionTreeGuest(DecisionTree):
             pack_num = 2
             shift_bit = compute_offset_bit(len(grad_and_hess), self._g_abs_max, self._h_abs_max)
             total_pack_num = (self._en_key_length - 2) // (shift_bit * pack_num)  # -2 in case overflow
-            partial_func = functools.partial(
-                make_long_tensor,
-                coder=self._coder,
-                offset=self._g_offset,
-                pk=self._pk,
-                shift_bit=shift_bit,
-                pack_num=2,
+            # g and h of each row are packed into one plaintext, offset keeps g non-negative
+            en_grad_hess = grad_and_hess[["g", "h"]].pack_encrypt(
+                self._encryptor,
+                self._tensor_coder,
+                offset_bit=shift_bit,
                 precision=FIX_POINT_PRECISION,
-                encryptor=self._encryptor,
+                column="gh",
+                offsets=[self._g_offset, 0],
             )
-            en_grad_hess["gh"] = grad_and_hess.apply_row(partial_func)
 
             # record pack info
             self._pack_info["g_offset"] = self._g_offset
@@ -242,6 +223,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
             self._pack_info["split_point_shift_bit"] = shift_bit * pack_num
             logger.info("gh are packed")
         else:
+            en_grad_hess = grad_and_hess.create_frame()
             en_grad_hess["g"] = self._encryptor.encrypt_tensor(grad_and_hess["g"].as_tensor())
             en_grad_hess["h"] = self._encryptor.encrypt_tensor(grad_and_hess["h"].as_tensor())
             logger.info("not using gh pack")
@@ -336,6 +318,7 @@ class HeteroDecisionTreeGuest(DecisionTree):
             min_impurity_split=self.min_impurity_split,
             min_child_weight=self.min_child_weight,
             min_leaf_node=self.min_leaf_node,
+            distributed_split=self._distributed_split,
         )
 
         # Prepare for training
@@ -15,7 +15,9 @@
 from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import (
     DecisionTree,
     Node,
-    _update_sample_pos_on_local_nodes,
+    _update_sample_pos_blocks,
+    _pack_sample_pos_update,
+    _set_sample_pos,
     FeatureImportance,
 )
 from fate.ml.ensemble.learner.decision_tree.tree_core.hist import SBTHistogramBuilder, DistributedHistogram
@@ -24,7 +26,6 @@ from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import ALL_F
 from fate.arch import Context
 from fate.arch.dataframe import DataFrame
 from typing import List
-import functools
 import logging
 
 
@@ -109,14 +110,10 @@ class HeteroDecisionTreeHost(DecisionTree):
         self, ctx, cur_layer_nodes: List[Node], sample_pos: DataFrame, data: DataFrame, node_map: dict
     ):
         sitename = ctx.local.party[0] + "_" + ctx.local.party[1]
-        data_with_pos = DataFrame.hstack([data, sample_pos])
-        map_func = functools.partial(
-            _update_sample_pos_on_local_nodes, cur_layer_node=cur_layer_nodes, node_map=node_map, sitename=sitename
-        )
-        update_sample_pos = data_with_pos.apply_row(map_func, columns=["h_on_local", "h_node_idx"])
+        updated_pos = _update_sample_pos_blocks(data, sample_pos, cur_layer_nodes, sitename)
 
-        ctx.guest.put("updated_data", update_sample_pos)
-        new_sample_pos = ctx.guest.get("new_sample_pos")
+        ctx.guest.put("updated_data", updated_pos.mapValues(_pack_sample_pos_update))
+        new_sample_pos = _set_sample_pos(sample_pos, ctx.guest.get("new_sample_pos"))
 
         return new_sample_pos
 
@@ -71,7 +71,6 @@ class FeatureImportance(object):
 
 
 class Node(object):
-
     """
     Parameters:
         -----------
@@ -181,48 +180,112 @@ class Node(object):
         )
 
 
-def _make_decision(feat_val, bid, missing_dir=None, use_missing=None, zero_as_missing=None, zero_val=0):
-    # no missing val
-    left, right = True, False
-    direction = left if feat_val <= bid + FLOAT_ZERO else right
-    return direction
-
-
-def _update_sample_pos(s: pd.Series, cur_layer_node: List[Node], node_map: dict, sitename=None):
-    node_id = s.iloc[-1]
-    node = cur_layer_node[node_map[node_id]]
-    if node.is_leaf:
-        return -(node.nid + 1)  # use negative index to represent leaves, + 1 to avoid root node 0
-    feat_val = s[node.fid]
-    bid = node.bid
-    dir_ = _make_decision(feat_val, bid)
-    if dir_:  # go left
-        ret_node = node.l
-    else:
-        ret_node = node.r
-    return ret_node
-
-
-def _get_sample_on_local_nodes(s: pd.Series, cur_layer_node: List[Node], node_map: dict, sitename):
-    node_id = s.iloc[-1]
-    node = cur_layer_node[node_map[node_id]]
-    on_local_node = node.sitename == sitename
-    return on_local_node
-
-
-def _update_sample_pos_on_local_nodes(s: pd.Series, cur_layer_node: List[Node], node_map: dict, sitename):
-    on_local_node = _get_sample_on_local_nodes(s, cur_layer_node, node_map, sitename)
-    if not on_local_node:
-        return False, -1
-    else:
-        return True, _update_sample_pos(s, cur_layer_node, node_map, sitename)
-
-
-def _merge_sample_pos(s: pd.Series):
-    if s["g_on_local"]:
-        return s["g_on_local"], s["g_node_idx"]
-    else:
-        return s["h_on_local"], s["h_node_idx"]
+def _local_nodes(cur_layer_node: List[Node], sitename, data_manager):
+    """
+    nodes of current layer decided by this site, (nid, None) for a leaf
+    and (nid, (block_id, offset, bid, left_nid, right_nid)) for a split node
+    """
+    nodes = []
+    for node in cur_layer_node:
+        if node.sitename != sitename:
+            continue
+        if node.is_leaf:
+            nodes.append((node.nid, None))
+        else:
+            block_id, offset = data_manager.loc_block(node.fid, with_offset=True)
+            nodes.append((node.nid, (block_id, offset, node.bid, node.l, node.r)))
+    return nodes
+
+
+def _update_sample_pos_blocks(data: DataFrame, sample_pos: DataFrame, cur_layer_node: List[Node], sitename):
+    """
+    move samples on nodes decided by this site to the children, one vectorized pass per block.
+
+    Returns:
+        table of block_id -> (on_local, node_idx), node_idx is an int32 array of the block
+    """
+    nodes = _local_nodes(cur_layer_node, sitename, data.data_manager)
+    pos_block_id, pos_offset = sample_pos.data_manager.loc_block("node_idx", with_offset=True)
+
+    def _update(data_blocks, pos_blocks):
+        node_idx = np.asarray(pos_blocks[pos_block_id][:, pos_offset]).astype(np.int32)
+        new_node_idx = node_idx.copy()
+        on_local = np.zeros(len(node_idx), dtype=bool)
+        for nid, split in nodes:
+            mask = node_idx == nid
+            on_local |= mask
+            if split is None:
+                new_node_idx[mask] = -(nid + 1)  # use negative index to represent leaves, + 1 to avoid root node 0
+            else:
+                block_id, offset, bid, left_nid, right_nid = split
+                feat_val = np.asarray(data_blocks[block_id][:, offset])[mask]
+                new_node_idx[mask] = np.where(feat_val <= bid + FLOAT_ZERO, left_nid, right_nid)
+        return on_local, new_node_idx
+
+    return data.block_table.join(sample_pos.block_table, _update)
+
+
+def _pack_sample_pos_update(update):
+    """
+    compact form sent to guest: bitmap of samples moved by this site and their new node_idx
+    """
+    on_local, node_idx = update
+    return np.packbits(on_local), node_idx[on_local], len(on_local)
+
+
+def _merge_sample_pos_update(update, packed_update):
+    on_local, node_idx = update
+    bitmap, moved_node_idx, row_num = packed_update
+    moved = np.unpackbits(bitmap, count=row_num).astype(bool)
+    node_idx = node_idx.copy()
+    node_idx[moved] = moved_node_idx
+    return on_local | moved, node_idx
+
+
+def _replace_node_idx(pos_blocks, node_idx, pos_block_id, pos_offset):
+    blocks = list(pos_blocks)
+    block = blocks[pos_block_id].clone()
+    block[:, pos_offset] = block.new_tensor(node_idx)
+    blocks[pos_block_id] = block
+    return blocks
+
+
+def _set_sample_pos(sample_pos: DataFrame, node_idx_table) -> DataFrame:
+    """
+    sample pos with node_idx replaced by node_idx_table, a table of block_id -> int32 array
+    """
+    pos_block_id, pos_offset = sample_pos.data_manager.loc_block("node_idx", with_offset=True)
+    block_table = sample_pos.block_table.join(
+        node_idx_table,
+        lambda pos_blocks, node_idx: _replace_node_idx(pos_blocks, node_idx, pos_block_id, pos_offset),
+    )
+    return DataFrame(
+        sample_pos._ctx, block_table, sample_pos.partition_order_mappings, sample_pos.data_manager.duplicate()
+    )
+
+
+def _map_sample_pos(sample_pos: DataFrame, mapping: dict) -> DataFrame:
+    """
+    sample pos with every node_idx replaced by mapping[node_idx]
+    """
+    keys = np.array(sorted(mapping), dtype=np.int64)
+    values = np.array([mapping[k] for k in keys], dtype=np.int32)
+    pos_block_id, pos_offset = sample_pos.data_manager.loc_block("node_idx", with_offset=True)
+
+    def _map(pos_blocks):
+        node_idx = np.asarray(pos_blocks[pos_block_id][:, pos_offset])
+        pos = np.minimum(np.searchsorted(keys, node_idx), len(keys) - 1)
+        missing = keys[pos] != node_idx
+        if missing.any():
+            raise KeyError(int(node_idx[missing][0]))
+        return _replace_node_idx(pos_blocks, values[pos], pos_block_id, pos_offset)
+
+    return DataFrame(
+        sample_pos._ctx,
+        sample_pos.block_table.mapValues(_map),
+        sample_pos.partition_order_mappings,
+        sample_pos.data_manager.duplicate(),
+    )
 
 
 def _convert_sample_pos_to_score(s: pd.Series, tree_nodes: List[Node]):
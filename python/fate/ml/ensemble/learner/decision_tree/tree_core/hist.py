@@ -17,7 +17,7 @@ import typing
 import torch
 from typing import Dict
 from fate.arch.histogram import HistogramBuilder, DistributedHistogram
-from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import Node
+from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import Node, _map_sample_pos
 from typing import List
 import numpy as np
 from fate.arch.dataframe import DataFrame
@@ -207,10 +207,10 @@ class SBTHistogramBuilder(object):
         # if goss is enabled
         if len(sample_pos) > len(gh):
             sample_pos = sample_pos.loc(gh.get_indexer(target="sample_id"), preserve_order=True)
-            map_sample_pos = sample_pos.apply_row(lambda x: node_map[x["node_idx"]])
+            map_sample_pos = _map_sample_pos(sample_pos, node_map)
             bin_train_data = bin_train_data.loc(gh.get_indexer(target="sample_id"), preserve_order=True)
         else:
-            map_sample_pos = sample_pos.apply_row(lambda x: node_map[x["node_idx"]])
+            map_sample_pos = _map_sample_pos(sample_pos, node_map)
 
         stat_obj = bin_train_data.distributed_hist_stat(hist, map_sample_pos, gh)
 
@@ -27,6 +27,17 @@ logger = logging.getLogger(__name__)
 TREE_DECIMAL_ROUND = 10
 
 
+def _merge_node_best(lhs, rhs):
+    """
+    keep the better candidate of each node, ties go to the lower index as torch.max over the full histogram does
+    """
+    if lhs is None:
+        return rhs
+    if rhs is None:
+        return lhs
+    return [max(l, r, key=lambda c: (c[0], -c[1])) for l, r in zip(lhs, rhs)]
+
+
 class SplitInfo(object):
     def __init__(
         self,
@@ -86,8 +97,11 @@ class SBTSplitter(Splitter):
         min_child_weight=1,
         l1=0,
         l2=0.1,
+        distributed_split=False,
     ) -> None:
         super().__init__()
+        # find best splits on each histogram partition and reduce the candidates instead of collecting the histogram
+        self.distributed_split = distributed_split
         self.min_impurity_split = min_impurity_split
         self.min_sample_split = min_sample_split
         self.min_leaf_node = min_leaf_node
@@ -219,16 +233,14 @@ class SBTSplitter(Splitter):
         rs[mask] = float("-inf")
         return rs
 
-    def _find_best_splits(
-        self, node_hist, sitename, cur_layer_nodes, reverse_node_map, recover_bucket=True, pack_info=None
-    ):
+    def _compute_node_best(self, node_hist, g_sum, h_sum, cnt_sum, pack_info=None, index_offset=0):
         """
-        recover_bucket: if node_hist is guest hist, can get the fid and bid of the split info
-                        but for node_hist from host sites, histograms are shuffled, so can not get the fid and bid,
-                        only hosts know them.
+        best candidate of every node in node_hist, a list of (gain, index, sum_grad, sum_hess, sample_count),
+        index is shifted by index_offset when node_hist holds one histogram partition only
         """
         l_g, l_h, l_cnt = self._extract_hist(node_hist, pack_info)
-        g_sum, h_sum, cnt_sum = self._make_sum_tensor(cur_layer_nodes)
+        if l_g is None or l_g.shape[1] == 0:
+            return None
         rs = self._compute_gains(l_g, l_h, l_cnt, g_sum, h_sum, cnt_sum)
 
         # reduce
@@ -238,19 +250,35 @@ class SBTSplitter(Splitter):
         logger.debug("best_idx: {}".format(best_idx))
         logger.debug("best_gain: {}".format(best_gain))
 
-        split_infos = []
-        node_idx = 0
-        for idx, gain in zip(best_idx, best_gain):
+        candidates = []
+        for node_idx, (idx, gain) in enumerate(zip(best_idx, best_gain)):
             idx_ = int(idx.detach().cpu().item())
+            candidates.append(
+                (
+                    float(gain),
+                    index_offset + idx_,
+                    float(l_g[node_idx][idx_]),
+                    float(l_h[node_idx][idx_]),
+                    int(l_cnt[node_idx][idx_]),
+                )
+            )
+        return candidates
+
+    def _candidates_to_split_infos(self, candidates, cnt_sum, sitename, reverse_node_map, recover_bucket=True):
+        if candidates is None:
+            # no bins to split on, e.g. every partition of a distributed histogram is empty
+            candidates = [(float("-inf"), -1, 0.0, 0.0, 0)] * len(cnt_sum)
+        split_infos = []
+        for node_idx, (gain, idx_, sum_grad, sum_hess, sample_count) in enumerate(candidates):
             if gain == float("-inf") or cnt_sum[node_idx] < self.min_sample_split:
                 split_infos.append(None)
                 logger.info("Node {} can not be further split".format(reverse_node_map[node_idx]))
             else:
                 split_info = SplitInfo(
-                    gain=float(gain),
-                    sum_grad=float(l_g[node_idx][idx_]),
-                    sum_hess=float(l_h[node_idx][idx_]),
-                    sample_count=int(l_cnt[node_idx][idx_]),
+                    gain=gain,
+                    sum_grad=sum_grad,
+                    sum_hess=sum_hess,
+                    sample_count=sample_count,
                     sitename=sitename,
                 )
                 if recover_bucket:
@@ -260,10 +288,47 @@ class SBTSplitter(Splitter):
                 else:
                     split_info.split_id = idx_
                 split_infos.append(split_info)
-            node_idx += 1
 
         return split_infos
 
+    def _find_best_splits(
+        self, node_hist, sitename, cur_layer_nodes, reverse_node_map, recover_bucket=True, pack_info=None
+    ):
+        """
+        recover_bucket: if node_hist is guest hist, can get the fid and bid of the split info
+                        but for node_hist from host sites, histograms are shuffled, so can not get the fid and bid,
+                        only hosts know them.
+        """
+        g_sum, h_sum, cnt_sum = self._make_sum_tensor(cur_layer_nodes)
+        candidates = self._compute_node_best(node_hist, g_sum, h_sum, cnt_sum, pack_info)
+        return self._candidates_to_split_infos(candidates, cnt_sum, sitename, reverse_node_map, recover_bucket)
+
+    def _find_best_splits_distributed(
+        self,
+        stat_rs: DistributedHistogram,
+        decrypt_schema,
+        decode_schema,
+        sitename,
+        cur_layer_nodes,
+        reverse_node_map,
+        recover_bucket=True,
+        pack_info=None,
+    ):
+        """
+        same as _find_best_splits, but every histogram partition is decrypted and searched where it lives,
+        only one candidate per node and partition is reduced to the driver.
+        bins are already accumulated per feature, so the gain of a split point does not depend on other partitions.
+        """
+        g_sum, h_sum, cnt_sum = self._make_sum_tensor(cur_layer_nodes)
+
+        def _partition_best(start, node_hist):
+            return self._compute_node_best(node_hist, g_sum, h_sum, cnt_sum, pack_info, index_offset=start)
+
+        candidates = stat_rs.decrypt_map_reduce(
+            decrypt_schema[0], decrypt_schema[1], decode_schema, _partition_best, _merge_node_best
+        )
+        return self._candidates_to_split_infos(candidates, cnt_sum, sitename, reverse_node_map, recover_bucket)
+
     def _merge_splits(self, guest_splits, host_splits_list):
         splits = []
         for node_idx in range(len(guest_splits)):
@@ -289,9 +354,13 @@ class SBTSplitter(Splitter):
         return host_hist
 
     def _local_split(self, ctx: Context, stat_rs, node_map, cur_layer_node):
-        histogram = stat_rs.decrypt({}, {}, None)
         sitename = ctx.local.name
         reverse_node_map = {v: k for k, v in node_map.items()}
+        if self.distributed_split:
+            return self._find_best_splits_distributed(
+                stat_rs, ({}, {}), None, sitename, cur_layer_node, reverse_node_map, recover_bucket=True
+            )
+        histogram = stat_rs.decrypt({}, {}, None)
         local_best_splits = self._find_best_splits(
             histogram, sitename, cur_layer_node, reverse_node_map, recover_bucket=True
         )
@@ -302,14 +371,19 @@ class SBTSplitter(Splitter):
         if sk is None or coder is None:
             raise ValueError("sk or coder is None, not able to decode host split points")
 
-        histogram = stat_rs.decrypt({}, {}, None)
         sitename = ctx.local.name
         reverse_node_map = {v: k for k, v in node_map.items()}
 
         # find local best splits
-        guest_best_splits = self._find_best_splits(
-            histogram, sitename, cur_layer_node, reverse_node_map, recover_bucket=True
-        )
+        if self.distributed_split:
+            guest_best_splits = self._find_best_splits_distributed(
+                stat_rs, ({}, {}), None, sitename, cur_layer_node, reverse_node_map, recover_bucket=True
+            )
+        else:
+            histogram = stat_rs.decrypt({}, {}, None)
+            guest_best_splits = self._find_best_splits(
+                histogram, sitename, cur_layer_node, reverse_node_map, recover_bucket=True
+            )
         # find best splits from host parties
         host_histograms = ctx.hosts.get("hist")
 
@@ -335,11 +409,28 @@ class SBTSplitter(Splitter):
 
         for idx, hist in enumerate(host_histograms):
             host_sitename = ctx.hosts[idx].name
-            host_hist = self._recover_pack_split(hist, decrypt_schema, decode_schema)
-            # logger.debug("splitting host")
-            host_split = self._find_best_splits(
-                host_hist, host_sitename, cur_layer_node, reverse_node_map, recover_bucket=False, pack_info=pack_info
-            )
+            if self.distributed_split:
+                host_split = self._find_best_splits_distributed(
+                    hist,
+                    decrypt_schema,
+                    decode_schema,
+                    host_sitename,
+                    cur_layer_node,
+                    reverse_node_map,
+                    recover_bucket=False,
+                    pack_info=pack_info,
+                )
+            else:
+                host_hist = self._recover_pack_split(hist, decrypt_schema, decode_schema)
+                # logger.debug("splitting host")
+                host_split = self._find_best_splits(
+                    host_hist,
+                    host_sitename,
+                    cur_layer_node,
+                    reverse_node_map,
+                    recover_bucket=False,
+                    pack_info=pack_info,
+                )
             host_splits.append(host_split)
 
         # logger.debug("host splits are {}".format(host_splits))
@@ -0,0 +1,165 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import (
+    FLOAT_ZERO,
+    Node,
+    _map_sample_pos,
+    _merge_sample_pos_update,
+    _pack_sample_pos_update,
+    _set_sample_pos,
+    _update_sample_pos_blocks,
+)
+
+GUEST = ("guest", "10000")
+GUEST_SITE = "guest_10000"
+HOST_SITE = "host_9999"
+SAMPLE_NUM = 1000
+FEATURE_NUM = 4
+
+# nodes 3 and 4 are split by guest and host, 5 and 6 are leaves of guest and host
+LAYER_NODES = [
+    Node(nid=3, sitename=GUEST_SITE, fid="x0", bid=4, l=7, r=8),
+    Node(nid=4, sitename=HOST_SITE, fid="x2", bid=2, l=9, r=10),
+    Node(nid=5, sitename=GUEST_SITE, is_leaf=True),
+    Node(nid=6, sitename=HOST_SITE, is_leaf=True),
+]
+NODE_MAP = {node.nid: idx for idx, node in enumerate(LAYER_NODES)}
+
+
+"""
+per row updates the vectorized helpers replace
+"""
+
+
+def _update_sample_pos(s: pd.Series, cur_layer_node, node_map):
+    node = cur_layer_node[node_map[s.iloc[-1]]]
+    if node.is_leaf:
+        return -(node.nid + 1)
+    return node.l if s[node.fid] <= node.bid + FLOAT_ZERO else node.r
+
+
+def _update_sample_pos_on_local_nodes(s: pd.Series, cur_layer_node, node_map, sitename):
+    if cur_layer_node[node_map[s.iloc[-1]]].sitename != sitename:
+        return False, -1
+    return True, _update_sample_pos(s, cur_layer_node, node_map)
+
+
+def _merge_sample_pos(s: pd.Series):
+    if s["g_on_local"]:
+        return s["g_on_local"], s["g_node_idx"]
+    else:
+        return s["h_on_local"], s["h_node_idx"]
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def layer(ctx):
+    """
+    bucketized features and the sample pos of a layer, as frames and as one pandas frame in sample id order
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.integers(0, 8, (SAMPLE_NUM, FEATURE_NUM)), columns=[f"x{i}" for i in range(FEATURE_NUM)])
+    df["sample_id"] = np.arange(SAMPLE_NUM)
+    df["id"] = df["sample_id"]
+    df["node_idx"] = rng.choice([node.nid for node in LAYER_NODES], SAMPLE_NUM)
+    features = [f"x{i}" for i in range(FEATURE_NUM)]
+    data = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float32").to_frame(
+        ctx, df[["sample_id", "id"] + features]
+    )
+    sample_pos = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="int32").to_frame(
+        ctx, df[["sample_id", "id", "node_idx"]]
+    )
+    return data, sample_pos, df[features + ["node_idx"]]
+
+
+def _node_idx(sample_pos):
+    df = sample_pos.as_pd_df()
+    return df.set_index(df["sample_id"].astype(int)).sort_index()["node_idx"].to_numpy()
+
+
+def _frames_of_update(sample_pos, update):
+    on_local = _set_sample_pos(sample_pos, update.mapValues(lambda u: u[0].astype(np.int32)))
+    node_idx = _set_sample_pos(sample_pos, update.mapValues(lambda u: u[1]))
+    return _node_idx(on_local).astype(bool), _node_idx(node_idx)
+
+
+@pytest.mark.parametrize("sitename", [GUEST_SITE, HOST_SITE])
+def test_update_on_local_nodes(layer, sitename):
+    data, sample_pos, df = layer
+    expected = df.apply(_update_sample_pos_on_local_nodes, axis=1, args=(LAYER_NODES, NODE_MAP, sitename))
+    expected_on_local = np.array([on_local for on_local, _ in expected])
+    on_local, node_idx = _frames_of_update(
+        sample_pos, _update_sample_pos_blocks(data, sample_pos, LAYER_NODES, sitename)
+    )
+    np.testing.assert_array_equal(on_local, expected_on_local)
+    np.testing.assert_array_equal(node_idx[on_local], np.array([idx for _, idx in expected])[expected_on_local])
+    # samples of nodes of the other site keep their node idx
+    np.testing.assert_array_equal(node_idx[~on_local], df["node_idx"].to_numpy()[~on_local])
+    # leaves go negative
+    leaf_nid = 5 if sitename == GUEST_SITE else 6
+    assert (node_idx[df["node_idx"].to_numpy() == leaf_nid] == -(leaf_nid + 1)).all()
+
+
+def test_merge_host_update(layer):
+    data, sample_pos, df = layer
+    guest_update = _update_sample_pos_blocks(data, sample_pos, LAYER_NODES, GUEST_SITE)
+    host_update = _update_sample_pos_blocks(data, sample_pos, LAYER_NODES, HOST_SITE).mapValues(
+        _pack_sample_pos_update
+    )
+    merged = guest_update.join(host_update, _merge_sample_pos_update)
+
+    g = df.apply(_update_sample_pos_on_local_nodes, axis=1, args=(LAYER_NODES, NODE_MAP, GUEST_SITE))
+    h = df.apply(_update_sample_pos_on_local_nodes, axis=1, args=(LAYER_NODES, NODE_MAP, HOST_SITE))
+    merge_df = pd.DataFrame(
+        {
+            "g_on_local": [x[0] for x in g],
+            "g_node_idx": [x[1] for x in g],
+            "h_on_local": [x[0] for x in h],
+            "h_node_idx": [x[1] for x in h],
+        }
+    )
+    expected = merge_df.apply(_merge_sample_pos, axis=1)
+
+    on_local, node_idx = _frames_of_update(sample_pos, merged)
+    assert on_local.all()
+    np.testing.assert_array_equal(node_idx, np.array([idx for _, idx in expected]))
+
+
+def test_map_sample_pos(layer):
+    _, sample_pos, df = layer
+    mapped = _node_idx(_map_sample_pos(sample_pos, NODE_MAP))
+    np.testing.assert_array_equal(mapped, df["node_idx"].map(NODE_MAP).to_numpy())
+
+
+def test_map_sample_pos_rejects_unknown_node(layer):
+    _, sample_pos, _ = layer
+    node_map = {nid: idx for nid, idx in NODE_MAP.items() if nid != 4}
+    # the standalone backend reports the KeyError of the partition as a RuntimeError
+    with pytest.raises(RuntimeError, match="exec failed: 4$"):
+        _node_idx(_map_sample_pos(sample_pos, node_map))
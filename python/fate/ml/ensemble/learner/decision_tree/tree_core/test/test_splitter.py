@@ -0,0 +1,101 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.ml.ensemble.learner.decision_tree.tree_core.decision_tree import Node
+from fate.ml.ensemble.learner.decision_tree.tree_core.hist import SBTHistogramBuilder
+from fate.ml.ensemble.learner.decision_tree.tree_core.splitter import SBTSplitter
+from fate.ml.ensemble.utils.binning import binning
+
+GUEST = ("guest", "10000")
+SAMPLE_NUM = 1000
+FEATURE_NUM = 6
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def layer(ctx):
+    """
+    binned features, gradients and one layer of two nodes, samples are spread over the nodes at random
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.normal(size=(SAMPLE_NUM, FEATURE_NUM)), columns=[f"x{i}" for i in range(FEATURE_NUM)])
+    df["sample_id"] = np.arange(SAMPLE_NUM)
+    df["id"] = df["sample_id"]
+    data = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64").to_frame(ctx, df)
+    bin_info = binning(data, max_bin=16)
+    bin_data = data.bucketize(boundaries=bin_info)
+
+    g = df["x0"].to_numpy() + 0.1 * rng.normal(size=SAMPLE_NUM)
+    h = rng.random(SAMPLE_NUM) + 0.5
+    node_idx = rng.integers(1, 3, SAMPLE_NUM)
+    reader = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float32")
+    gh = reader.to_frame(ctx, pd.DataFrame({"sample_id": df["sample_id"], "id": df["id"], "g": g, "h": h}))
+    gh["cnt"] = 1
+    sample_pos = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="int32").to_frame(
+        ctx, pd.DataFrame({"sample_id": df["sample_id"], "id": df["id"], "node_idx": node_idx})
+    )
+    nodes = [
+        Node(
+            nid=nid,
+            grad=float(g[node_idx == nid].sum()),
+            hess=float(h[node_idx == nid].sum()),
+            sample_num=int((node_idx == nid).sum()),
+        )
+        for nid in [1, 2]
+    ]
+    node_map = {1: 0, 2: 1}
+
+    hist_builder = SBTHistogramBuilder(bin_data, bin_info, hist_sub=False)
+    _, stat_rs = hist_builder.compute_hist(ctx, nodes, bin_data, gh, sample_pos, node_map)
+    return bin_data, bin_info, nodes, node_map, stat_rs
+
+
+def _split_attrs(split_infos):
+    return [
+        None if s is None else (s.best_fid, s.best_bid, s.sample_count, round(s.gain, 6), round(s.sum_grad, 4))
+        for s in split_infos
+    ]
+
+
+def test_distributed_split_matches_driver_split(ctx, layer):
+    bin_data, bin_info, nodes, node_map, stat_rs = layer
+    reverse_node_map = {v: k for k, v in node_map.items()}
+    splitter = SBTSplitter(bin_data, bin_info)
+    driver_splits = splitter._find_best_splits(stat_rs.decrypt({}, {}, None), "guest", nodes, reverse_node_map)
+    distributed_splits = splitter._find_best_splits_distributed(
+        stat_rs, ({}, {}), None, "guest", nodes, reverse_node_map
+    )
+    assert any(s is not None for s in driver_splits)
+    assert _split_attrs(distributed_splits) == _split_attrs(driver_splits)
+
+
+def test_no_candidates_means_no_split(layer):
+    bin_data, bin_info, nodes, node_map, _ = layer
+    splitter = SBTSplitter(bin_data, bin_info)
+    cnt_sum = [node.sample_num for node in nodes]
+    assert splitter._candidates_to_split_infos(None, cnt_sum, "guest", {0: 1, 1: 2}) == [None, None]
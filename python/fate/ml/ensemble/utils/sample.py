@@ -13,10 +13,60 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import numpy as np
 from fate.arch.dataframe import DataFrame
 
 
+RADIX_BITS = 16
+
+
+def _g_square_bits(blocks, g_block_id, g_offset) -> np.ndarray:
+    g = np.asarray(blocks[g_block_id][:, g_offset], dtype=np.float64)
+    # bit patterns of non negative floats have the same order as the floats
+    return (g * g).view(np.uint64)
+
+
+def _kth_largest_bits(gh: DataFrame, k: int, g_block_id, g_offset):
+    """
+    radix select over the bit patterns of g * g, RADIX_BITS per pass: each pass sums per block histograms of the
+    next digit among values sharing the digits found so far, so only histograms reach the driver.
+    returns the bit pattern of the k-th largest g * g and how many of the k largest are equal to it.
+    """
+    digit_mask = np.uint64((1 << RADIX_BITS) - 1)
+    prefix = 0
+    remaining = k
+
+    def _histogram(shift, prefix):
+        def _count(blocks):
+            bits = _g_square_bits(blocks, g_block_id, g_offset)
+            if shift + RADIX_BITS < 64:
+                bits = bits[(bits >> np.uint64(shift + RADIX_BITS)) == np.uint64(prefix)]
+            digits = ((bits >> np.uint64(shift)) & digit_mask).astype(np.int64)
+            return np.bincount(digits, minlength=1 << RADIX_BITS)
+
+        return gh.block_table.mapValues(_count).reduce(lambda a, b: a + b)
+
+    for shift in range(64 - RADIX_BITS, -1, -RADIX_BITS):
+        histogram = _histogram(shift, prefix)
+        # counts of the digits from the largest one down
+        cumulative = np.cumsum(histogram[::-1])
+        rank = int(np.searchsorted(cumulative, remaining))
+        digit = (1 << RADIX_BITS) - 1 - rank
+        remaining -= int(cumulative[rank] - histogram[digit])
+        prefix = (prefix << RADIX_BITS) | digit
+
+    return np.uint64(prefix), remaining
+
+
 def goss_sample(gh: DataFrame, top_rate: float, other_rate: float, random_seed=42):
+    """
+    gradient-based one-side sampling, keep the top_rate * n samples with the largest |g|,
+    draw other_rate * n of the rest uniformly without replacement and amplify their g, h by rest_num / drawn_num.
+
+    the |g| cut is found exactly by a distributed radix select, samples tied at the cut are kept in block order
+    then row order, the draw is split over blocks by a multivariate hypergeometric allocation and done inside
+    each block, so neither the gradients nor the sample ids are collected to the driver.
+    """
     # check param, top rate + other rate <= 1, and they must be float
     assert isinstance(top_rate, float), "top rate must be float, but got {}".format(type(top_rate))
     assert isinstance(other_rate, float), "other rate must be float, but got {}".format(type(other_rate))
@@ -24,7 +74,61 @@ def goss_sample(gh: DataFrame, top_rate: float, other_rate: float, random_seed=4
     sample_num = len(gh)
     a_part_num = int(sample_num * top_rate)
     b_part_num = int(sample_num * other_rate)
-    top_samples = gh.nlargest(n=a_part_num, columns=["g"], error=0)
-    rest_samples = gh.drop(top_samples).sample(n=b_part_num, random_state=random_seed)
-    sampled_rs = DataFrame.vstack([top_samples, rest_samples])
-    return sampled_rs
+    if a_part_num == 0 or b_part_num == 0:
+        raise ValueError("subsampled result is 0: top sample {}, other sample {}".format(a_part_num, b_part_num))
+
+    if random_seed is None:
+        random_seed = np.random.randint(1 << 31)
+    rng = np.random.default_rng(random_seed)
+
+    # g * g keeps the order of |g|
+    g_block_id, g_offset = gh.data_manager.loc_block("g", with_offset=True)
+    gh_loc = gh.data_manager.loc_block(["g", "h"], with_offset=True)
+    threshold, tie_num = _kth_largest_bits(gh, a_part_num, g_block_id, g_offset)
+
+    def _count(blocks):
+        bits = _g_square_bits(blocks, g_block_id, g_offset)
+        return len(bits), int((bits > threshold).sum()), int((bits == threshold).sum())
+
+    block_counts = dict(gh.block_table.mapValues(_count).collect())
+    block_ids = sorted(block_counts)
+    # ties at the threshold are kept in block order, so that exactly a_part_num samples are on top
+    tie_takes = {}
+    for block_id in block_ids:
+        tie_takes[block_id] = min(block_counts[block_id][2], tie_num)
+        tie_num -= tie_takes[block_id]
+    rest_counts = [block_counts[i][0] - block_counts[i][1] - tie_takes[i] for i in block_ids]
+    rest_num = sum(rest_counts)
+    b_part_num = min(b_part_num, rest_num)
+    draws = rng.multivariate_hypergeometric(rest_counts, b_part_num)
+    draws = dict(zip(block_ids, draws.tolist()))
+    amplify_weights = rest_num / b_part_num if b_part_num else 1.0
+
+    def _is_top(block_id, blocks):
+        bits = _g_square_bits(blocks, g_block_id, g_offset)
+        mask = bits > threshold
+        mask[np.flatnonzero(bits == threshold)[: tie_takes.get(block_id, 0)]] = True
+        return mask
+
+    def _select(kvs):
+        for block_id, blocks in kvs:
+            mask = _is_top(block_id, blocks)
+            rest_idx = np.flatnonzero(~mask)
+            block_rng = np.random.default_rng([random_seed, block_id])
+            drawn_idx = block_rng.choice(rest_idx, size=draws.get(block_id, 0), replace=False)
+            mask[drawn_idx] = True
+
+            # small gradient sample weights
+            weights = np.ones(len(mask))
+            weights[drawn_idx] = amplify_weights
+            blocks = list(blocks)
+            for bid, offset in gh_loc:
+                block = blocks[bid].clone()
+                block[:, offset] *= block.new_tensor(weights)
+                blocks[bid] = block
+            yield block_id, (blocks, mask)
+
+    from fate.arch.dataframe.ops._dimension_scaling import retrieval_row_by_masked_table
+
+    masked_table = gh.block_table.mapPartitions(_select, preserves_partitioning=True)
+    return retrieval_row_by_masked_table(gh, masked_table)
@@ -0,0 +1,81 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.ml.ensemble.utils.sample import goss_sample
+
+GUEST = ("guest", "10000")
+SAMPLE_NUM = 3000
+TOP_RATE = 0.2
+OTHER_RATE = 0.1
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+def _gh(decimals):
+    rng = np.random.default_rng(0)
+    g = rng.normal(size=SAMPLE_NUM)
+    if decimals is not None:
+        # rounded gradients have many ties at the cut
+        g = np.round(g, decimals)
+    h = rng.random(SAMPLE_NUM) + 0.5
+    return pd.DataFrame({"sample_id": np.arange(SAMPLE_NUM), "id": np.arange(SAMPLE_NUM), "g": g, "h": h})
+
+
+def _sample(ctx, df, random_seed=42):
+    reader = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64")
+    frame = reader.to_frame(ctx, df)
+    # sample ids in block order then row order, the order in which ties are kept
+    sample_order = np.concatenate(
+        [np.asarray(blocks[0], dtype=np.int64) for _, blocks in sorted(frame.block_table.collect())]
+    )
+    result = goss_sample(frame, TOP_RATE, OTHER_RATE, random_seed=random_seed).as_pd_df()
+    return result.set_index(result["sample_id"].astype(int)).sort_index(), sample_order
+
+
+@pytest.mark.parametrize("decimals", [None, 1, 0])
+def test_goss_sample_sizes_and_weights(ctx, decimals):
+    df = _gh(decimals)
+    result, sample_order = _sample(ctx, df)
+    a_part_num, b_part_num = int(SAMPLE_NUM * TOP_RATE), int(SAMPLE_NUM * OTHER_RATE)
+    assert len(result) == a_part_num + b_part_num
+
+    # the a_part_num largest |g|, ties kept in block order
+    abs_g = np.abs(df["g"].to_numpy()[sample_order])
+    top = set(sample_order[np.argsort(-abs_g, kind="stable")[:a_part_num]].tolist())
+    assert top <= set(result.index)
+
+    weights = result["h"].to_numpy() / df["h"].to_numpy()[result.index]
+    is_top = result.index.isin(list(top))
+    np.testing.assert_allclose(weights[is_top], 1.0)
+    np.testing.assert_allclose(weights[~is_top], (SAMPLE_NUM - a_part_num) / b_part_num)
+    np.testing.assert_allclose(result["g"].to_numpy(), df["g"].to_numpy()[result.index] * weights)
+
+
+def test_goss_sample_is_reproducible(ctx):
+    df = _gh(1)
+    pd.testing.assert_frame_equal(_sample(ctx, df)[0], _sample(ctx, df)[0])
+    assert not _sample(ctx, df)[0].index.equals(_sample(ctx, df, random_seed=7)[0].index)
@@ -4,19 +4,250 @@ import pandas as pd
 from typing import Dict
 import numpy as np
 import torch
-from fate.ml.evaluation.metric_base import Metric
+from fate.ml.evaluation.metric_base import Metric, MetricState
 from sklearn.metrics import roc_auc_score
 from sklearn.metrics import accuracy_score
 from sklearn.metrics import recall_score, precision_score, f1_score
 from fate.ml.evaluation.metric_base import EvalResult
 
 
+"""
+Mergeable States
+"""
+
+# equal width bins of binary predict scores in [0, 1] when histograms are built per partition
+SCORE_BIN_NUM = 10000
+# thresholds closer than this to a histogram threshold are read at that threshold
+THRESHOLD_TOLERANCE = 1e-9
+
+
+class ConfusionCounts(MetricState):
+    """
+    sample counts of every (label, predicted class) pair. predict is binarized by threshold when one is given,
+    otherwise multi-dimension scores are reduced to their argmax class
+    """
+
+    def __init__(self, counts: Dict):
+        self.counts = counts
+
+    @classmethod
+    def from_data(cls, predict, label, threshold=None, **kwargs):
+        predict = np.asarray(predict, dtype=np.float64)
+        label = np.asarray(label, dtype=np.float64).flatten()
+        if threshold is not None:
+            predict = (predict.flatten() > threshold).astype(np.float64)
+        elif predict.shape != label.shape:
+            predict = predict.argmax(axis=-1).astype(np.float64)
+        pairs, counts = np.unique(np.stack([label, predict], axis=1), axis=0, return_counts=True)
+        return cls({(l, p): int(c) for (l, p), c in zip(pairs.tolist(), counts)})
+
+    def merge(self, other: "ConfusionCounts"):
+        counts = dict(self.counts)
+        for pair, count in other.counts.items():
+            counts[pair] = counts.get(pair, 0) + count
+        return ConfusionCounts(counts)
+
+    def classes(self):
+        return sorted({c for pair in self.counts for c in pair})
+
+    def accuracy(self):
+        total = sum(self.counts.values())
+        return sum(count for (l, p), count in self.counts.items() if l == p) / total
+
+    def class_counts(self, classes):
+        """
+        tp, fp and fn of each class, in the order of classes
+        """
+        index = {c: i for i, c in enumerate(classes)}
+        tp, fp, fn = np.zeros(len(classes)), np.zeros(len(classes)), np.zeros(len(classes))
+        for (l, p), count in self.counts.items():
+            if l == p:
+                if l in index:
+                    tp[index[l]] += count
+            else:
+                if p in index:
+                    fp[index[p]] += count
+                if l in index:
+                    fn[index[l]] += count
+        return tp, fp, fn
+
+    @staticmethod
+    def _safe_divide(numerator, denominator):
+        # scores with a zero denominator are 0, as sklearn does with zero_division="warn"
+        return np.divide(numerator, denominator, out=np.zeros(len(numerator)), where=denominator > 0)
+
+    def recall(self, classes):
+        tp, _, fn = self.class_counts(classes)
+        return self._safe_divide(tp, tp + fn)
+
+    def precision(self, classes):
+        tp, fp, _ = self.class_counts(classes)
+        return self._safe_divide(tp, tp + fp)
+
+    def f1(self, classes):
+        tp, fp, fn = self.class_counts(classes)
+        return self._safe_divide(2 * tp, 2 * tp + fp + fn)
+
+    def support(self, classes):
+        tp, _, fn = self.class_counts(classes)
+        return tp + fn
+
+
+class ScoreHistogram(MetricState):
+    """
+    positive and negative sample counts of predict scores binned by ascending thresholds, bin i holds the scores in
+    (thresholds[i - 1], thresholds[i]], so the confusion matrix at every threshold is recovered from suffix sums.
+    histograms built on different partitions are merged by adding counts, which lets table metrics run on data
+    that does not fit on one node
+    """
+
+    def __init__(self, thresholds, pos_count, neg_count):
+        self.thresholds = np.asarray(thresholds)
+        self.pos_count = np.asarray(pos_count)
+        self.neg_count = np.asarray(neg_count)
+        assert len(self.pos_count) == len(self.neg_count) == len(self.thresholds) + 1
+
+    @classmethod
+    def from_scores(cls, labels, scores, thresholds, pos_label=1):
+        thresholds = np.unique(thresholds)
+        labels = np.asarray(labels)
+        bins = np.searchsorted(thresholds, np.asarray(scores), side="left")
+        is_pos = labels == pos_label
+        pos_count = np.bincount(bins[is_pos], minlength=len(thresholds) + 1)
+        neg_count = np.bincount(bins[~is_pos], minlength=len(thresholds) + 1)
+        return cls(thresholds, pos_count, neg_count)
+
+    @classmethod
+    def from_data(cls, predict, label, bin_num=SCORE_BIN_NUM, pos_label=1, **kwargs):
+        """
+        binned on a fixed grid so that histograms of different partitions share thresholds, scores outside [0, 1]
+        fall in the first or the last bin
+        """
+        thresholds = np.linspace(0, 1, bin_num + 1)
+        predict = np.asarray(predict, dtype=np.float64).flatten()
+        label = np.asarray(label, dtype=np.float64).flatten()
+        return cls.from_scores(label, predict, thresholds, pos_label=pos_label)
+
+    @classmethod
+    def from_table(cls, table, thresholds, pos_label=1):
+        """
+        table values are (label, predict_score) pairs, each partition is binned locally and only the
+        histograms are reduced
+        """
+        thresholds = np.unique(thresholds)
+
+        def _partition_histogram(kvs):
+            labels, scores = [], []
+            for _, (label, score) in kvs:
+                labels.append(label)
+                scores.append(score)
+            return cls.from_scores(labels, scores, thresholds, pos_label=pos_label)
+
+        return table.applyPartitions(_partition_histogram).reduce(lambda h1, h2: h1.merge(h2))
+
+    def merge(self, other: "ScoreHistogram"):
+        assert np.array_equal(self.thresholds, other.thresholds), "can not merge histograms with different thresholds"
+        return ScoreHistogram(self.thresholds, self.pos_count + other.pos_count, self.neg_count + other.neg_count)
+
+    @property
+    def pos_num(self):
+        return self.pos_count.sum()
+
+    @property
+    def neg_num(self):
+        return self.neg_count.sum()
+
+    @property
+    def total(self):
+        return self.pos_num + self.neg_num
+
+    def sorted_thresholds(self):
+        return list(np.flip(self.thresholds))
+
+    def confusion_mat(self, ret: list, add_to_end=False):
+        """
+        confusion matrix at thresholds sorted in descending order, the same order _ConfusionMatrix.compute uses,
+        add_to_end appends a last row under which every sample is predicted positive
+        """
+        pos_suffix = np.flip(np.cumsum(np.flip(self.pos_count)))
+        neg_suffix = np.flip(np.cumsum(np.flip(self.neg_count)))
+        tp_num = np.flip(pos_suffix[1:])
+        fp_num = np.flip(neg_suffix[1:])
+        if add_to_end:
+            tp_num = np.append(tp_num, pos_suffix[0])
+            fp_num = np.append(fp_num, neg_suffix[0])
+
+        return _ConfusionMatrix.from_pred_pos_counts(tp_num, fp_num, self.pos_num, self.neg_num, ret)
+
+    def cuts(self, add_to_end=False):
+        confusion_mat = self.confusion_mat(ret=["tp", "fp"], add_to_end=add_to_end)
+        return list((confusion_mat["tp"] + confusion_mat["fp"]) / max(self.total, 1))
+
+    def confusion_mat_at(self, thresholds, ret: list):
+        """
+        confusion matrix at arbitrary thresholds, in the given order, each threshold is read at the largest
+        histogram threshold not above it
+        """
+        index = np.searchsorted(self.thresholds, np.asarray(thresholds) + THRESHOLD_TOLERANCE, side="right") - 1
+        index = np.clip(index, 0, len(self.thresholds) - 1)
+        pos_suffix = np.flip(np.cumsum(np.flip(self.pos_count)))
+        neg_suffix = np.flip(np.cumsum(np.flip(self.neg_count)))
+        return _ConfusionMatrix.from_pred_pos_counts(
+            pos_suffix[index + 1], neg_suffix[index + 1], self.pos_num, self.neg_num, ret
+        )
+
+    def auc(self):
+        """
+        area under the roc curve through every threshold, samples in one bin count as tied, so the area is exact
+        when no bin mixes different positive and negative scores
+        """
+        if self.pos_num == 0 or self.neg_num == 0:
+            raise ValueError("Only one class present in y_true. ROC AUC score is not defined in that case.")
+        confusion_mat = self.confusion_mat(ret=["tp", "fp"], add_to_end=True)
+        tpr = np.concatenate([[0.0], confusion_mat["tp"] / self.pos_num])
+        fpr = np.concatenate([[0.0], confusion_mat["fp"] / self.neg_num])
+        return float(np.sum(np.diff(fpr) * (tpr[1:] + tpr[:-1]) / 2))
+
+    def coarsen(self, index):
+        """
+        keep only the thresholds at index, counts of the dropped thresholds move to the next kept bin
+        """
+        index = np.unique(index)
+
+        def _coarsen_count(count):
+            cumsum = np.cumsum(count)
+            return np.diff(np.concatenate([[0], cumsum[index], cumsum[-1:]]))
+
+        return ScoreHistogram(self.thresholds[index], _coarsen_count(self.pos_count), _coarsen_count(self.neg_count))
+
+    def coarsen_by_rank(self, cut_num=100):
+        """
+        keep the thresholds above which the first 0, 1 / cut_num, 2 / cut_num ... of the samples rank, like
+        ThresholdCutter.cut_by_index does on sorted scores
+        """
+        above_num = self.total - np.cumsum(self.pos_count + self.neg_count)[:-1]
+        targets = np.arange(cut_num) / cut_num * self.total
+        index = np.searchsorted(-above_num, -targets, side="left")
+        return self.coarsen(np.clip(index, 0, len(self.thresholds) - 1))
+
+
+class ScoreHistogramMetric(Metric):
+    state_type = ScoreHistogram
+
+    def state_kwargs(self):
+        return {"bin_num": SCORE_BIN_NUM}
+
+    def from_state(self, state: ScoreHistogram):
+        # curves are read at about 100 cuts of the ranked scores, as they are when computed from sorted scores
+        return self(state.coarsen_by_rank(), None)
+
+
 """
 Single Value Metrics
 """
 
 
-class AUC(Metric):
+class AUC(ScoreHistogramMetric):
 
     metric_name = "auc"
 
@@ -24,19 +255,30 @@ class AUC(Metric):
         super().__init__()
 
     def __call__(self, predict, label, **kwargs) -> Dict:
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
+        if isinstance(predict, ScoreHistogram):
+            return EvalResult(self.metric_name, predict.auc())
         auc_score = roc_auc_score(label, predict)
         return EvalResult(self.metric_name, auc_score)
 
+    def from_state(self, state: ScoreHistogram):
+        return self(state, None)
+
 
 class BinaryMetricWithThreshold(Metric):
     def __init__(self, threshold=0.5):
         super().__init__()
         self.threshold = threshold
 
+    def state_kwargs(self):
+        return {"threshold": self.threshold}
 
-class MultiAccuracy(Metric):
+
+class MultiMetric(Metric):
+    state_type = ConfusionCounts
+
+
+class MultiAccuracy(MultiMetric):
 
     metric_name = "multi_accuracy"
 
@@ -48,8 +290,11 @@ class MultiAccuracy(Metric):
         acc = accuracy_score(label, predict)
         return EvalResult(self.metric_name, acc)
 
+    def from_state(self, state: ConfusionCounts):
+        return EvalResult(self.metric_name, state.accuracy())
+
 
-class MultiRecall(Metric):
+class MultiRecall(MultiMetric):
 
     metric_name = "multi_recall"
 
@@ -61,8 +306,11 @@ class MultiRecall(Metric):
         recall = recall_score(label, predict, average="macro")
         return EvalResult(self.metric_name, recall)
 
+    def from_state(self, state: ConfusionCounts):
+        return EvalResult(self.metric_name, state.recall(state.classes()).mean())
 
-class MultiPrecision(Metric):
+
+class MultiPrecision(MultiMetric):
 
     metric_name = "multi_precision"
 
@@ -74,6 +322,9 @@ class MultiPrecision(Metric):
         precision = precision_score(label, predict, average="macro")
         return EvalResult(self.metric_name, precision)
 
+    def from_state(self, state: ConfusionCounts):
+        return EvalResult(self.metric_name, state.precision(state.classes()).mean())
+
 
 class BinaryAccuracy(MultiAccuracy, BinaryMetricWithThreshold):
 
@@ -98,6 +349,9 @@ class BinaryRecall(MultiRecall, BinaryMetricWithThreshold):
         recall = recall_score(label, predict)
         return EvalResult(self.metric_name, recall)
 
+    def from_state(self, state: ConfusionCounts):
+        return EvalResult(self.metric_name, state.recall([1.0])[0])
+
 
 class BinaryPrecision(MultiPrecision, BinaryMetricWithThreshold):
 
@@ -110,8 +364,11 @@ class BinaryPrecision(MultiPrecision, BinaryMetricWithThreshold):
         precision = precision_score(label, predict)
         return EvalResult(self.metric_name, precision)
 
+    def from_state(self, state: ConfusionCounts):
+        return EvalResult(self.metric_name, state.precision([1.0])[0])
+
 
-class MultiF1Score(Metric):
+class MultiF1Score(MultiMetric):
 
     metric_name = "multi_f1_score"
 
@@ -127,6 +384,22 @@ class MultiF1Score(Metric):
         f1 = f1_score(label, predict, average=self.average)
         return EvalResult(self.metric_name, f1)
 
+    def from_state(self, state: ConfusionCounts):
+        if self.average == "binary":
+            f1 = state.f1([1.0])[0]
+        elif self.average == "micro":
+            # every sample is counted once as a false positive and once as a false negative when it is wrong
+            f1 = state.accuracy()
+        elif self.average == "macro":
+            f1 = state.f1(state.classes()).mean()
+        elif self.average == "weighted":
+            classes = state.classes()
+            support = state.support(classes)
+            f1 = (state.f1(classes) * support).sum() / support.sum() if support.sum() > 0 else 0.0
+        else:
+            raise ValueError("average {} is not supported when computing f1 score from states".format(self.average))
+        return EvalResult(self.metric_name, f1)
+
 
 class BinaryF1Score(MultiF1Score, BinaryMetricWithThreshold):
 
@@ -168,38 +441,50 @@ def sort_score_and_label(labels: np.ndarray, pred_scores: np.ndarray):
     return sorted_labels, sorted_scores
 
 
+def to_np_format_or_histogram(metric: Metric, predict, label):
+    """
+    table metrics accept a pre-binned ScoreHistogram as predict, in which case label is not needed
+    """
+    if isinstance(predict, ScoreHistogram):
+        return predict, None
+    return metric.to_np_format(predict), metric.to_np_format(label)
+
+
 class _ConfusionMatrix(object):
     @staticmethod
     def compute(sorted_labels: list, sorted_pred_scores: list, score_thresholds: list, ret: list, pos_label=1):
-
+        """
+        scores are sorted in descending order, so the samples predicted positive under a threshold always form a
+        prefix, and the confusion matrix is read from cumulative positive counts instead of a thresholds x samples
+        matrix
+        """
         for ret_type in ret:
             assert ret_type in ["tp", "tn", "fp", "fn"]
 
-        sorted_labels = np.array(sorted_labels)
-        sorted_scores = np.array(sorted_pred_scores)
-        sorted_labels[sorted_labels != pos_label] = 0
-        sorted_labels[sorted_labels == pos_label] = 1
-        score_thresholds = np.array([score_thresholds]).transpose()
-        pred_labels = (sorted_scores > score_thresholds) + 0
+        sorted_labels = np.asarray(sorted_labels)
+        sorted_scores = np.asarray(sorted_pred_scores)
+        pos_cumsum = np.concatenate([[0], np.cumsum(sorted_labels == pos_label)])
+        pred_pos_num = len(sorted_scores) - np.searchsorted(
+            sorted_scores[::-1], np.asarray(score_thresholds), side="right"
+        )
+        tp_num = pos_cumsum[pred_pos_num]
+        fp_num = pred_pos_num - tp_num
+        pos_num = pos_cumsum[-1]
+        neg_num = len(sorted_labels) - pos_num
+
+        return _ConfusionMatrix.from_pred_pos_counts(tp_num, fp_num, pos_num, neg_num, ret)
 
+    @staticmethod
+    def from_pred_pos_counts(tp_num, fp_num, pos_num, neg_num, ret: list):
         ret_dict = {}
-        if "tp" in ret or "tn" in ret:
-            match_arr = pred_labels + sorted_labels
-            if "tp" in ret:
-                tp_num = (match_arr == 2).sum(axis=-1)
-                ret_dict["tp"] = tp_num
-            if "tn" in ret:
-                tn_num = (match_arr == 0).sum(axis=-1)
-                ret_dict["tn"] = tn_num
-
-        if "fp" in ret or "fn" in ret:
-            match_arr = sorted_labels - pred_labels
-            if "fp" in ret:
-                fp_num = (match_arr == -1).sum(axis=-1)
-                ret_dict["fp"] = fp_num
-            if "fn" in ret:
-                fn_num = (match_arr == 1).sum(axis=-1)
-                ret_dict["fn"] = fn_num
+        if "tp" in ret:
+            ret_dict["tp"] = tp_num
+        if "tn" in ret:
+            ret_dict["tn"] = neg_num - fp_num
+        if "fp" in ret:
+            ret_dict["fp"] = fp_num
+        if "fn" in ret:
+            ret_dict["fn"] = pos_num - tp_num
 
         return ret_dict
 
@@ -268,6 +553,13 @@ class BiClassMetric(object):
         scores,
         add_to_end=True,
     ):
+        if isinstance(scores, ScoreHistogram):
+            confusion_mat = scores.confusion_mat(ret=["tp", "fp", "fn", "tn"], add_to_end=add_to_end)
+            score_threshold = scores.sorted_thresholds()
+            if add_to_end:
+                score_threshold.append(min(score_threshold) - 0.001)
+            return confusion_mat, score_threshold, scores.cuts(add_to_end=add_to_end)
+
         sorted_labels, sorted_scores = sort_score_and_label(labels, scores)
 
         score_threshold, cuts = None, None
@@ -309,7 +601,7 @@ Metrics with Cruve/Table Results
 """
 
 
-class KS(Metric):
+class KS(ScoreHistogramMetric):
 
     metric_name = "ks"
 
@@ -317,15 +609,19 @@ class KS(Metric):
         super().__init__()
 
     def __call__(self, predict, label, **kwargs) -> Dict:
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
 
-        sorted_labels, sorted_scores = sort_score_and_label(label, predict)
-        threshold, cuts = ThresholdCutter.cut_by_index(sorted_scores)
-        confusion_mat = _ConfusionMatrix.compute(
-            sorted_labels, sorted_scores, threshold, ret=["tp", "fp"], pos_label=1
-        )
-        pos_num, neg_num = neg_pos_count(sorted_labels, pos_label=1)
+        if isinstance(predict, ScoreHistogram):
+            threshold, cuts = predict.sorted_thresholds(), predict.cuts()
+            confusion_mat = predict.confusion_mat(ret=["tp", "fp"])
+            pos_num, neg_num = predict.pos_num, predict.neg_num
+        else:
+            sorted_labels, sorted_scores = sort_score_and_label(label, predict)
+            threshold, cuts = ThresholdCutter.cut_by_index(sorted_scores)
+            confusion_mat = _ConfusionMatrix.compute(
+                sorted_labels, sorted_scores, threshold, ret=["tp", "fp"], pos_label=1
+            )
+            pos_num, neg_num = neg_pos_count(sorted_labels, pos_label=1)
 
         assert pos_num > 0 and neg_num > 0, (
             "error when computing KS metric, pos sample number and neg sample number" "must be larger than 0"
@@ -346,7 +642,7 @@ class KS(Metric):
         )
 
 
-class ConfusionMatrix(Metric):
+class ConfusionMatrix(ScoreHistogramMetric):
 
     metric_name = "confusion_matrix"
 
@@ -355,20 +651,23 @@ class ConfusionMatrix(Metric):
 
     def __call__(self, predict, label, **kwargs):
 
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
 
-        sorted_labels, sorted_scores = sort_score_and_label(label, predict)
-        threshold, cuts = ThresholdCutter.cut_by_index(sorted_scores)
-        confusion_mat = _ConfusionMatrix.compute(
-            sorted_labels, sorted_scores, threshold, ret=["tp", "tn", "fp", "fn"], pos_label=1
-        )
+        if isinstance(predict, ScoreHistogram):
+            threshold, cuts = predict.sorted_thresholds(), predict.cuts()
+            confusion_mat = predict.confusion_mat(ret=["tp", "tn", "fp", "fn"])
+        else:
+            sorted_labels, sorted_scores = sort_score_and_label(label, predict)
+            threshold, cuts = ThresholdCutter.cut_by_index(sorted_scores)
+            confusion_mat = _ConfusionMatrix.compute(
+                sorted_labels, sorted_scores, threshold, ret=["tp", "tn", "fp", "fn"], pos_label=1
+            )
         confusion_mat["cuts"] = cuts
         confusion_mat["threshold"] = threshold
         return EvalResult(self.metric_name, pd.DataFrame(confusion_mat))
 
 
-class Lift(Metric, BiClassMetric):
+class Lift(ScoreHistogramMetric, BiClassMetric):
 
     metric_name = "lift"
 
@@ -432,8 +731,8 @@ class Lift(Metric, BiClassMetric):
 
     def __call__(self, predict, label, **kwargs):
 
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
+        labels_len = predict.total if isinstance(predict, ScoreHistogram) else len(label)
         confusion_mat, score_threshold, cuts = self.prepare_confusion_mat(
             label,
             predict,
@@ -442,7 +741,7 @@ class Lift(Metric, BiClassMetric):
 
         lifts_y, lifts_x = self.compute_metric_from_confusion_mat(
             confusion_mat,
-            len(label),
+            labels_len,
         )
 
         return EvalResult(
@@ -450,7 +749,7 @@ class Lift(Metric, BiClassMetric):
         )
 
 
-class Gain(Metric, BiClassMetric):
+class Gain(ScoreHistogramMetric, BiClassMetric):
 
     metric_name = "gain"
 
@@ -504,22 +803,22 @@ class Gain(Metric, BiClassMetric):
 
     def __call__(self, predict, label, **kwargs):
 
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
+        labels_len = predict.total if isinstance(predict, ScoreHistogram) else len(label)
         confusion_mat, score_threshold, cuts = self.prepare_confusion_mat(
             label,
             predict,
             add_to_end=False,
         )
 
-        gain_y, gain_x = self.compute_metric_from_confusion_mat(confusion_mat, len(label))
+        gain_y, gain_x = self.compute_metric_from_confusion_mat(confusion_mat, labels_len)
 
         return EvalResult(
             self.metric_name, pd.DataFrame({"gainx": gain_x, "gainy": gain_y, "threshold": list(score_threshold)})
         )
 
 
-class BiClassPrecisionTable(Metric, BiClassMetric):
+class BiClassPrecisionTable(ScoreHistogramMetric, BiClassMetric):
     """
     Compute binary classification precision using multiple thresholds
     """
@@ -541,13 +840,12 @@ class BiClassPrecisionTable(Metric, BiClassMetric):
         return precision_scores
 
     def __call__(self, predict, label, **kwargs) -> Dict:
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
         p, threshold, cuts = self.compute(label, predict)
         return EvalResult(self.metric_name, pd.DataFrame({"p": p, "threshold": threshold, "cuts": cuts}))
 
 
-class BiClassRecallTable(Metric, BiClassMetric):
+class BiClassRecallTable(ScoreHistogramMetric, BiClassMetric):
     """
     Compute binary classification recall using multiple thresholds
     """
@@ -563,13 +861,12 @@ class BiClassRecallTable(Metric, BiClassMetric):
         return recall_scores
 
     def __call__(self, predict, label, **kwargs) -> Dict:
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
         r, threshold, cuts = self.compute(label, predict)
         return EvalResult(self.metric_name, pd.DataFrame({"r": r, "threshold": threshold, "cuts": cuts}))
 
 
-class BiClassAccuracyTable(Metric, BiClassMetric):
+class BiClassAccuracyTable(ScoreHistogramMetric, BiClassMetric):
     """
     Compute binary classification accuracy using multiple thresholds
     """
@@ -595,13 +892,12 @@ class BiClassAccuracyTable(Metric, BiClassMetric):
         return rs[:-1]
 
     def __call__(self, predict, label, **kwargs) -> Dict:
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
         accuracy, threshold, cuts = self.compute(label, predict)
         return EvalResult(self.metric_name, pd.DataFrame({"accuracy": accuracy, "threshold": threshold, "cuts": cuts}))
 
 
-class FScoreTable(Metric):
+class FScoreTable(ScoreHistogramMetric):
     """
     Compute F score from bi-class confusion mat
     """
@@ -610,15 +906,18 @@ class FScoreTable(Metric):
 
     def __call__(self, predict, label, beta=1):
 
-        predict = self.to_np_format(predict)
-        label = self.to_np_format(label)
+        predict, label = to_np_format_or_histogram(self, predict, label)
 
-        sorted_labels, sorted_scores = sort_score_and_label(label, predict)
-        _, cuts = ThresholdCutter.cut_by_step(sorted_scores, steps=0.01)
         fixed_interval_threshold = ThresholdCutter.fixed_interval_threshold()
-        confusion_mat = _ConfusionMatrix.compute(
-            sorted_labels, sorted_scores, fixed_interval_threshold, ret=["tp", "fp", "fn", "tn"]
-        )
+        if isinstance(predict, ScoreHistogram):
+            cuts = list(map(float, np.arange(0, 1, 0.01)))
+            confusion_mat = predict.confusion_mat_at(fixed_interval_threshold, ret=["tp", "fp", "fn", "tn"])
+        else:
+            sorted_labels, sorted_scores = sort_score_and_label(label, predict)
+            _, cuts = ThresholdCutter.cut_by_step(sorted_scores, steps=0.01)
+            confusion_mat = _ConfusionMatrix.compute(
+                sorted_labels, sorted_scores, fixed_interval_threshold, ret=["tp", "fp", "fn", "tn"]
+            )
         precision_computer = BiClassPrecisionTable()
         recall_computer = BiClassRecallTable()
         p_score = precision_computer.compute_metric_from_confusion_mat(confusion_mat)
@@ -633,6 +932,10 @@ class FScoreTable(Metric):
             self.metric_name, pd.DataFrame({"f_score": f_score, "threshold": fixed_interval_threshold, "cuts": cuts})
         )
 
+    def from_state(self, state: ScoreHistogram):
+        # read at fixed thresholds, which the full histogram resolves
+        return self(state, None)
+
 
 class PSI(Metric):
 
@@ -69,8 +69,24 @@ class EvalResult(object):
         return self.to_dict()
 
 
+class MetricState(object):
+    """
+    sufficient statistics of a metric on part of the data. states computed on different partitions are combined
+    by `merge`, so a metric can be evaluated without gathering all predictions on one node
+    """
+
+    @classmethod
+    def from_data(cls, predict: np.ndarray, label: np.ndarray, **kwargs) -> "MetricState":
+        raise NotImplementedError()
+
+    def merge(self, other: "MetricState") -> "MetricState":
+        raise NotImplementedError()
+
+
 class Metric(object):
     metric_name = None
+    # MetricState subclass the metric can be computed from, None if the metric needs all the data at once
+    state_type = None
 
     def __init__(self, *args, **kwargs):
         pass
@@ -78,6 +94,15 @@ class Metric(object):
     def __call__(self, predict, label, **kwargs) -> EvalResult:
         pass
 
+    def state_kwargs(self) -> dict:
+        """
+        keyword arguments passed to `state_type.from_data`, metrics with the same state type and kwargs share a state
+        """
+        return {}
+
+    def from_state(self, state: MetricState):
+        raise NotImplementedError()
+
     def to_np_format(self, data, flatten=True):
         if isinstance(data, list):
             ret = np.array(data)
@@ -135,16 +160,46 @@ class MetricEnsemble(object):
             predict, label, input_ = self._parse_input(eval_rs)
 
         for metric in self._metrics:
-            rs = metric(predict, label)
-            if isinstance(rs, tuple):
-                new_rs = [r.to_dict() for r in rs]
-                rs = new_rs
-            elif isinstance(rs, EvalResult):
-                rs = rs.to_dict()
-            else:
-                raise ValueError("cannot parse metric result: {}".format(rs))
-            metric_result.append(rs)
+            metric_result.append(self._format_result(metric(predict, label)))
         return metric_result
 
     def fit(self, eval_rs=None, predict=None, label=None, **kwargs):
         return self.__call__(eval_rs, predict, label, **kwargs)
+
+    @staticmethod
+    def _format_result(rs):
+        if isinstance(rs, tuple):
+            return [r.to_dict() for r in rs]
+        elif isinstance(rs, EvalResult):
+            return rs.to_dict()
+        else:
+            raise ValueError("cannot parse metric result: {}".format(rs))
+
+    @staticmethod
+    def _state_key(metric: Metric):
+        return metric.state_type, tuple(sorted(metric.state_kwargs().items()))
+
+    def is_mergeable(self):
+        return all(metric.state_type is not None for metric in self._metrics)
+
+    def partial_states(self, predict: np.ndarray, label: np.ndarray) -> Dict:
+        """
+        states of all metrics on one partition of the data, metrics sharing a state compute it once
+        """
+        states = {}
+        for metric in self._metrics:
+            key = self._state_key(metric)
+            if key not in states:
+                state_type, state_kwargs = key
+                states[key] = state_type.from_data(predict, label, **dict(state_kwargs))
+        return states
+
+    @staticmethod
+    def merge_states(states: Dict, other_states: Dict) -> Dict:
+        return {key: state.merge(other_states[key]) for key, state in states.items()}
+
+    def from_states(self, states: Dict):
+        """
+        evaluate every metric from merged states, results are formatted as `__call__` returns them
+        """
+        return [self._format_result(metric.from_state(states[self._state_key(metric)])) for metric in self._metrics]
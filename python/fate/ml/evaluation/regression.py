@@ -15,12 +15,71 @@
 
 from typing import Dict
 import numpy as np
-from fate.ml.evaluation.metric_base import Metric
+from fate.ml.evaluation.metric_base import Metric, MetricState
 from sklearn.metrics import mean_squared_error, mean_absolute_error, r2_score
 from fate.ml.evaluation.metric_base import EvalResult
 
 
-class RMSE(Metric):
+class RegressionState(MetricState):
+    """
+    sample count, label mean, centered label sum of squares, squared error sum and absolute error sum.
+    the label moments are merged with the pairwise update of Chan et al. instead of raw sums of squares,
+    which keeps the total sum of squares of r2 accurate when the labels have a large mean
+    """
+
+    def __init__(self, count, label_mean, label_m2, squared_error, absolute_error):
+        self.count = count
+        self.label_mean = label_mean
+        self.label_m2 = label_m2
+        self.squared_error = squared_error
+        self.absolute_error = absolute_error
+
+    @classmethod
+    def from_data(cls, predict, label, **kwargs):
+        predict = np.asarray(predict, dtype=np.float64).flatten()
+        label = np.asarray(label, dtype=np.float64).flatten()
+        count = len(label)
+        label_mean = label.mean() if count else 0.0
+        error = predict - label
+        return cls(
+            count,
+            label_mean,
+            ((label - label_mean) ** 2).sum(),
+            (error**2).sum(),
+            np.abs(error).sum(),
+        )
+
+    def merge(self, other: "RegressionState"):
+        count = self.count + other.count
+        if count == 0:
+            return self
+        delta = other.label_mean - self.label_mean
+        return RegressionState(
+            count,
+            self.label_mean + delta * other.count / count,
+            self.label_m2 + other.label_m2 + delta**2 * self.count * other.count / count,
+            self.squared_error + other.squared_error,
+            self.absolute_error + other.absolute_error,
+        )
+
+    def mse(self):
+        return self.squared_error / self.count
+
+    def mae(self):
+        return self.absolute_error / self.count
+
+    def r2(self):
+        if self.label_m2 == 0:
+            # same as sklearn when all labels are equal
+            return 1.0 if self.squared_error == 0 else 0.0
+        return 1 - self.squared_error / self.label_m2
+
+
+class RegressionMetric(Metric):
+    state_type = RegressionState
+
+
+class RMSE(RegressionMetric):
     metric_name = "rmse"
 
     def __call__(self, predict, label, **kwargs) -> Dict:
@@ -29,8 +88,11 @@ class RMSE(Metric):
         rmse = np.sqrt(mean_squared_error(label, predict))
         return EvalResult(self.metric_name, rmse)
 
+    def from_state(self, state: RegressionState):
+        return EvalResult(self.metric_name, np.sqrt(state.mse()))
+
 
-class MSE(Metric):
+class MSE(RegressionMetric):
     metric_name = "mse"
 
     def __call__(self, predict, label, **kwargs) -> Dict:
@@ -39,8 +101,11 @@ class MSE(Metric):
         mse = mean_squared_error(label, predict)
         return EvalResult(self.metric_name, mse)
 
+    def from_state(self, state: RegressionState):
+        return EvalResult(self.metric_name, state.mse())
 
-class MAE(Metric):
+
+class MAE(RegressionMetric):
     metric_name = "mae"
 
     def __call__(self, predict, label, **kwargs) -> Dict:
@@ -49,8 +114,11 @@ class MAE(Metric):
         mae = mean_absolute_error(label, predict)
         return EvalResult(self.metric_name, mae)
 
+    def from_state(self, state: RegressionState):
+        return EvalResult(self.metric_name, state.mae())
+
 
-class R2Score(Metric):
+class R2Score(RegressionMetric):
     metric_name = "r2_score"
 
     def __call__(self, predict, label, **kwargs) -> Dict:
@@ -58,3 +126,6 @@ class R2Score(Metric):
         label = self.to_np_format(label)
         r2 = r2_score(label, predict)
         return EvalResult(self.metric_name, r2)
+
+    def from_state(self, state: RegressionState):
+        return EvalResult(self.metric_name, state.r2())
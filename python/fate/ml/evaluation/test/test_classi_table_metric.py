@@ -18,6 +18,7 @@ import numpy as np
 from sklearn.metrics import roc_auc_score, accuracy_score, recall_score, precision_score, f1_score
 from sklearn.preprocessing import LabelBinarizer
 from fate.ml.evaluation.classification import *
+from fate.ml.evaluation.classification import _ConfusionMatrix
 
 
 def generate_predict_and_label(num):
@@ -59,6 +60,23 @@ class TestMetric(unittest.TestCase):
         result = bi_acc_metric(predict, label)
         print(result.to_dict())
 
+    def test_score_histogram(self):
+        predict, label = generate_predict_and_label(1000)
+        thresholds = ThresholdCutter.fixed_interval_threshold()
+        histogram = ScoreHistogram.from_scores(label[:500], predict[:500], thresholds).merge(
+            ScoreHistogram.from_scores(label[500:], predict[500:], thresholds)
+        )
+        sorted_labels, sorted_scores = sort_score_and_label(label, predict)
+        confusion_mat = _ConfusionMatrix.compute(
+            sorted_labels, sorted_scores, list(np.flip(thresholds)), ret=["tp", "tn", "fp", "fn"]
+        )
+        histogram_confusion_mat = histogram.confusion_mat(ret=["tp", "tn", "fp", "fn"])
+        for ret_type in ["tp", "tn", "fp", "fn"]:
+            np.testing.assert_array_equal(confusion_mat[ret_type], histogram_confusion_mat[ret_type])
+
+        result = KS()(histogram, None)
+        print(result[0].to_dict())
+
     def test_psi(self):
         psi_metric = PSI()
         predict, label = generate_predict_and_label(1000)
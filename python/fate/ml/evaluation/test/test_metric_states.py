@@ -0,0 +1,135 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from sklearn.metrics import roc_auc_score, f1_score
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.components.components.evaluation import evaluate
+from fate.ml.evaluation.tool import get_binary_metrics, get_multi_metrics, get_regression_metrics
+from fate.ml.evaluation.classification import BinaryF1Score, MultiF1Score
+from fate.ml.utils.predict_tools import LABEL, PREDICT_RESULT, PREDICT_SCORE, to_dist_df
+
+
+def merged_states(ensemble, predict, label, partition_num=4):
+    states = None
+    for predict_part, label_part in zip(np.array_split(predict, partition_num), np.array_split(label, partition_num)):
+        part_states = ensemble.partial_states(predict_part, label_part)
+        states = part_states if states is None else ensemble.merge_states(states, part_states)
+    return states
+
+
+def single_values(results):
+    return {rs["metric"]: rs["val"] for rs in results if isinstance(rs, dict) and not isinstance(rs["val"], dict)}
+
+
+class TestMetricStates(unittest.TestCase):
+    def test_regression_states(self):
+        predict = np.random.random_sample(1000) * 10 + 1e6
+        label = np.random.random_sample(1000) * 10 + 1e6
+        ensemble = get_regression_metrics()
+        expected = single_values(ensemble(predict=predict, label=label))
+        result = single_values(ensemble.from_states(merged_states(ensemble, predict, label)))
+        for name, val in expected.items():
+            self.assertAlmostEqual(result[name], val, places=6)
+
+    def test_multi_states(self):
+        label = np.random.randint(0, 4, 1000)
+        predict = np.random.random_sample((1000, 4))
+        ensemble = get_multi_metrics().add_metric(MultiF1Score(average="macro"))
+        expected = single_values(ensemble(predict=predict, label=label))
+        result = single_values(ensemble.from_states(merged_states(ensemble, predict, label)))
+        for name, val in expected.items():
+            self.assertAlmostEqual(result[name], val, places=10)
+
+    def test_binary_states(self):
+        label = np.random.randint(0, 2, 1000)
+        predict = np.clip(np.random.normal(0.4 + 0.2 * label, 0.2), 0, 1)
+        ensemble = get_binary_metrics().add_metric(BinaryF1Score())
+        result = ensemble.from_states(merged_states(ensemble, predict, label))
+        values = single_values(result)
+        self.assertAlmostEqual(values["auc"], roc_auc_score(label, predict), places=3)
+        self.assertAlmostEqual(values["binary_f1_score"], f1_score(label, predict > 0.5), places=10)
+        self.assertEqual(len(result), len(ensemble(predict=predict, label=label)))
+
+
+class TestEvaluateByStates(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls):
+        cls.data_dir = tempfile.TemporaryDirectory()
+        cls.computing = CSession(data_dir=cls.data_dir.name)
+        federation = StandaloneFederation(cls.computing, "fed", ("guest", "10000"), [("guest", "10000")])
+        cls.ctx = Context(computing=cls.computing, federation=federation)
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.computing.destroy()
+        cls.data_dir.cleanup()
+
+    def _predict_frame(self, predict, label):
+        sample_num = len(label)
+        df = pd.DataFrame(
+            {
+                "sample_id": np.arange(sample_num),
+                "id": np.arange(sample_num),
+                PREDICT_SCORE: predict,
+                PREDICT_RESULT: predict,
+                LABEL: label,
+                "type": np.where(np.arange(sample_num) % 3 == 0, "validate", "train"),
+            }
+        )
+        return to_dist_df(self.ctx, "sample_id", "id", df)
+
+    def _assert_matches_exact(self, ensemble, predict_col, predict, label, places):
+        data = self._predict_frame(predict, label)
+        expected = {
+            name: ensemble(predict=split[predict_col], label=split[LABEL])
+            for name, split in data.as_pd_df().groupby("type")
+        }
+        # the default evaluation is exact
+        self.assertEqual(evaluate(data, ensemble, predict_col, LABEL), expected)
+
+        by_states = evaluate(data, ensemble, predict_col, LABEL, by_states=True)
+        self.assertEqual(by_states.keys(), expected.keys())
+        for name, results in expected.items():
+            self.assertEqual(len(by_states[name]), len(results))
+            values = single_values(by_states[name])
+            for metric, val in single_values(results).items():
+                self.assertAlmostEqual(values[metric], val, places=places)
+
+    def test_binary(self):
+        label = np.random.randint(0, 2, 1000)
+        predict = np.clip(np.random.normal(0.4 + 0.2 * label, 0.2), 0, 1)
+        ensemble = get_binary_metrics().add_metric(BinaryF1Score())
+        self._assert_matches_exact(ensemble, PREDICT_SCORE, predict, label, places=2)
+
+    def test_multi(self):
+        label = np.random.randint(0, 4, 1000)
+        predict = np.where(np.random.random_sample(1000) < 0.6, label, np.random.randint(0, 4, 1000))
+        ensemble = get_multi_metrics().add_metric(MultiF1Score(average="macro"))
+        self._assert_matches_exact(ensemble, PREDICT_RESULT, predict, label, places=10)
+
+    def test_regression(self):
+        label = np.random.random_sample(1000) * 10
+        predict = label + np.random.normal(0, 1, 1000)
+        self._assert_matches_exact(get_regression_metrics(), PREDICT_SCORE, predict, label, places=6)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -20,6 +20,7 @@ import torch
 from fate.arch import Context, dataframe
 from fate.ml.abc.module import HeteroModule
 from fate.ml.utils import predict_tools
+from fate.ml.utils._batch_pipeline import BatchTimer, DelayedGradients
 from fate.ml.utils._model_param import (
     deserialize_param,
     initialize_param,
@@ -39,6 +40,7 @@ class CoordinatedLinRModuleGuest(HeteroModule):
         learning_rate_param=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.batch_size = batch_size
@@ -46,6 +48,7 @@ class CoordinatedLinRModuleGuest(HeteroModule):
         self.learning_rate_param = learning_rate_param
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
 
         self.estimator = None
 
@@ -57,6 +60,10 @@ class CoordinatedLinRModuleGuest(HeteroModule):
         self.epochs = epochs
         self.estimator.epochs = epochs
 
+    def set_pipeline_staleness(self, pipeline_staleness):
+        self.pipeline_staleness = pipeline_staleness
+        self.estimator.pipeline_staleness = pipeline_staleness
+
     def fit(self, ctx: Context, train_data, validate_data=None) -> None:
         if self.estimator is None:
             optimizer = Optimizer(
@@ -75,6 +82,7 @@ class CoordinatedLinRModuleGuest(HeteroModule):
                 learning_rate_scheduler=lr_scheduler,
                 init_param=self.init_param,
                 floating_point_precision=self.floating_point_precision,
+                pipeline_staleness=self.pipeline_staleness,
             )
             self.estimator = estimator
         encryptor = ctx.arbiter("encryptor").get()
@@ -94,6 +102,7 @@ class CoordinatedLinRModuleGuest(HeteroModule):
                 "init_param": self.init_param,
                 "optimizer_param": self.optimizer_param,
                 "floating_point_precision": self.floating_point_precision,
+                "pipeline_staleness": self.pipeline_staleness,
             },
         }
 
@@ -105,12 +114,14 @@ class CoordinatedLinRModuleGuest(HeteroModule):
             batch_size=model["meta"]["batch_size"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=model["meta"].get("pipeline_staleness", 0),
         )
         estimator = CoordinatedLinREstimatorGuest(
             epochs=model["meta"]["epochs"],
             batch_size=model["meta"]["batch_size"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=linr.pipeline_staleness,
         )
         estimator.restore(model["data"]["estimator"])
         linr.estimator = estimator
@@ -127,6 +138,7 @@ class CoordinatedLinREstimatorGuest(HeteroModule):
         learning_rate_scheduler=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.batch_size = batch_size
@@ -135,6 +147,7 @@ class CoordinatedLinREstimatorGuest(HeteroModule):
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
         self._fixpoint_precision = 2**floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
 
         self.w = None
         self.start_epoch = 0
@@ -142,61 +155,76 @@ class CoordinatedLinREstimatorGuest(HeteroModule):
         self.is_converged = False
         self.header = None
 
-    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, Y, weight):
+    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, Y, weight, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw = torch.matmul(X, w.detach())
         half_d = Xw - Y
         if weight:
             half_d = half_d * weight
-        batch_ctx.hosts.put("half_d", encryptor.encrypt_tensor(half_d, obfuscate=True))
+        with timer.crypto():
+            half_d_enc = encryptor.encrypt_tensor(half_d, obfuscate=True)
+        batch_ctx.hosts.put("half_d", half_d_enc)
         half_g = torch.matmul(X.T, half_d)
 
-        Xw_h = batch_ctx.hosts.get("Xw_h")[0]
-        if weight:
-            Xw_h = Xw_h * weight
-        if self.floating_point_precision:
-            host_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), Xw_h)
-            host_half_g = 1 / self._fixpoint_precision * host_half_g
-        else:
-            host_half_g = torch.matmul(X.T, Xw_h)
+        with timer.wait():
+            Xw_h = batch_ctx.hosts.get("Xw_h")[0]
+        with timer.crypto():
+            if weight:
+                Xw_h = Xw_h * weight
+            if self.floating_point_precision:
+                host_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), Xw_h)
+                host_half_g = 1 / self._fixpoint_precision * host_half_g
+            else:
+                host_half_g = torch.matmul(X.T, Xw_h)
 
         loss = 0.5 / h * torch.matmul(half_d.T, half_d)
         if self.optimizer.l1_penalty or self.optimizer.l2_penalty:
             loss_norm = self.optimizer.loss_norm(w)
             loss += loss_norm
 
-        for Xw2_h in batch_ctx.hosts.get("Xw2_h"):
-            loss += 0.5 / h * Xw2_h
-        h_loss_list = batch_ctx.hosts.get("h_loss")
-        for h_loss in h_loss_list:
-            if h_loss is not None:
-                loss += h_loss
+        with timer.wait():
+            Xw2_h_list = batch_ctx.hosts.get("Xw2_h")
+            h_loss_list = batch_ctx.hosts.get("h_loss")
+        with timer.crypto():
+            for Xw2_h in Xw2_h_list:
+                loss += 0.5 / h * Xw2_h
+            for h_loss in h_loss_list:
+                if h_loss is not None:
+                    loss += h_loss
 
         batch_ctx.arbiter.put(loss=loss)
 
         # gradient
-        g = 1 / h * (half_g + host_half_g)
+        with timer.crypto():
+            g = 1 / h * (half_g + host_half_g)
         return g
 
-    def centralized_compute_gradient(self, batch_ctx, w, X, Y, weight):
+    def centralized_compute_gradient(self, batch_ctx, w, X, Y, weight, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw = torch.matmul(X, w.detach())
         d = Xw - Y
 
-        Xw_h_all = batch_ctx.hosts.get("Xw_h")
-        for Xw_h in Xw_h_all:
-            d += Xw_h
+        with timer.wait():
+            Xw_h_all = batch_ctx.hosts.get("Xw_h")
+        with timer.crypto():
+            for Xw_h in Xw_h_all:
+                d += Xw_h
 
-        if weight:
-            d = d * weight
+            if weight:
+                d = d * weight
         batch_ctx.hosts.put(d=d)
 
         # gradient
-        if self.floating_point_precision:
-            g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
-            g = 1 / (self._fixpoint_precision * h) * g
-        else:
-            g = 1 / h * torch.matmul(X.T, d)
+        with timer.crypto():
+            if self.floating_point_precision:
+                g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
+                g = 1 / (self._fixpoint_precision * h) * g
+            else:
+                g = 1 / h * torch.matmul(X.T, d)
         return g
 
     def fit_model(self, ctx, encryptor, train_data, validate_data=None):
@@ -217,24 +245,33 @@ class CoordinatedLinREstimatorGuest(HeteroModule):
         # if self.end_epoch >= 0:
         #    self.start_epoch = self.end_epoch + 1
         is_centralized = len(ctx.hosts) > 1
+        # updates of the last `pipeline_staleness` batches may still be on the arbiter when the next batch starts
+        delayed_gradients = DelayedGradients(self.pipeline_staleness)
 
         for i, iter_ctx in ctx.on_iterations.ctxs_range(self.epochs):
             self.optimizer.set_iters(i)
             logger.info(f"self.optimizer set epoch {i}")
             for batch_ctx, batch_data in iter_ctx.on_batches.ctxs_zip(batch_loader):
+                timer = BatchTimer(enabled=self.pipeline_staleness > 0)
                 X = batch_data.x
                 Y = batch_data.label
                 weight = batch_data.weight
                 if is_centralized:
-                    g = self.centralized_compute_gradient(batch_ctx, w, X, Y, weight)
+                    g = self.centralized_compute_gradient(batch_ctx, w, X, Y, weight, timer)
                 else:
-                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, Y, weight)
+                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, Y, weight, timer)
                 g = self.optimizer.add_regular_to_grad(g, w, self.init_param.get("fit_intercept"))
                 batch_ctx.arbiter.put("g_enc", g)
-                g = batch_ctx.arbiter.get("g")
+                for ready_ctx in delayed_gradients.push(batch_ctx):
+                    with timer.wait():
+                        g = ready_ctx.arbiter.get("g")
+                    w = self.optimizer.update_weights(w, g, self.init_param.get("fit_intercept"), self.lr_scheduler.lr)
+                # logger.info(f"w={w}")
+                timer.log(batch_ctx, "linr_batch_time")
 
+            for ready_ctx in delayed_gradients.drain():
+                g = ready_ctx.arbiter.get("g")
                 w = self.optimizer.update_weights(w, g, self.init_param.get("fit_intercept"), self.lr_scheduler.lr)
-                # logger.info(f"w={w}")
             self.is_converged = iter_ctx.arbiter("converge_flag").get()
             if self.is_converged:
                 self.end_epoch = i
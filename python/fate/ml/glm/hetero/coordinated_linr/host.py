@@ -19,6 +19,7 @@ import torch
 from fate.arch import Context
 from fate.arch.dataframe import DataLoader
 from fate.ml.abc.module import HeteroModule
+from fate.ml.utils._batch_pipeline import BatchTimer, DelayedGradients
 from fate.ml.utils._model_param import (
     deserialize_param,
     initialize_param,
@@ -38,6 +39,7 @@ class CoordinatedLinRModuleHost(HeteroModule):
         learning_rate_param=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.optimizer_param = optimizer_param
@@ -46,6 +48,7 @@ class CoordinatedLinRModuleHost(HeteroModule):
         self.init_param = init_param or {}
         self.init_param["fit_intercept"] = False
         self.floating_point_precision = 23
+        self.pipeline_staleness = pipeline_staleness
 
         self.estimator = None
 
@@ -57,6 +60,10 @@ class CoordinatedLinRModuleHost(HeteroModule):
         self.epochs = epochs
         self.estimator.epochs = epochs
 
+    def set_pipeline_staleness(self, pipeline_staleness):
+        self.pipeline_staleness = pipeline_staleness
+        self.estimator.pipeline_staleness = pipeline_staleness
+
     def fit(self, ctx: Context, train_data, validate_data=None) -> None:
         encryptor = ctx.arbiter("encryptor").get()
         if self.estimator is None:
@@ -76,6 +83,7 @@ class CoordinatedLinRModuleHost(HeteroModule):
                 learning_rate_scheduler=lr_scheduler,
                 init_param=self.init_param,
                 floating_point_precision=self.floating_point_precision,
+                pipeline_staleness=self.pipeline_staleness,
             )
             self.estimator = estimator
 
@@ -94,6 +102,7 @@ class CoordinatedLinRModuleHost(HeteroModule):
                 "init_param": self.init_param,
                 "optimizer_param": self.optimizer_param,
                 "floating_point_precision": self.floating_point_precision,
+                "pipeline_staleness": self.pipeline_staleness,
             },
         }
 
@@ -106,12 +115,14 @@ class CoordinatedLinRModuleHost(HeteroModule):
             batch_size=model["meta"]["batch_size"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=model["meta"].get("pipeline_staleness", 0),
         )
         estimator = CoordinatedLinREstimatorHost(
             epochs=model["meta"]["epochs"],
             batch_size=model["meta"]["batch_size"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=linr.pipeline_staleness,
         )
         estimator.restore(model["data"]["estimator"])
         linr.estimator = estimator
@@ -128,6 +139,7 @@ class CoordinatedLinREstimatorHost(HeteroModule):
         learning_rate_scheduler=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.optimizer = optimizer
@@ -136,6 +148,7 @@ class CoordinatedLinREstimatorHost(HeteroModule):
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
         self._fixpoint_precision = 2**floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
 
         self.w = None
         self.start_epoch = 0
@@ -143,39 +156,54 @@ class CoordinatedLinREstimatorHost(HeteroModule):
         self.is_converged = False
         self.header = None
 
-    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X):
+    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw_h = torch.matmul(X, w.detach())
-        batch_ctx.guest.put("Xw_h", encryptor.encrypt_tensor(Xw_h, obfuscate=True))
+        with timer.crypto():
+            Xw_h_enc = encryptor.encrypt_tensor(Xw_h, obfuscate=True)
+        batch_ctx.guest.put("Xw_h", Xw_h_enc)
         half_g = torch.matmul(X.T, Xw_h)
-        guest_half_d = batch_ctx.guest.get("half_d")
-        if self.floating_point_precision:
-            guest_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), guest_half_d)
-            guest_half_g = 1 / self._fixpoint_precision * guest_half_g
-        else:
-            guest_half_g = torch.matmul(X.T, guest_half_d)
+        with timer.wait():
+            guest_half_d = batch_ctx.guest.get("half_d")
+        with timer.crypto():
+            if self.floating_point_precision:
+                guest_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), guest_half_d)
+                guest_half_g = 1 / self._fixpoint_precision * guest_half_g
+            else:
+                guest_half_g = torch.matmul(X.T, guest_half_d)
 
-        batch_ctx.guest.put("Xw2_h", encryptor.encrypt_tensor(torch.matmul(Xw_h.T, Xw_h)))
+            batch_ctx.guest.put("Xw2_h", encryptor.encrypt_tensor(torch.matmul(Xw_h.T, Xw_h)))
         loss_norm = self.optimizer.loss_norm(w)
         if loss_norm is not None:
-            batch_ctx.guest.put("h_loss", encryptor.encrypt_tensor(loss_norm))
+            with timer.crypto():
+                h_loss_enc = encryptor.encrypt_tensor(loss_norm)
+            batch_ctx.guest.put("h_loss", h_loss_enc)
         else:
             batch_ctx.guest.put(h_loss=loss_norm)
 
-        g = 1 / h * (half_g + guest_half_g)
+        with timer.crypto():
+            g = 1 / h * (half_g + guest_half_g)
         return g
 
-    def centralized_compute_gradient(self, batch_ctx, encryptor, w, X):
+    def centralized_compute_gradient(self, batch_ctx, encryptor, w, X, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw_h = torch.matmul(X, w.detach())
-        batch_ctx.guest.put("Xw_h", encryptor.encrypt_tensor(Xw_h, obfuscate=True))
+        with timer.crypto():
+            Xw_h_enc = encryptor.encrypt_tensor(Xw_h, obfuscate=True)
+        batch_ctx.guest.put("Xw_h", Xw_h_enc)
 
-        d = batch_ctx.guest.get("d")
-        if self.floating_point_precision:
-            g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
-            g = 1 / (self._fixpoint_precision * h) * g
-        else:
-            g = 1 / h * torch.matmul(X.T, d)
+        with timer.wait():
+            d = batch_ctx.guest.get("d")
+        with timer.crypto():
+            if self.floating_point_precision:
+                g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
+                g = 1 / (self._fixpoint_precision * h) * g
+            else:
+                g = 1 / h * torch.matmul(X.T, d)
         return g
 
     def fit_model(self, ctx: Context, encryptor, train_data, validate_data=None) -> None:
@@ -191,21 +219,30 @@ class CoordinatedLinREstimatorHost(HeteroModule):
         # if self.end_epoch >= 0:
         #    self.start_epoch = self.end_epoch + 1
         is_centralized = len(ctx.hosts) > 1
+        # updates of the last `pipeline_staleness` batches may still be on the arbiter when the next batch starts
+        delayed_gradients = DelayedGradients(self.pipeline_staleness)
         for i, iter_ctx in ctx.on_iterations.ctxs_range(self.epochs):
             self.optimizer.set_iters(i)
             logger.info(f"self.optimizer set epoch {i}")
             for batch_ctx, batch_data in iter_ctx.on_batches.ctxs_zip(batch_loader):
+                timer = BatchTimer(enabled=self.pipeline_staleness > 0)
                 X = batch_data.x
                 if is_centralized:
-                    g = self.centralized_compute_gradient(batch_ctx, encryptor, w, X)
+                    g = self.centralized_compute_gradient(batch_ctx, encryptor, w, X, timer)
                 else:
-                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X)
+                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, timer)
                 g = self.optimizer.add_regular_to_grad(g, w, False)
                 batch_ctx.arbiter.put("g_enc", g)
-                g = batch_ctx.arbiter.get("g")
+                for ready_ctx in delayed_gradients.push(batch_ctx):
+                    with timer.wait():
+                        g = ready_ctx.arbiter.get("g")
+                    w = self.optimizer.update_weights(w, g, False, self.lr_scheduler.lr)
+                logger.info(f"w={w}")
+                timer.log(batch_ctx, "linr_batch_time")
 
+            for ready_ctx in delayed_gradients.drain():
+                g = ready_ctx.arbiter.get("g")
                 w = self.optimizer.update_weights(w, g, False, self.lr_scheduler.lr)
-                logger.info(f"w={w}")
             self.is_converged = iter_ctx.arbiter("converge_flag").get()
             if self.is_converged:
                 self.end_epoch = i
@@ -21,12 +21,13 @@ from fate.arch.dataframe import DataLoader
 from fate.ml.abc.module import HeteroModule
 from fate.ml.utils._convergence import converge_func_factory
 from fate.ml.utils._optimizer import LRScheduler, Optimizer, separate
+from fate.ml.utils._parallel import ctxs_parallel_map
 
 logger = logging.getLogger(__name__)
 
 
 class CoordinatedLRModuleArbiter(HeteroModule):
-    def __init__(self, epochs, early_stop, tol, batch_size, optimizer_param, learning_rate_param):
+    def __init__(self, epochs, early_stop, tol, batch_size, optimizer_param, learning_rate_param, ovr_max_workers=1):
         self.epochs = epochs
         self.batch_size = batch_size
         self.early_stop = early_stop
@@ -34,6 +35,8 @@ class CoordinatedLRModuleArbiter(HeteroModule):
         self.learning_rate_param = learning_rate_param
         self.optimizer_param = optimizer_param
         self.lr_param = learning_rate_param
+        # number of one-vs-rest classes trained concurrently, a runtime setting that is not saved in the model
+        self.ovr_max_workers = ovr_max_workers
 
         self.estimator = None
         self.ovr = False
@@ -67,7 +70,8 @@ class CoordinatedLRModuleArbiter(HeteroModule):
             if self.estimator is None:
                 self.estimator = {}
                 warm_start = False
-            for i, class_ctx in ctx.sub_ctx("class").ctxs_range(label_count):
+
+            def _fit_class(i, class_ctx):
                 if not warm_start:
                     optimizer = Optimizer(
                         self.optimizer_param["method"],
@@ -92,6 +96,13 @@ class CoordinatedLRModuleArbiter(HeteroModule):
                     single_estimator.epochs = self.epochs
                     single_estimator.batch_size = self.batch_size
                 single_estimator.fit_single_model(class_ctx, decryptor)
+                return single_estimator
+
+            # classes are independent, train them concurrently and let each one stop at its own convergence
+            estimators = ctxs_parallel_map(
+                _fit_class, ctx.sub_ctx("class").ctxs_range(label_count), max_workers=self.ovr_max_workers
+            )
+            for i, single_estimator in enumerate(estimators):
                 self.estimator[i] = single_estimator
         else:
             if self.estimator is None:
@@ -21,6 +21,7 @@ import torch
 from fate.arch import Context, dataframe
 from fate.ml.abc.module import HeteroModule
 from fate.ml.utils import predict_tools
+from fate.ml.utils._batch_pipeline import BatchTimer, DelayedGradients
 from fate.ml.utils._model_param import (
     check_overflow,
     deserialize_param,
@@ -28,6 +29,7 @@ from fate.ml.utils._model_param import (
     serialize_param,
 )
 from fate.ml.utils._optimizer import LRScheduler, Optimizer
+from fate.ml.utils._parallel import ctxs_parallel_map
 
 logger = logging.getLogger(__name__)
 
@@ -42,6 +44,8 @@ class CoordinatedLRModuleGuest(HeteroModule):
         init_param=None,
         threshold=0.5,
         floating_point_precision=23,
+        pipeline_staleness=0,
+        ovr_max_workers=1,
     ):
         self.epochs = epochs
         self.batch_size = batch_size
@@ -50,6 +54,9 @@ class CoordinatedLRModuleGuest(HeteroModule):
         self.init_param = init_param
         self.threshold = threshold
         self.floating_point_precision = floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
+        # number of one-vs-rest classes trained concurrently, a runtime setting that is not saved in the model
+        self.ovr_max_workers = ovr_max_workers
 
         self.estimator = None
         self.ovr = False
@@ -71,6 +78,14 @@ class CoordinatedLRModuleGuest(HeteroModule):
         else:
             self.estimator.epochs = epochs
 
+    def set_pipeline_staleness(self, pipeline_staleness):
+        self.pipeline_staleness = pipeline_staleness
+        if self.ovr:
+            for estimator in self.estimator.values():
+                estimator.pipeline_staleness = pipeline_staleness
+        else:
+            self.estimator.pipeline_staleness = pipeline_staleness
+
     def fit(self, ctx: Context, train_data, validate_data=None) -> None:
         # original_label = train_data.label
         train_data_binarized_label = train_data.label.get_dummies()
@@ -88,7 +103,8 @@ class CoordinatedLRModuleGuest(HeteroModule):
             if self.estimator is None:
                 self.estimator = {}
                 warm_start = False
-            for i, class_ctx in ctx.sub_ctx("class").ctxs_range(label_count):
+
+            def _fit_class(i, class_ctx):
                 logger.info(f"start train for {i}th class")
                 # optimizer = copy.deepcopy(self.optimizer)
                 if not warm_start:
@@ -108,6 +124,7 @@ class CoordinatedLRModuleGuest(HeteroModule):
                         learning_rate_scheduler=lr_scheduler,
                         init_param=self.init_param,
                         floating_point_precision=self.floating_point_precision,
+                        pipeline_staleness=self.pipeline_staleness,
                     )
                 else:
                     # warm start
@@ -116,12 +133,20 @@ class CoordinatedLRModuleGuest(HeteroModule):
                     single_estimator = self.estimator[i]
                     single_estimator.epochs = self.epochs
                     single_estimator.batch_size = self.batch_size
+                    single_estimator.pipeline_staleness = self.pipeline_staleness
                 class_train_data = train_data.copy()
                 class_validate_data = validate_data
                 if validate_data:
                     class_validate_data = validate_data.copy()
                 class_train_data.label = train_data_binarized_label[train_data_binarized_label.columns[i]]
                 single_estimator.fit_single_model(class_ctx, encryptor, class_train_data, class_validate_data)
+                return single_estimator
+
+            # classes are independent, train them concurrently and let each one stop at its own convergence
+            estimators = ctxs_parallel_map(
+                _fit_class, ctx.sub_ctx("class").ctxs_range(label_count), max_workers=self.ovr_max_workers
+            )
+            for i, single_estimator in enumerate(estimators):
                 self.estimator[i] = single_estimator
 
         else:
@@ -142,12 +167,14 @@ class CoordinatedLRModuleGuest(HeteroModule):
                     learning_rate_scheduler=lr_scheduler,
                     init_param=self.init_param,
                     floating_point_precision=self.floating_point_precision,
+                    pipeline_staleness=self.pipeline_staleness,
                 )
             else:
                 logger.info("estimator is not none, will train with warm start")
                 single_estimator = self.estimator
                 single_estimator.epochs = self.epochs
                 single_estimator.batch_size = self.batch_size
+                single_estimator.pipeline_staleness = self.pipeline_staleness
             train_data_fit = train_data.copy()
             validate_data_fit = validate_data
             if validate_data:
@@ -195,6 +222,7 @@ class CoordinatedLRModuleGuest(HeteroModule):
                 "ovr": self.ovr,
                 "threshold": self.threshold,
                 "floating_point_precision": self.floating_point_precision,
+                "pipeline_staleness": self.pipeline_staleness,
             },
         }
 
@@ -208,6 +236,7 @@ class CoordinatedLRModuleGuest(HeteroModule):
             threshold=model["meta"]["threshold"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=model["meta"].get("pipeline_staleness", 0),
         )
         lr.ovr = model["meta"]["ovr"]
         lr.labels = model["meta"]["labels"]
@@ -221,6 +250,7 @@ class CoordinatedLRModuleGuest(HeteroModule):
                     batch_size=model["meta"]["batch_size"],
                     init_param=model["meta"]["init_param"],
                     floating_point_precision=model["meta"]["floating_point_precision"],
+                    pipeline_staleness=lr.pipeline_staleness,
                 )
                 estimator.restore(d)
                 lr.estimator[int(label)] = estimator
@@ -230,6 +260,7 @@ class CoordinatedLRModuleGuest(HeteroModule):
                 batch_size=model["meta"]["batch_size"],
                 init_param=model["meta"]["init_param"],
                 floating_point_precision=model["meta"]["floating_point_precision"],
+                pipeline_staleness=lr.pipeline_staleness,
             )
             estimator.restore(all_estimator)
             lr.estimator = estimator
@@ -246,6 +277,7 @@ class CoordinatedLREstimatorGuest(HeteroModule):
         learning_rate_scheduler=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.batch_size = batch_size
@@ -254,6 +286,7 @@ class CoordinatedLREstimatorGuest(HeteroModule):
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
         self._fixpoint_precision = 2**floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
 
         self.w = None
         self.start_epoch = 0
@@ -261,25 +294,31 @@ class CoordinatedLREstimatorGuest(HeteroModule):
         self.is_converged = False
         self.header = None
 
-    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, Y, weight):
+    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, Y, weight, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         # logger.info(f"h: {h}")
         Xw = torch.matmul(X, w.detach())
         half_d = 0.25 * Xw - 0.5 * Y
         if weight:
             half_d = half_d * weight
-        batch_ctx.hosts.put("half_d", encryptor.encrypt_tensor(half_d, obfuscate=True))
+        with timer.crypto():
+            half_d_enc = encryptor.encrypt_tensor(half_d, obfuscate=True)
+        batch_ctx.hosts.put("half_d", half_d_enc)
         half_g = torch.matmul(X.T, half_d)
 
-        Xw_h = batch_ctx.hosts.get("Xw_h")[0]
-        if weight:
-            Xw_h = Xw_h * weight
+        with timer.wait():
+            Xw_h = batch_ctx.hosts.get("Xw_h")[0]
+        with timer.crypto():
+            if weight:
+                Xw_h = Xw_h * weight
 
-        if self.floating_point_precision:
-            host_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), Xw_h)
-            host_half_g = 1 / self._fixpoint_precision * host_half_g
-        else:
-            host_half_g = torch.matmul(X.T, Xw_h)
+            if self.floating_point_precision:
+                host_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), Xw_h)
+                host_half_g = 1 / self._fixpoint_precision * host_half_g
+            else:
+                host_half_g = torch.matmul(X.T, Xw_h)
 
         loss = np.log(2) - 1 + 0.125 / h * torch.matmul(Xw.T, Xw) - 2 / h * torch.matmul(half_d.T, Y)
 
@@ -287,42 +326,52 @@ class CoordinatedLREstimatorGuest(HeteroModule):
             loss_norm = self.optimizer.loss_norm(w)
             loss += loss_norm
 
-        loss += torch.matmul((1 / h * Xw).T, Xw_h) - torch.matmul((2 / h * Y).T, Xw_h)
+        with timer.crypto():
+            loss += torch.matmul((1 / h * Xw).T, Xw_h) - torch.matmul((2 / h * Y).T, Xw_h)
 
-        for Xw2_h in batch_ctx.hosts.get("Xw2_h"):
-            loss += 2 / h * Xw2_h
-        h_loss_list = batch_ctx.hosts.get("h_loss")
-        for h_loss in h_loss_list:
-            if h_loss is not None:
-                loss += h_loss
+        with timer.wait():
+            Xw2_h_list = batch_ctx.hosts.get("Xw2_h")
+            h_loss_list = batch_ctx.hosts.get("h_loss")
+        with timer.crypto():
+            for Xw2_h in Xw2_h_list:
+                loss += 2 / h * Xw2_h
+            for h_loss in h_loss_list:
+                if h_loss is not None:
+                    loss += h_loss
 
         batch_ctx.arbiter.put(loss=loss)
         # gradient
-        g = 1 / h * (half_g + host_half_g)
+        with timer.crypto():
+            g = 1 / h * (half_g + host_half_g)
         return g
 
-    def centralized_compute_gradient(self, batch_ctx, w, X, Y, weight):
+    def centralized_compute_gradient(self, batch_ctx, w, X, Y, weight, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         # logger.info(f"h: {h}")
         Xw = torch.matmul(X, w.detach())
         d = 0.25 * Xw - 0.5 * Y
 
-        Xw_h_all = batch_ctx.hosts.get("Xw_h")
+        with timer.wait():
+            Xw_h_all = batch_ctx.hosts.get("Xw_h")
 
-        for Xw_h in Xw_h_all:
-            d += Xw_h
+        with timer.crypto():
+            for Xw_h in Xw_h_all:
+                d += Xw_h
 
-        if weight:
-            # logger.info(f"weight: {weight.tolist()}")
-            d = d * weight
+            if weight:
+                # logger.info(f"weight: {weight.tolist()}")
+                d = d * weight
         batch_ctx.hosts.put("d", d)
 
         # gradient
-        if self.floating_point_precision:
-            g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
-            g = 1 / (h * self._fixpoint_precision) * g
-        else:
-            g = 1 / h * torch.matmul(X.T, d)
+        with timer.crypto():
+            if self.floating_point_precision:
+                g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
+                g = 1 / (h * self._fixpoint_precision) * g
+            else:
+                g = 1 / h * torch.matmul(X.T, d)
         return g
 
     def fit_single_model(self, ctx: Context, encryptor, train_data, validate_data=None):
@@ -356,25 +405,35 @@ class CoordinatedLREstimatorGuest(HeteroModule):
         #    self.start_epoch = self.end_epoch + 1
 
         is_centralized = len(ctx.hosts) > 1
+        # updates of the last `pipeline_staleness` batches may still be on the arbiter when the next batch starts
+        delayed_gradients = DelayedGradients(self.pipeline_staleness)
 
         for i, iter_ctx in ctx.on_iterations.ctxs_range(self.epochs):
             self.optimizer.set_iters(i)
             logger.info(f"self.optimizer set epoch {i}")
             for batch_ctx, batch_data in iter_ctx.on_batches.ctxs_zip(batch_loader):
+                timer = BatchTimer(enabled=self.pipeline_staleness > 0)
                 X = batch_data.x
                 Y = batch_data.label
                 weight = batch_data.weight
                 if is_centralized:
-                    g = self.centralized_compute_gradient(batch_ctx, w, X, Y, weight)
+                    g = self.centralized_compute_gradient(batch_ctx, w, X, Y, weight, timer)
                 else:
-                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, Y, weight)
+                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, Y, weight, timer)
 
                 g = self.optimizer.add_regular_to_grad(g, w, self.init_param.get("fit_intercept"))
                 batch_ctx.arbiter.put("g_enc", g)
-                g = batch_ctx.arbiter.get("g")
+                for ready_ctx in delayed_gradients.push(batch_ctx):
+                    with timer.wait():
+                        g = ready_ctx.arbiter.get("g")
+                    w = self.optimizer.update_weights(w, g, self.init_param.get("fit_intercept"), self.lr_scheduler.lr)
+                # logger.info(f"w={w}")
+                check_overflow(w)
+                timer.log(batch_ctx, "lr_batch_time")
 
+            for ready_ctx in delayed_gradients.drain():
+                g = ready_ctx.arbiter.get("g")
                 w = self.optimizer.update_weights(w, g, self.init_param.get("fit_intercept"), self.lr_scheduler.lr)
-                # logger.info(f"w={w}")
                 check_overflow(w)
 
             self.is_converged = iter_ctx.arbiter("converge_flag").get()
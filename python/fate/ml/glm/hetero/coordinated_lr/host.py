@@ -19,6 +19,7 @@ import torch
 from fate.arch import Context
 from fate.arch.dataframe import DataLoader
 from fate.ml.abc.module import HeteroModule
+from fate.ml.utils._batch_pipeline import BatchTimer, DelayedGradients
 from fate.ml.utils._model_param import (
     check_overflow,
     deserialize_param,
@@ -26,6 +27,7 @@ from fate.ml.utils._model_param import (
     serialize_param,
 )
 from fate.ml.utils._optimizer import LRScheduler, Optimizer
+from fate.ml.utils._parallel import ctxs_parallel_map
 
 logger = logging.getLogger(__name__)
 
@@ -39,6 +41,8 @@ class CoordinatedLRModuleHost(HeteroModule):
         learning_rate_param=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
+        ovr_max_workers=1,
     ):
         self.epochs = epochs
         self.learning_rate_param = learning_rate_param
@@ -46,6 +50,9 @@ class CoordinatedLRModuleHost(HeteroModule):
         self.batch_size = batch_size
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
+        # number of one-vs-rest classes trained concurrently, a runtime setting that is not saved in the model
+        self.ovr_max_workers = ovr_max_workers
 
         # host never has fit intercept
         self.init_param["fit_intercept"] = False
@@ -70,6 +77,14 @@ class CoordinatedLRModuleHost(HeteroModule):
         else:
             self.estimator.epochs = epochs
 
+    def set_pipeline_staleness(self, pipeline_staleness):
+        self.pipeline_staleness = pipeline_staleness
+        if self.ovr:
+            for estimator in self.estimator.values():
+                estimator.pipeline_staleness = pipeline_staleness
+        else:
+            self.estimator.pipeline_staleness = pipeline_staleness
+
     def fit(self, ctx: Context, train_data, validate_data=None) -> None:
         encryptor = ctx.arbiter("encryptor").get()
         label_count = ctx.guest("label_count").get()
@@ -80,7 +95,8 @@ class CoordinatedLRModuleHost(HeteroModule):
             if self.estimator is None:
                 self.estimator = {}
                 warm_start = False
-            for i, class_ctx in ctx.sub_ctx("class").ctxs_range(label_count):
+
+            def _fit_class(i, class_ctx):
                 # optimizer = copy.deepcopy(self.optimizer)
                 # lr_scheduler = copy.deepcopy(self.lr_scheduler)
                 if not warm_start:
@@ -100,13 +116,22 @@ class CoordinatedLRModuleHost(HeteroModule):
                         learning_rate_scheduler=lr_scheduler,
                         init_param=self.init_param,
                         floating_point_precision=self.floating_point_precision,
+                        pipeline_staleness=self.pipeline_staleness,
                     )
                 else:
                     logger.info("estimator is not none, will train with warm start")
                     single_estimator = self.estimator[i]
                     single_estimator.epochs = self.epochs
                     single_estimator.batch_size = self.batch_size
+                    single_estimator.pipeline_staleness = self.pipeline_staleness
                 single_estimator.fit_single_model(class_ctx, encryptor, train_data, validate_data)
+                return single_estimator
+
+            # classes are independent, train them concurrently and let each one stop at its own convergence
+            estimators = ctxs_parallel_map(
+                _fit_class, ctx.sub_ctx("class").ctxs_range(label_count), max_workers=self.ovr_max_workers
+            )
+            for i, single_estimator in enumerate(estimators):
                 self.estimator[i] = single_estimator
         else:
             if self.estimator is None:
@@ -126,12 +151,14 @@ class CoordinatedLRModuleHost(HeteroModule):
                     learning_rate_scheduler=lr_scheduler,
                     init_param=self.init_param,
                     floating_point_precision=self.floating_point_precision,
+                    pipeline_staleness=self.pipeline_staleness,
                 )
             else:
                 logger.info("estimator is not none, will train with warm start")
                 single_estimator = self.estimator
                 single_estimator.epochs = self.epochs
                 single_estimator.batch_size = self.batch_size
+                single_estimator.pipeline_staleness = self.pipeline_staleness
             single_estimator.fit_single_model(ctx, encryptor, train_data, validate_data)
             self.estimator = single_estimator
 
@@ -161,6 +188,7 @@ class CoordinatedLRModuleHost(HeteroModule):
                 "optimizer_param": self.optimizer_param,
                 "init_param": self.init_param,
                 "floating_point_precision": self.floating_point_precision,
+                "pipeline_staleness": self.pipeline_staleness,
             },
         }
 
@@ -173,6 +201,7 @@ class CoordinatedLRModuleHost(HeteroModule):
             optimizer_param=model["meta"]["optimizer_param"],
             init_param=model["meta"]["init_param"],
             floating_point_precision=model["meta"]["floating_point_precision"],
+            pipeline_staleness=model["meta"].get("pipeline_staleness", 0),
         )
         lr.label_count = model["meta"]["label_count"]
         lr.ovr = model["meta"]["ovr"]
@@ -188,6 +217,7 @@ class CoordinatedLRModuleHost(HeteroModule):
                     batch_size=model["meta"]["batch_size"],
                     init_param=model["meta"]["init_param"],
                     floating_point_precision=model["meta"]["floating_point_precision"],
+                    pipeline_staleness=lr.pipeline_staleness,
                 )
                 estimator.restore(d)
                 lr.estimator[int(label)] = estimator
@@ -197,6 +227,7 @@ class CoordinatedLRModuleHost(HeteroModule):
                 batch_size=model["meta"]["batch_size"],
                 init_param=model["meta"]["init_param"],
                 floating_point_precision=model["meta"]["floating_point_precision"],
+                pipeline_staleness=lr.pipeline_staleness,
             )
             estimator.restore(all_estimator)
             lr.estimator = estimator
@@ -214,6 +245,7 @@ class CoordinatedLREstimatorHost(HeteroModule):
         learning_rate_scheduler=None,
         init_param=None,
         floating_point_precision=23,
+        pipeline_staleness=0,
     ):
         self.epochs = epochs
         self.optimizer = optimizer
@@ -222,6 +254,7 @@ class CoordinatedLREstimatorHost(HeteroModule):
         self.init_param = init_param
         self.floating_point_precision = floating_point_precision
         self._fixpoint_precision = 2**floating_point_precision
+        self.pipeline_staleness = pipeline_staleness
 
         self.w = None
         self.start_epoch = 0
@@ -229,44 +262,61 @@ class CoordinatedLREstimatorHost(HeteroModule):
         self.is_converged = False
         self.header = None
 
-    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X):
+    def asynchronous_compute_gradient(self, batch_ctx, encryptor, w, X, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw_h = 0.25 * torch.matmul(X, w.detach())
-        batch_ctx.guest.put("Xw_h", encryptor.encrypt_tensor(Xw_h, obfuscate=True))
+        with timer.crypto():
+            Xw_h_enc = encryptor.encrypt_tensor(Xw_h, obfuscate=True)
+        batch_ctx.guest.put("Xw_h", Xw_h_enc)
 
         half_g = torch.matmul(X.T, Xw_h)
 
-        guest_half_d = batch_ctx.guest.get("half_d")
+        with timer.wait():
+            guest_half_d = batch_ctx.guest.get("half_d")
         logger.info(f"guest half d received")
-        if self.floating_point_precision:
-            guest_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), guest_half_d)
-            guest_half_g = 1 / self._fixpoint_precision * guest_half_g
-        else:
-            guest_half_g = torch.matmul(X.T, guest_half_d)
+        with timer.crypto():
+            if self.floating_point_precision:
+                guest_half_g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), guest_half_d)
+                guest_half_g = 1 / self._fixpoint_precision * guest_half_g
+            else:
+                guest_half_g = torch.matmul(X.T, guest_half_d)
         logger.info(f"guest half g obtained")
 
-        batch_ctx.guest.put("Xw2_h", encryptor.encrypt_tensor(torch.matmul(Xw_h.T, Xw_h)))
+        with timer.crypto():
+            Xw2_h_enc = encryptor.encrypt_tensor(torch.matmul(Xw_h.T, Xw_h))
+        batch_ctx.guest.put("Xw2_h", Xw2_h_enc)
         loss_norm = self.optimizer.loss_norm(w)
 
         if loss_norm is not None:
-            batch_ctx.guest.put("h_loss", encryptor.encrypt_tensor(loss_norm))
+            with timer.crypto():
+                h_loss_enc = encryptor.encrypt_tensor(loss_norm)
+            batch_ctx.guest.put("h_loss", h_loss_enc)
         else:
             batch_ctx.guest.put("h_loss", loss_norm)
 
-        g = 1 / h * (half_g + guest_half_g)
+        with timer.crypto():
+            g = 1 / h * (half_g + guest_half_g)
         return g
 
-    def centralized_compute_gradient(self, batch_ctx, encryptor, w, X):
+    def centralized_compute_gradient(self, batch_ctx, encryptor, w, X, timer: BatchTimer = None):
+        if timer is None:
+            timer = BatchTimer(enabled=False)
         h = X.shape[0]
         Xw_h = 0.25 * torch.matmul(X, w.detach())
-        batch_ctx.guest.put("Xw_h", encryptor.encrypt_tensor(Xw_h, obfuscate=True))
-
-        d = batch_ctx.guest.get("d")
-        if self.floating_point_precision:
-            g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
-            g = 1 / (h * self._fixpoint_precision) * g
-        else:
-            g = 1 / h * torch.matmul(X.T, d)
+        with timer.crypto():
+            Xw_h_enc = encryptor.encrypt_tensor(Xw_h, obfuscate=True)
+        batch_ctx.guest.put("Xw_h", Xw_h_enc)
+
+        with timer.wait():
+            d = batch_ctx.guest.get("d")
+        with timer.crypto():
+            if self.floating_point_precision:
+                g = torch.matmul(torch.encode_as_int_f(X.T, self.floating_point_precision), d)
+                g = 1 / (h * self._fixpoint_precision) * g
+            else:
+                g = 1 / h * torch.matmul(X.T, d)
         return g
 
     def fit_single_model(self, ctx: Context, encryptor, train_data, validate_data=None) -> None:
@@ -282,20 +332,30 @@ class CoordinatedLREstimatorHost(HeteroModule):
         # if self.end_epoch >= 0:
         #    self.start_epoch = self.end_epoch + 1
         is_centralized = len(ctx.hosts) > 1
+        # updates of the last `pipeline_staleness` batches may still be on the arbiter when the next batch starts
+        delayed_gradients = DelayedGradients(self.pipeline_staleness)
         for i, iter_ctx in ctx.on_iterations.ctxs_range(self.epochs):
             self.optimizer.set_iters(i)
             logger.info(f"self.optimizer set epoch{i}")
             for batch_ctx, batch_data in iter_ctx.on_batches.ctxs_zip(batch_loader):
+                timer = BatchTimer(enabled=self.pipeline_staleness > 0)
                 X = batch_data.x
                 if is_centralized:
-                    g = self.centralized_compute_gradient(batch_ctx, encryptor, w, X)
+                    g = self.centralized_compute_gradient(batch_ctx, encryptor, w, X, timer)
                 else:
-                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X)
+                    g = self.asynchronous_compute_gradient(batch_ctx, encryptor, w, X, timer)
 
                 g = self.optimizer.add_regular_to_grad(g, w, False)
                 batch_ctx.arbiter.put("g_enc", g)
-                g = batch_ctx.arbiter.get("g")
+                for ready_ctx in delayed_gradients.push(batch_ctx):
+                    with timer.wait():
+                        g = ready_ctx.arbiter.get("g")
+                    w = self.optimizer.update_weights(w, g, False, self.lr_scheduler.lr)
+                check_overflow(w)
+                timer.log(batch_ctx, "lr_batch_time")
 
+            for ready_ctx in delayed_gradients.drain():
+                g = ready_ctx.arbiter.get("g")
                 w = self.optimizer.update_weights(w, g, False, self.lr_scheduler.lr)
                 check_overflow(w)
 
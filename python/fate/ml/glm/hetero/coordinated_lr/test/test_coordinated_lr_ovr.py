@@ -0,0 +1,147 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import multiprocessing
+import uuid
+
+import numpy as np
+import pandas as pd
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.ml.glm.hetero.coordinated_lr import (
+    CoordinatedLRModuleArbiter,
+    CoordinatedLRModuleGuest,
+    CoordinatedLRModuleHost,
+)
+
+GUEST = ("guest", "10000")
+HOST = ("host", "9999")
+ARBITER = ("arbiter", "10000")
+SAMPLE_NUM = 60
+CLASS_NUM = 3
+EPOCHS = 2
+
+OPTIMIZER_PARAM = {"method": "sgd", "penalty": "l2", "alpha": 1.0, "optimizer_params": {"lr": 0.1, "weight_decay": 0}}
+LEARNING_RATE_PARAM = {"method": "constant", "scheduler_params": {"factor": 1.0}}
+
+
+def _make_data():
+    rng = np.random.default_rng(42)
+    label = np.arange(SAMPLE_NUM) % CLASS_NUM
+    features = rng.normal(size=(SAMPLE_NUM, 4)) + label[:, None]
+    guest = pd.DataFrame(features[:, :2], columns=["x0", "x1"])
+    guest["y"] = label
+    host = pd.DataFrame(features[:, 2:], columns=["x2", "x3"])
+    for df in [guest, host]:
+        df["sample_id"] = np.arange(SAMPLE_NUM)
+        df["id"] = df["sample_id"]
+    return guest, host
+
+
+def _fit(data_dir, federation_id, local, ovr_max_workers, result_queue):
+    try:
+        computing = CSession(data_dir=data_dir)
+        federation = StandaloneFederation(computing, federation_id, local, [GUEST, HOST, ARBITER])
+        ctx = Context(computing=computing, federation=federation)
+        sub_ctx = ctx.sub_ctx("train")
+        guest_df, host_df = _make_data()
+        if local == ARBITER:
+            module = CoordinatedLRModuleArbiter(
+                epochs=EPOCHS,
+                early_stop="diff",
+                tol=1e-4,
+                batch_size=None,
+                optimizer_param=OPTIMIZER_PARAM,
+                learning_rate_param=LEARNING_RATE_PARAM,
+                ovr_max_workers=ovr_max_workers,
+            )
+            module.fit(sub_ctx)
+        else:
+            init_param = {"method": "zeros", "fit_intercept": True}
+            if local == GUEST:
+                reader = PandasReader(sample_id_name="sample_id", match_id_name="id", label_name="y", dtype="float64")
+                module = CoordinatedLRModuleGuest(
+                    epochs=EPOCHS,
+                    batch_size=None,
+                    optimizer_param=OPTIMIZER_PARAM,
+                    learning_rate_param=LEARNING_RATE_PARAM,
+                    init_param=init_param,
+                    ovr_max_workers=ovr_max_workers,
+                )
+                module.fit(sub_ctx, reader.to_frame(ctx, guest_df))
+            else:
+                reader = PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64")
+                module = CoordinatedLRModuleHost(
+                    epochs=EPOCHS,
+                    batch_size=None,
+                    optimizer_param=OPTIMIZER_PARAM,
+                    learning_rate_param=LEARNING_RATE_PARAM,
+                    init_param=init_param,
+                    ovr_max_workers=ovr_max_workers,
+                )
+                module.fit(sub_ctx, reader.to_frame(ctx, host_df))
+        result_queue.put((local, module.get_model()))
+    except Exception as e:
+        result_queue.put((local, e))
+
+
+def _fit_parties(data_dir, ovr_max_workers):
+    # parties of the standalone federation run in their own processes
+    mp_ctx = multiprocessing.get_context("spawn")
+    result_queue = mp_ctx.Queue()
+    federation_id = uuid.uuid1().hex
+    processes = [
+        mp_ctx.Process(target=_fit, args=(data_dir, federation_id, local, ovr_max_workers, result_queue))
+        for local in [GUEST, HOST, ARBITER]
+    ]
+    for process in processes:
+        process.start()
+    models = {}
+    try:
+        # a failed party leaves the others waiting, so stop at the first error
+        while len(models) < len(processes):
+            local, model = result_queue.get(timeout=600)
+            if isinstance(model, Exception):
+                raise model
+            models[local] = model
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+    return models
+
+
+def _class_params(model):
+    params = []
+    for i in range(CLASS_NUM):
+        param = model["data"]["estimator"][i]["param"]
+        params.append(np.append(np.ravel(param["coef_"]), param["intercept_"] or 0.0))
+    return params
+
+
+def test_multi_class_concurrent_fit_matches_sequential(tmp_path):
+    sequential = _fit_parties(tmp_path.joinpath("sequential").as_posix(), 1)
+    concurrent = _fit_parties(tmp_path.joinpath("concurrent").as_posix(), CLASS_NUM)
+    for models in [sequential, concurrent]:
+        for local in [GUEST, HOST, ARBITER]:
+            assert models[local]["meta"]["ovr"]
+            assert sorted(models[local]["data"]["estimator"]) == list(range(CLASS_NUM))
+            # a runtime setting, not part of the model
+            assert "ovr_max_workers" not in models[local]["meta"]
+    for local in [GUEST, HOST]:
+        for expected, actual in zip(_class_params(sequential[local]), _class_params(concurrent[local])):
+            np.testing.assert_allclose(actual, expected, rtol=1e-6)
@@ -13,6 +13,8 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import hashlib
+import os
 import numpy as np
 import pandas as pd
 from fate.arch.dataframe import DataFrame
@@ -24,6 +26,11 @@ import torch as t
 logger = logging.getLogger(__name__)
 
 
+FEATURE_CACHE_FILE = "features.npy"
+LABEL_CACHE_FILE = "label.npy"
+ID_CACHE_FILE = "ids.pkl"
+
+
 class TableDataset(Dataset):
 
     """
@@ -40,6 +47,9 @@ class TableDataset(Dataset):
     flatten_label bool, whether to flatten label, if True, will flatten label to 1-d array
     to_tensor bool, whether to transform data to pytorch tensor, if True, will transform data to tensor
     return_dict bool, whether to return a dict in the format of {'x': xxx, 'label': xxx} if True, will return a dict, else will return a tuple
+    cache_dir str, if set, features and labels are saved as .npy files under this directory, keyed by the input and
+              the parsing parameters, and opened memory-mapped, so later loads skip parsing and DataLoader workers
+              share the pages instead of copying the arrays
     """
 
     def __init__(
@@ -53,6 +63,7 @@ class TableDataset(Dataset):
         flatten_label=False,
         to_tensor=True,
         return_dict=False,
+        cache_dir=None,
     ):
         super(TableDataset, self).__init__()
         self.features: np.ndarray = None
@@ -72,6 +83,10 @@ class TableDataset(Dataset):
             )
         self.label_shape = label_shape
         self.flatten_label = flatten_label
+        self.cache_dir = cache_dir
+        self._cache_path = None
+        # tensors sharing memory with features and label, built on first access
+        self._tensors = None
 
         # sample ids, match ids
         self.sample_ids = None
@@ -97,30 +112,128 @@ class TableDataset(Dataset):
                 return np.float64
         return dtype
 
-    def __getitem__(self, item):
-        if self.label is not None:
-            feat = self.features[item]
-            label = self.label[item]
-            if self.to_tensor:
-                feat = t.tensor(feat)
-                label = t.tensor(label)
+    def _get_tensors(self):
+        if self._tensors is None:
+            label = None if self.label is None else t.from_numpy(self.label)
+            self._tensors = t.from_numpy(self.features), label
+        return self._tensors
+
+    def _make_item(self, feat, label):
+        if label is not None:
             if self.return_dict:
                 return {"x": feat, "label": label}
             else:
                 return feat, label
         else:
-            feat = self.features[item]
-            if self.to_tensor:
-                feat = t.tensor(feat)
             if self.return_dict:
                 return {"x": feat}
             else:
                 return feat
 
+    def __getitem__(self, item):
+        """
+        tensors are copies, so that in-place transforms of a sample leave the dataset unchanged
+        """
+        if self.to_tensor:
+            features, label = self._get_tensors()
+            return self._make_item(features[item].clone(), None if label is None else label[item].clone())
+        return self._make_item(self.features[item], None if self.label is None else self.label[item])
+
+    def __getitems__(self, indices):
+        """
+        gather the rows of a batch once per array, samples are views of the gathered rows so that collating them is
+        a single copy. the gathered rows are already a copy, so in-place transforms do not change the dataset either
+        """
+        if self.to_tensor:
+            features, label = self._get_tensors()
+            index = t.as_tensor(indices, dtype=t.long)
+            feats = features[index].unbind(0)
+            labels = [None] * len(feats) if label is None else label[index].unbind(0)
+        else:
+            index = np.asarray(indices, dtype=np.int64)
+            feats = list(self.features[index])
+            labels = [None] * len(feats) if self.label is None else list(self.label[index])
+        return [self._make_item(feat, label) for feat, label in zip(feats, labels)]
+
     def __len__(self):
         return len(self.features)
 
-    def load(self, data_or_path):
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state["_tensors"] = None
+        if self._cache_path is not None:
+            # a worker reopens the memory-mapped cache instead of receiving a copy of the arrays
+            state["features"] = None
+            state["label"] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        if self._cache_path is not None:
+            self._open_cache(self._cache_path)
+
+    def _get_cache_path(self, data_or_path, cache_key=None):
+        if cache_key is not None:
+            source = ("key", cache_key)
+        elif isinstance(data_or_path, str):
+            stat = os.stat(data_or_path)
+            source = ("csv", os.path.abspath(data_or_path), stat.st_size, stat.st_mtime_ns)
+        else:
+            logger.info("no cache key is given for the input dataframe, features will not be cached")
+            return None
+        params = (
+            self.label_col,
+            self.match_id_col,
+            self.sample_id_col,
+            str(self.f_dtype),
+            str(self.l_dtype),
+            self.label_shape,
+            self.flatten_label,
+        )
+        key = hashlib.sha1(repr((source, params)).encode("utf-8")).hexdigest()
+        return os.path.join(self.cache_dir, key)
+
+    def _open_cache(self, cache_path):
+        # copy-on-write mapping, pages are shared between processes until written, and tensors can be built on it
+        self.features = np.load(os.path.join(cache_path, FEATURE_CACHE_FILE), mmap_mode="c")
+        label_path = os.path.join(cache_path, LABEL_CACHE_FILE)
+        self.label = np.load(label_path, mmap_mode="c") if os.path.exists(label_path) else None
+        self._tensors = None
+
+    def _save_cache(self, cache_path):
+        os.makedirs(cache_path, exist_ok=True)
+        pd.to_pickle((self.sample_ids, self.match_ids), os.path.join(cache_path, ID_CACHE_FILE))
+        if self.label is not None:
+            np.save(os.path.join(cache_path, LABEL_CACHE_FILE), self.label)
+        # features are written last and moved in place, the cache is complete once they exist
+        tmp_path = os.path.join(cache_path, f"{os.getpid()}.{FEATURE_CACHE_FILE}")
+        np.save(tmp_path, self.features)
+        os.replace(tmp_path, os.path.join(cache_path, FEATURE_CACHE_FILE))
+
+    def load(self, data_or_path, cache_key=None):
+        """
+        cache_key identifies the input in the cache, such as the uri of the input artifact, csv paths are keyed by
+        their path, size and modification time when it is None, dataframes are not cached without it
+        """
+        self._cache_path = None
+        cache_path = None if self.cache_dir is None else self._get_cache_path(data_or_path, cache_key)
+        if cache_path is not None and os.path.exists(os.path.join(cache_path, FEATURE_CACHE_FILE)):
+            logger.info("load features from cache {}".format(cache_path))
+            self.sample_ids, self.match_ids = pd.read_pickle(os.path.join(cache_path, ID_CACHE_FILE))
+            self._open_cache(cache_path)
+            self._cache_path = cache_path
+            return
+
+        self._load_arrays(data_or_path)
+        if cache_path is not None:
+            if self.features.dtype == object or (self.label is not None and self.label.dtype == object):
+                logger.info("object dtype features or label can not be memory-mapped, features will not be cached")
+            else:
+                self._save_cache(cache_path)
+                self._open_cache(cache_path)
+                self._cache_path = cache_path
+
+    def _load_arrays(self, data_or_path):
         if isinstance(data_or_path, str):
             self.origin_table = pd.read_csv(data_or_path)
             # if is FATE DTable, collect data and transform to array format
@@ -210,8 +323,11 @@ class TableDataset(Dataset):
         else:
             self.label = None
 
-        if self.f_dtype:
-            self.features = self.features.astype(self.f_dtype)
+        # rows of a c-contiguous array are contiguous, so a batch is gathered with one copy per row
+        self.features = np.ascontiguousarray(self.features, dtype=self.f_dtype if self.f_dtype else None)
+        if self.label is not None:
+            self.label = np.ascontiguousarray(self.label)
+        self._tensors = None
 
     def get_classes(self):
         if self.label is not None:
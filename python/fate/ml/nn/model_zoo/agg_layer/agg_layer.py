@@ -13,10 +13,12 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
+import time
 import torch
 from typing import List, Literal
 import torch as t
 from fate.arch import Context
+from fate.ml.nn.model_zoo.agg_layer.compression import BW_COMPRESSION, FW_COMPRESSION, get_compressor, restore_tensor
 from torch.nn.modules.module import T
 
 MERGE_TYPE = ["sum", "concat"]
@@ -27,8 +29,24 @@ def backward_loss(z, backward_error):
 
 
 class _AggLayerBase(t.nn.Module):
-    def __init__(self):
+    """
+    fw_compression is applied by hosts to the bottom outputs they send, bw_compression by the guest to the errors
+    it sends back, the receiver restores any payload without being configured
+    """
+
+    def __init__(
+        self,
+        fw_compression: Literal[None, "fp16", "bf16", "int8"] = None,
+        bw_compression: Literal[None, "fp16", "bf16", "int8", "topk"] = None,
+        topk_ratio: float = 0.01,
+    ):
         super().__init__()
+        assert fw_compression in FW_COMPRESSION, f"fw compression should be one of {FW_COMPRESSION}"
+        assert bw_compression in BW_COMPRESSION, f"bw compression should be one of {BW_COMPRESSION}"
+        self._fw_compression = fw_compression
+        self._bw_compression = bw_compression
+        self._topk_ratio = topk_ratio
+        self._compressors = {}
         self._ctx = None
         self._fw_suffix = "agglayer_fw_{}"
         self._bw_suffix = "agglayer_bw_{}"
@@ -69,6 +87,22 @@ class _AggLayerBase(t.nn.Module):
     def _clear_state(self):
         pass
 
+    def _compress(self, x: t.Tensor, compression, dst, tag, step):
+        """
+        compress x for one destination and log the compression ratio and time of the step,
+        without compression the numpy array is sent as before
+        """
+        if compression is None:
+            return x.detach().cpu().numpy()
+
+        if compression not in self._compressors:
+            self._compressors[compression] = get_compressor(compression, self._topk_ratio)
+        start = time.perf_counter()
+        payload = self._compressors[compression].compress(x)
+        stats = {"ratio": x.numel() * x.element_size() / payload.nbytes(), "time": time.perf_counter() - start}
+        self.ctx.sub_ctx(tag).indexed_ctx(step).metrics.log_metrics(stats, name=f"{tag}_{dst}", type="compression")
+        return payload
+
     def __call__(self, *args, **kwargs):
         return self.forward(*args, **kwargs)
 
@@ -82,8 +116,15 @@ class _AggLayerBase(t.nn.Module):
 
 
 class AggLayerGuest(_AggLayerBase):
-    def __init__(self, merge_type: Literal["sum", "concat"] = "sum", concat_dim=1):
-        super(AggLayerGuest, self).__init__()
+    def __init__(
+        self,
+        merge_type: Literal["sum", "concat"] = "sum",
+        concat_dim=1,
+        fw_compression: Literal[None, "fp16", "bf16", "int8"] = None,
+        bw_compression: Literal[None, "fp16", "bf16", "int8", "topk"] = None,
+        topk_ratio: float = 0.01,
+    ):
+        super(AggLayerGuest, self).__init__(fw_compression, bw_compression, topk_ratio)
         self._host_input_caches = None
         self._merge_type = merge_type
         assert self._merge_type in MERGE_TYPE, f"merge type should be one of {MERGE_TYPE}"
@@ -136,7 +177,13 @@ class AggLayerGuest(_AggLayerBase):
         host_errors = ret_error
         idx = 0
         for host in self.ctx.hosts:
-            host.put(self._bw_suffix.format(self._bw_count), host_errors[idx])
+            if self._bw_compression is None:
+                error = host_errors[idx]
+            else:
+                error = self._compress(
+                    host_errors[idx], self._bw_compression, f"host_{idx}", "agglayer_bw_compression", self._bw_count
+                )
+            host.put(self._bw_suffix.format(self._bw_count), error)
             idx += 1
         self._bw_count += 1
 
@@ -146,7 +193,7 @@ class AggLayerGuest(_AggLayerBase):
                 self._host_input_caches = []
                 host_x = self._get_fw_from_host()
                 for h in range(len(host_x)):
-                    host_input_cache = t.from_numpy(host_x[h]).requires_grad_(True)
+                    host_input_cache = restore_tensor(host_x[h]).requires_grad_(True)
                     self._host_input_caches.append(host_input_cache)
             else:
                 self._host_input_caches = None
@@ -173,24 +220,30 @@ class AggLayerGuest(_AggLayerBase):
         if self._has_ctx:
             host_x = self.ctx.hosts.get(self._pred_suffix.format(self._pred_count))
             self._pred_count += 1
-            host_x = [t.from_numpy(h) for h in host_x]
+            host_x = [restore_tensor(h) for h in host_x]
         with torch.no_grad():
             out = self._forward(x, host_x)
             return out
 
 
 class AggLayerHost(_AggLayerBase):
-    def __init__(self):
-        super(AggLayerHost, self).__init__()
+    def __init__(
+        self,
+        fw_compression: Literal[None, "fp16", "bf16", "int8"] = None,
+        bw_compression: Literal[None, "fp16", "bf16", "int8", "topk"] = None,
+        topk_ratio: float = 0.01,
+    ):
+        super(AggLayerHost, self).__init__(fw_compression, bw_compression, topk_ratio)
         self._out_cache = None
         self._input_cache = None
 
     def _send_fw_to_guest(self, x):
+        x = self._compress(x, self._fw_compression, "guest", "agglayer_fw_compression", self._fw_count)
         self.ctx.guest.put(self._fw_suffix.format(self._fw_count), x)
         self._fw_count += 1
 
     def _get_error_from_guest(self):
-        error = self.ctx.guest.get(self._bw_suffix.format(self._bw_count))
+        error = restore_tensor(self.ctx.guest.get(self._bw_suffix.format(self._bw_count)))
         self._bw_count += 1
         return error
 
@@ -206,7 +259,7 @@ class AggLayerHost(_AggLayerBase):
                 self._out_cache = out_
             else:
                 out_ = x
-            self._send_fw_to_guest(out_.detach().cpu().numpy())
+            self._send_fw_to_guest(out_)
         else:
             self.predict(x)
 
@@ -228,5 +281,6 @@ class AggLayerHost(_AggLayerBase):
                 out_ = self._model(x)
             else:
                 out_ = x
-            self.ctx.guest.put(self._pred_suffix.format(self._pred_count), out_.detach().cpu().numpy())
+            out_ = self._compress(out_, self._fw_compression, "guest", "agglayer_pred_compression", self._pred_count)
+            self.ctx.guest.put(self._pred_suffix.format(self._pred_count), out_)
             self._pred_count += 1
@@ -0,0 +1,178 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import torch as t
+from typing import Literal, Optional
+
+FW_COMPRESSION = [None, "fp16", "bf16", "int8"]
+BW_COMPRESSION = [None, "fp16", "bf16", "int8", "topk"]
+
+
+def _dtype_name(dtype: t.dtype):
+    return str(dtype).replace("torch.", "")
+
+
+def _nbytes(x: t.Tensor):
+    return x.numel() * x.element_size()
+
+
+"""
+Payloads
+"""
+
+
+class CompressedTensor(object):
+    """
+    sent in place of a full precision tensor, the receiver restores it with decompress and does not need to know
+    how it was compressed
+    """
+
+    def decompress(self) -> t.Tensor:
+        raise NotImplementedError()
+
+    def nbytes(self) -> int:
+        raise NotImplementedError()
+
+
+class CastTensor(CompressedTensor):
+    def __init__(self, data: t.Tensor, dtype: str):
+        self.data = data
+        self.dtype = dtype
+
+    def decompress(self):
+        return self.data.to(getattr(t, self.dtype))
+
+    def nbytes(self):
+        return _nbytes(self.data)
+
+
+class Int8Tensor(CompressedTensor):
+    """
+    int8 values with one float32 scale per channel, channels are on dim 1
+    """
+
+    def __init__(self, data: t.Tensor, scale: t.Tensor, dtype: str):
+        self.data = data
+        self.scale = scale
+        self.dtype = dtype
+
+    def decompress(self):
+        shape = [1] * self.data.dim()
+        if self.data.dim() > 1:
+            shape[1] = -1
+        return self.data.to(getattr(t, self.dtype)) * self.scale.to(getattr(t, self.dtype)).view(shape)
+
+    def nbytes(self):
+        return _nbytes(self.data) + _nbytes(self.scale)
+
+
+class SparseTensor(CompressedTensor):
+    """
+    the largest magnitude entries of a tensor and their flat indices, the other entries are zero
+    """
+
+    def __init__(self, indices: t.Tensor, values: t.Tensor, shape: tuple, dtype: str):
+        self.indices = indices
+        self.values = values
+        self.shape = shape
+        self.dtype = dtype
+
+    def decompress(self):
+        dtype = getattr(t, self.dtype)
+        out = t.zeros(int(np.prod(self.shape)), dtype=dtype)
+        out[self.indices.long()] = self.values.to(dtype)
+        return out.view(self.shape)
+
+    def nbytes(self):
+        return _nbytes(self.indices) + _nbytes(self.values)
+
+
+def restore_tensor(payload) -> t.Tensor:
+    """
+    tensor from a payload sent by the peer, which is a compressed tensor, a numpy array or a tensor
+    """
+    if isinstance(payload, CompressedTensor):
+        return payload.decompress()
+    elif isinstance(payload, np.ndarray):
+        return t.from_numpy(payload)
+    return payload
+
+
+"""
+Compressors
+"""
+
+
+class TensorCompressor(object):
+    """
+    stateless, agg layers exchange per-sample activations and errors, so nothing dropped from one batch
+    can be carried over to the next
+    """
+
+    def _encode(self, x: t.Tensor) -> CompressedTensor:
+        raise NotImplementedError()
+
+    def compress(self, x: t.Tensor) -> CompressedTensor:
+        return self._encode(x.detach().cpu())
+
+
+class CastCompressor(TensorCompressor):
+    def __init__(self, dtype: Literal["fp16", "bf16"]):
+        self.cast_dtype = t.float16 if dtype == "fp16" else t.bfloat16
+
+    def _encode(self, x):
+        return CastTensor(x.to(self.cast_dtype), _dtype_name(x.dtype))
+
+
+class Int8Compressor(TensorCompressor):
+    def _encode(self, x):
+        if x.dim() > 1:
+            amax = x.transpose(0, 1).reshape(x.shape[1], -1).abs().amax(dim=1)
+            shape = [1] * x.dim()
+            shape[1] = -1
+        else:
+            amax = x.abs().amax().reshape(1)
+            shape = [1]
+        scale = (amax / 127).float()
+        scale[scale == 0] = 1.0
+        data = t.round(x / scale.to(x.dtype).view(shape)).clamp(-127, 127).to(t.int8)
+        return Int8Tensor(data, scale, _dtype_name(x.dtype))
+
+
+class TopKCompressor(TensorCompressor):
+    def __init__(self, ratio=0.01):
+        assert 0 < ratio <= 1, "top-k ratio should be in (0, 1], but got {}".format(ratio)
+        self.ratio = ratio
+
+    def _encode(self, x):
+        flat = x.flatten()
+        k = max(1, int(flat.numel() * self.ratio))
+        indices = flat.abs().topk(k, sorted=False).indices
+        index_dtype = t.int32 if flat.numel() < 2**31 else t.int64
+        return SparseTensor(indices.to(index_dtype), flat[indices], tuple(x.shape), _dtype_name(x.dtype))
+
+
+def get_compressor(compression: Optional[str], topk_ratio=0.01) -> Optional[TensorCompressor]:
+    if compression is None:
+        return None
+    elif compression in ["fp16", "bf16"]:
+        return CastCompressor(compression)
+    elif compression == "int8":
+        return Int8Compressor()
+    elif compression == "topk":
+        return TopKCompressor(ratio=topk_ratio)
+    else:
+        raise ValueError("unknown compression {}, available: {}".format(compression, BW_COMPRESSION))
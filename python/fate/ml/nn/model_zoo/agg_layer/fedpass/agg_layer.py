@@ -13,7 +13,7 @@
 #  See the License for the specific language governing permissions and
 #  limitations under the License.
 
-from typing import Union, Literal, Tuple
+from typing import Union, Literal, Tuple, Optional
 from fate.ml.nn.model_zoo.agg_layer.agg_layer import AggLayerHost, AggLayerGuest
 from fate.ml.nn.model_zoo.agg_layer.fedpass._passport_block import ConvPassportBlock, LinearPassportBlock
 
@@ -103,9 +103,11 @@ class FedPassAggLayerGuest(AggLayerGuest):
         ae_out=None,
         merge_type: Literal["sum", "concat"] = "sum",
         concat_dim=1,
-        **kwargs,
+        fw_compression: Optional[str] = None,
+        bw_compression: Optional[str] = None,
+        topk_ratio: float = 0.01,
     ):
-        super().__init__(merge_type, concat_dim)
+        super().__init__(merge_type, concat_dim, fw_compression, bw_compression, topk_ratio)
 
         model = get_model(
             layer_type=layer_type,
@@ -152,9 +154,11 @@ class FedPassAggLayerHost(AggLayerHost):
         num_passport=1,
         ae_in=None,
         ae_out=None,
-        **kwargs,
+        fw_compression: Optional[str] = None,
+        bw_compression: Optional[str] = None,
+        topk_ratio: float = 0.01,
     ):
-        super(FedPassAggLayerHost, self).__init__()
+        super(FedPassAggLayerHost, self).__init__(fw_compression, bw_compression, topk_ratio)
 
         model = get_model(
             layer_type=layer_type,
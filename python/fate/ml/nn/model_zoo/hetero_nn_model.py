@@ -49,14 +49,32 @@ class Args(object):
 
 @dataclass
 class StdAggLayerArgument(Args):
+    """
+    fw_compression compresses the bottom outputs hosts send to the guest, bw_compression the errors the guest sends
+    back: fp16/bf16 casting, per-channel int8 quantization, or keeping the topk_ratio largest entries of errors.
+    compression ratio and time of every step are logged as metrics
+    """
+
     merge_type: Literal["sum", "concat"] = "sum"
     concat_dim = 1
+    fw_compression: Literal[None, "fp16", "bf16", "int8"] = None
+    bw_compression: Literal[None, "fp16", "bf16", "int8", "topk"] = None
+    topk_ratio: float = 0.01
 
     def to_dict(self):
         d = super().to_dict()
         d["agg_type"] = "std"
         return d
 
+    def to_layer_dict(self, role: Literal["guest", "host"]):
+        """
+        init arguments of the agg layer of role, only the guest merges
+        """
+        d = Args.to_dict(self)
+        if role == "host":
+            d.pop("merge_type")
+        return d
+
 
 @dataclass
 class FedPassArgument(StdAggLayerArgument):
@@ -234,9 +252,9 @@ class HeteroNNModelGuest(HeteroNNModelBase):
             if agglayer_arg is None:
                 self._agg_layer = AggLayerGuest()
             elif type(agglayer_arg) == StdAggLayerArgument:
-                self._agg_layer = AggLayerGuest(**agglayer_arg.to_dict())
+                self._agg_layer = AggLayerGuest(**agglayer_arg.to_layer_dict("guest"))
             elif type(agglayer_arg) == FedPassArgument:
-                self._agg_layer = FedPassAggLayerGuest(**agglayer_arg.to_dict())
+                self._agg_layer = FedPassAggLayerGuest(**agglayer_arg.to_layer_dict("guest"))
             elif type(agglayer_arg) == SSHEArgument:
                 self._agg_layer = SSHEAggLayerGuest(**agglayer_arg.to_dict())
                 if self._bottom_model is None:
@@ -366,9 +384,9 @@ class HeteroNNModelHost(HeteroNNModelBase):
             if agglayer_arg is None:
                 self._agg_layer = AggLayerHost()
             elif type(agglayer_arg) == StdAggLayerArgument:
-                self._agg_layer = AggLayerHost()  # no parameters are needed
+                self._agg_layer = AggLayerHost(**agglayer_arg.to_layer_dict("host"))
             elif type(agglayer_arg) == FedPassArgument:
-                self._agg_layer = FedPassAggLayerHost(**agglayer_arg.to_dict())
+                self._agg_layer = FedPassAggLayerHost(**agglayer_arg.to_layer_dict("host"))
             elif isinstance(agglayer_arg, SSHEArgument):
                 self._agg_layer = SSHEAggLayerHost(**agglayer_arg.to_dict())
 
@@ -0,0 +1,60 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import pickle
+
+import pytest
+import torch as t
+from fate.ml.nn.model_zoo.agg_layer.agg_layer import AggLayerGuest, AggLayerHost
+from fate.ml.nn.model_zoo.agg_layer.compression import get_compressor, restore_tensor
+from fate.ml.nn.model_zoo.hetero_nn_model import StdAggLayerArgument
+
+
+@pytest.mark.parametrize("compression", ["fp16", "bf16", "int8", "topk"])
+def test_compression_round_trip(compression):
+    x = t.randn(64, 32) * t.linspace(0.01, 10, 32)
+    payload = pickle.loads(pickle.dumps(get_compressor(compression, topk_ratio=0.1).compress(x)))
+    restored = restore_tensor(payload)
+    assert restored.shape == x.shape and restored.dtype == x.dtype
+    assert payload.nbytes() < x.numel() * x.element_size()
+    if compression == "int8":
+        # per-channel scales bound the error of every channel by half of its quantization step
+        step = x.abs().amax(dim=0) / 127
+        assert (restored - x).abs().le(step / 2 + 1e-6).all()
+    elif compression == "topk":
+        assert (restored != 0).sum() == int(x.numel() * 0.1)
+    else:
+        assert t.allclose(restored, x, rtol=1e-2, atol=1e-2)
+
+
+def test_compression_does_not_depend_on_previous_batches():
+    compressor = get_compressor("topk", topk_ratio=0.1)
+    x = t.randn(16, 8)
+    compressor.compress(t.randn(16, 8))
+    assert t.equal(restore_tensor(compressor.compress(x)), restore_tensor(get_compressor("topk", 0.1).compress(x)))
+
+
+@pytest.mark.parametrize("layer", [AggLayerGuest, AggLayerHost])
+def test_unknown_layer_option_is_rejected(layer):
+    with pytest.raises(TypeError):
+        layer(fw_compresion="fp16")
+
+
+def test_layer_args_of_argument():
+    arg = StdAggLayerArgument(merge_type="concat", fw_compression="int8", bw_compression="topk", topk_ratio=0.05)
+    assert AggLayerGuest(**arg.to_layer_dict("guest"))._merge_type == "concat"
+    assert AggLayerHost(**arg.to_layer_dict("host"))._bw_compression == "topk"
+    with pytest.raises(TypeError):
+        StdAggLayerArgument(error_feedback=True)
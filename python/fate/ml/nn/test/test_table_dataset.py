@@ -0,0 +1,78 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+from fate.components.components.nn.loader import DatasetLoader
+from fate.components.components.nn.runner.homo_default_runner import DefaultRunner
+from fate.ml.nn.dataset.table import TableDataset
+
+GUEST = ("guest", "10000")
+SAMPLE_NUM = 50
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def frame(ctx):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(rng.random((SAMPLE_NUM, 3)), columns=["x0", "x1", "x2"])
+    df["y"] = rng.integers(0, 2, SAMPLE_NUM)
+    df["sample_id"] = np.arange(SAMPLE_NUM)
+    df["id"] = df["sample_id"]
+    return PandasReader(sample_id_name="sample_id", match_id_name="id", label_name="y", dtype="float32").to_frame(
+        ctx, df
+    )
+
+
+def test_getitem_returns_copies(frame):
+    dataset = TableDataset()
+    dataset.load(frame)
+    expected_x, expected_y = (t.clone() for t in dataset[3])
+    x, y = dataset[3]
+    x += 1
+    y += 1
+    np.testing.assert_array_equal(dataset[3][0].numpy(), expected_x.numpy())
+    np.testing.assert_array_equal(dataset[3][1].numpy(), expected_y.numpy())
+
+    x, y = dataset.__getitems__([3])[0]
+    x += 1
+    np.testing.assert_array_equal(dataset[3][0].numpy(), expected_x.numpy())
+
+
+def test_runner_caches_dataframes_by_artifact_uri(frame, tmp_path):
+    dataset_conf = DatasetLoader("table", "TableDataset", cache_dir=str(tmp_path)).to_dict()
+    runner = DefaultRunner(dataset_conf=dataset_conf)
+    runner.set_input_uri(frame, "file:///artifacts/train_data")
+    dataset = runner._prepare_data(frame, "train_data")
+    assert dataset._cache_path is not None and os.path.dirname(dataset._cache_path) == str(tmp_path)
+
+    # a frame of another artifact is cached apart, a frame without uri is not cached
+    other = DefaultRunner(dataset_conf=dataset_conf)
+    other.set_input_uri(frame, "file:///artifacts/validate_data")
+    assert other._prepare_data(frame, "val_data")._cache_path not in (None, dataset._cache_path)
+    assert DefaultRunner(dataset_conf=dataset_conf)._prepare_data(frame, "train_data")._cache_path is None
@@ -87,23 +87,24 @@ class PearsonCorrelation(Module):
 
     @staticmethod
     def vif_from_pearson_matrix(pearson_matrix, threshold=1e-8):
+        """
+        vif of feature i is det(R_-i) / det(R), the i-th diagonal element of the inverse of pearson matrix R.
+
+        computed from one eigendecomposition R = V diag(eig) V^T as sum_k V_ik^2 / eig_k, eigenvalues below
+        threshold are dropped as in a pseudo-inverse so that near-singular matrices still give finite vif.
+        """
         logger.info(f"local vif calc: start")
         assert not torch.isnan(pearson_matrix).any(), f"should not contains nan: {pearson_matrix}"
-        N = pearson_matrix.shape[0]
-        vif = []
-        logger.info(f"local vif calc: calc matrix eigvals")
-        eig, _ = torch.sort(torch.abs(torch.linalg.eigvalsh(pearson_matrix)))
-        num_drop = torch.sum(eig < threshold).item()
-        det_non_zero = torch.prod(eig[num_drop:])
-        logger.info(f"local vif calc: calc submatrix eigvals")
-        for i in range(N):
-            indexes = [j for j in range(N) if j != i]
-            cofactor_matrix = pearson_matrix[indexes][:, indexes]
-            cofactor_eig, _ = torch.sort(torch.abs(torch.linalg.eigvalsh(cofactor_matrix)))
-            vif.append(torch.prod(cofactor_eig[num_drop:]) / det_non_zero)
-            logger.info(f"local vif calc: submatrix {i + 1}/{N} eig is {vif[-1]}")
+        logger.info(f"local vif calc: calc matrix eigen decomposition")
+        eig, eig_vec = torch.linalg.eigh(pearson_matrix)
+        eig = torch.abs(eig)
+        keep = eig >= threshold
+        num_drop = torch.sum(~keep).item()
+        if num_drop:
+            logger.info(f"local vif calc: {num_drop} eigvals < {threshold} dropped")
+        vif = torch.sum(eig_vec[:, keep] ** 2 / eig[keep], dim=1)
         logger.info(f"local vif calc done")
-        return vif
+        return list(vif)
 
     """@staticmethod
     def fix_vif(remainds_vif, remainds_indexes, size):
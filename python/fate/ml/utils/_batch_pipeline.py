@@ -0,0 +1,94 @@
+#
+#  Copyright 2023 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import time
+from collections import deque
+from contextlib import contextmanager
+
+
+class BatchTimer:
+    """
+    split the wall time of one batch into crypto, wait and compute,
+    crypto and wait are timed explicitly, compute is the rest of the batch.
+    a disabled timer measures and logs nothing.
+    """
+
+    def __init__(self, enabled: bool = True):
+        self.enabled = enabled
+        self._start = time.perf_counter()
+        self._crypto = 0.0
+        self._wait = 0.0
+
+    @contextmanager
+    def crypto(self):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._crypto += time.perf_counter() - start
+
+    @contextmanager
+    def wait(self):
+        if not self.enabled:
+            yield
+            return
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._wait += time.perf_counter() - start
+
+    def to_dict(self):
+        total = time.perf_counter() - self._start
+        return {
+            "total": total,
+            "compute": max(total - self._crypto - self._wait, 0.0),
+            "crypto": self._crypto,
+            "wait": self._wait,
+        }
+
+    def log(self, ctx, name: str):
+        if self.enabled:
+            ctx.metrics.log_metrics(self.to_dict(), name=name, type="batch_time")
+
+
+class DelayedGradients:
+    """
+    batches whose gradients have been sent to the arbiter but not applied yet.
+
+    with `max_staleness` k the next batch may start while the updates of the last k batches are still in flight,
+    the weights used by a batch then miss at most k updates, as in delayed-gradient sgd.
+    0 applies each update before the next batch starts.
+    """
+
+    def __init__(self, max_staleness: int = 0):
+        self.max_staleness = max_staleness
+        self._pending = deque()
+
+    def push(self, batch_ctx):
+        """
+        add a batch whose gradient has just been sent, yield the batches whose updates must be applied now
+        """
+        self._pending.append(batch_ctx)
+        while len(self._pending) > self.max_staleness:
+            yield self._pending.popleft()
+
+    def drain(self):
+        while self._pending:
+            yield self._pending.popleft()
@@ -0,0 +1,76 @@
+#
+#  Copyright 2023 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+#
+
+import logging
+import queue
+import threading
+from typing import TYPE_CHECKING, Callable, Iterable, List, Optional, Tuple, TypeVar
+
+if TYPE_CHECKING:
+    from fate.arch import Context
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+def ctxs_parallel_map(
+    func: Callable[[int, "Context"], T],
+    indexed_ctxs: Iterable[Tuple[int, "Context"]],
+    max_workers: Optional[int] = 1,
+) -> List[T]:
+    """
+    run `func(i, ctx)` for each indexed context concurrently and return the results in order.
+
+    contexts are picked up in index order, so when every party runs the same indexed contexts the lowest unfinished
+    one is always running on all parties and the federation never deadlocks, whatever `max_workers` each party uses.
+    workers are daemon threads, the first error is raised without waiting for contexts still blocked on peers.
+    1 runs them one after another in the calling thread and is the default, since the federations of the message
+    queue backends are not thread-safe. None runs all contexts at once.
+    """
+    tasks = list(indexed_ctxs)
+    if max_workers is None:
+        max_workers = len(tasks)
+    if max_workers <= 1 or len(tasks) <= 1:
+        return [func(i, ctx) for i, ctx in tasks]
+
+    pending = queue.Queue()
+    for slot, task in enumerate(tasks):
+        pending.put((slot, task))
+    finished = queue.Queue()
+    results = [None] * len(tasks)
+
+    def _worker():
+        while True:
+            try:
+                slot, (i, ctx) = pending.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[slot] = func(i, ctx)
+            except BaseException as e:
+                logger.exception(f"task on context {i} failed")
+                finished.put(e)
+                return
+            finished.put(None)
+
+    for k in range(min(max_workers, len(tasks))):
+        threading.Thread(target=_worker, name=f"ctxs-parallel-{k}", daemon=True).start()
+    for _ in range(len(tasks)):
+        error = finished.get()
+        if error is not None:
+            raise error
+    return results
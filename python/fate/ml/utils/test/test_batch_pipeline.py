@@ -0,0 +1,97 @@
+#
+#  Copyright 2023 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import time
+
+import pytest
+from fate.ml.utils._batch_pipeline import BatchTimer, DelayedGradients
+
+
+class _Metrics(object):
+    def __init__(self):
+        self.logged = []
+
+    def log_metrics(self, values, name, type):
+        self.logged.append((name, type, values))
+
+
+class _Ctx(object):
+    def __init__(self):
+        self.metrics = _Metrics()
+
+
+def test_batch_timer_splits_wall_time():
+    timer = BatchTimer()
+    with timer.crypto():
+        time.sleep(0.02)
+    with timer.wait():
+        time.sleep(0.03)
+    time.sleep(0.01)
+    times = timer.to_dict()
+    assert times["crypto"] >= 0.02
+    assert times["wait"] >= 0.03
+    assert times["compute"] >= 0.01
+    assert times["total"] == pytest.approx(times["crypto"] + times["wait"] + times["compute"])
+
+
+def test_batch_timer_counts_time_of_failed_blocks():
+    timer = BatchTimer()
+    with pytest.raises(ValueError):
+        with timer.wait():
+            time.sleep(0.01)
+            raise ValueError()
+    assert timer.to_dict()["wait"] >= 0.01
+
+
+def test_batch_timer_log():
+    ctx = _Ctx()
+    BatchTimer().log(ctx, "lr_batch_time")
+    [(name, type, values)] = ctx.metrics.logged
+    assert (name, type) == ("lr_batch_time", "batch_time")
+    assert set(values) == {"total", "compute", "crypto", "wait"}
+
+
+def test_disabled_batch_timer_measures_and_logs_nothing():
+    ctx = _Ctx()
+    timer = BatchTimer(enabled=False)
+    with timer.crypto():
+        time.sleep(0.01)
+    with timer.wait():
+        time.sleep(0.01)
+    assert timer.to_dict()["crypto"] == timer.to_dict()["wait"] == 0.0
+    timer.log(ctx, "lr_batch_time")
+    assert not ctx.metrics.logged
+
+
+def test_delayed_gradients_without_staleness_applies_each_batch_at_once():
+    delayed_gradients = DelayedGradients(0)
+    for batch in range(5):
+        assert list(delayed_gradients.push(batch)) == [batch]
+    assert list(delayed_gradients.drain()) == []
+
+
+@pytest.mark.parametrize("max_staleness", [1, 2, 3])
+def test_delayed_gradients_bounds_staleness(max_staleness):
+    delayed_gradients = DelayedGradients(max_staleness)
+    applied = []
+    for batch in range(10):
+        ready = list(delayed_gradients.push(batch))
+        applied.extend(ready)
+        # at most max_staleness batches are in flight, updates are applied in order
+        assert batch + 1 - len(applied) == min(batch + 1, max_staleness)
+    drained = list(delayed_gradients.drain())
+    assert len(drained) == max_staleness
+    assert applied + drained == list(range(10))
+    assert list(delayed_gradients.drain()) == []
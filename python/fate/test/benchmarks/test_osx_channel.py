@@ -0,0 +1,86 @@
+import json
+import queue
+import uuid
+from concurrent import futures
+
+import grpc
+import pytest
+from fate.arch.federation.backends.osx import osx_pb2
+from fate.arch.federation.backends.osx._mq_channel import MQChannel
+from fate.arch.federation.backends.osx.osx_pb2_grpc import (
+    PrivateTransferTransportServicer,
+    add_PrivateTransferTransportServicer_to_server,
+)
+
+NUM_MESSAGES = 256
+
+
+class _LocalOSXServicer(PrivateTransferTransportServicer):
+    """
+    stand-in for an osx server, topics are in-memory queues
+    """
+
+    def __init__(self):
+        self._topics = {}
+
+    def _topic(self, topic):
+        return self._topics.setdefault(topic, queue.Queue())
+
+    def push(self, request, context):
+        self._topic(request.topic).put(request.payload)
+        return osx_pb2.TransportOutbound(code="0")
+
+    def pop(self, request, context):
+        try:
+            payload = self._topic(request.topic).get(timeout=request.timeout / 1000)
+        except queue.Empty:
+            return osx_pb2.TransportOutbound(code="E0000000601", message="pop timeout")
+        return osx_pb2.TransportOutbound(code="0", payload=payload)
+
+    def release(self, request, context):
+        self._topics.clear()
+        return osx_pb2.TransportOutbound(code="0")
+
+
+@pytest.fixture(scope="module")
+def osx_port():
+    server = grpc.server(futures.ThreadPoolExecutor(max_workers=32))
+    add_PrivateTransferTransportServicer_to_server(_LocalOSXServicer(), server)
+    port = server.add_insecure_port("127.0.0.1:0")
+    server.start()
+    yield port
+    server.stop(None)
+
+
+def _transfer(port, body):
+    topic = str(uuid.uuid1())
+    channel = MQChannel(
+        host="127.0.0.1",
+        port=port,
+        namespace="benchmark",
+        send_topic=topic,
+        receive_topic=topic,
+        src_party_id="9999",
+        src_role="guest",
+        dst_party_id="10000",
+        dst_role="host",
+    )
+    for i in range(NUM_MESSAGES):
+        header = {"partition_size": -1, "partitions": 1, "message_key": str(i)}
+        if i == NUM_MESSAGES - 1:
+            header.update(partition_size=NUM_MESSAGES, message_count=NUM_MESSAGES)
+        properties = {"message_id": "benchmark", "correlation_id": topic, "headers": json.dumps(header)}
+        channel.produce(body=body, properties=properties)
+    channel.flush()
+
+    received = 0
+    for _, received_body in channel.consume_prefetched():
+        received += len(received_body)
+        if received == NUM_MESSAGES * len(body):
+            return received
+
+
+@pytest.mark.parametrize("message_size", [1 << 10, 64 << 10, 1 << 20])
+def test_osx_channel_throughput(benchmark, osx_port, message_size):
+    body = b"x" * message_size
+    assert benchmark(_transfer, osx_port, body) == NUM_MESSAGES * message_size
@@ -0,0 +1,65 @@
+import pytest
+import torch
+from fate.ml.statistics.pearson_correlation import PearsonCorrelation
+
+# the cofactor method is o(p^4), only run it where it finishes in seconds
+REFERENCE_MAX_FEATURES = 500
+
+
+def _cofactor_vif(pearson_matrix, threshold=1e-8):
+    """
+    previous implementation, one eigvalsh per (p - 1) x (p - 1) cofactor matrix
+    """
+    n = pearson_matrix.shape[0]
+    eig, _ = torch.sort(torch.abs(torch.linalg.eigvalsh(pearson_matrix)))
+    num_drop = torch.sum(eig < threshold).item()
+    det_non_zero = torch.prod(eig[num_drop:])
+    vif = []
+    for i in range(n):
+        indexes = [j for j in range(n) if j != i]
+        cofactor_eig, _ = torch.sort(torch.abs(torch.linalg.eigvalsh(pearson_matrix[indexes][:, indexes])))
+        vif.append(torch.prod(cofactor_eig[num_drop:]) / det_non_zero)
+    return vif
+
+
+def _pearson_matrix(num_features, num_samples=None, seed=0):
+    generator = torch.Generator().manual_seed(seed)
+    num_samples = num_samples or 2 * num_features
+    data = torch.randn(num_samples, num_features, generator=generator, dtype=torch.float64)
+    data = (data - data.mean(dim=0)) / data.std(dim=0)
+    return data.T @ data / (num_samples - 1)
+
+
+@pytest.mark.parametrize("num_features", [10, 50])
+def test_vif_matches_cofactor_method(num_features):
+    corr = _pearson_matrix(num_features)
+    expected = torch.stack(_cofactor_vif(corr))
+    actual = torch.stack(PearsonCorrelation.vif_from_pearson_matrix(corr))
+    assert torch.allclose(actual, expected, rtol=1e-6)
+
+
+def test_vif_near_singular():
+    generator = torch.Generator().manual_seed(0)
+    data = torch.randn(200, 10, generator=generator, dtype=torch.float64)
+    data = torch.hstack([data, data[:, :1] + data[:, 1:2]])
+    data = (data - data.mean(dim=0)) / data.std(dim=0)
+    corr = data.T @ data / (data.shape[0] - 1)
+    vif = torch.stack(PearsonCorrelation.vif_from_pearson_matrix(corr))
+    assert torch.isfinite(vif).all()
+    # features outside the collinear group keep the vif of the cofactor method
+    expected = torch.stack(_cofactor_vif(corr))
+    assert torch.allclose(vif[2:-1], expected[2:-1], rtol=1e-6)
+
+
+@pytest.mark.parametrize("num_features", [100, 500, 1000, 2000, 5000])
+def test_vif_from_pearson_matrix(benchmark, num_features):
+    corr = _pearson_matrix(num_features)
+    vif = benchmark(PearsonCorrelation.vif_from_pearson_matrix, corr)
+    assert len(vif) == num_features
+
+
+@pytest.mark.parametrize("num_features", [100, 200, REFERENCE_MAX_FEATURES])
+def test_vif_cofactor_reference(benchmark, num_features):
+    corr = _pearson_matrix(num_features)
+    vif = benchmark.pedantic(_cofactor_vif, args=(corr,), rounds=1, iterations=1)
+    assert len(vif) == num_features
@@ -0,0 +1,35 @@
+import pytest
+from fate.arch.computing.backends.standalone import CSession
+
+# (left partitions, right partitions):
+#   matching layout joins directly,
+#   divisible layouts split the smaller table partition by partition,
+#   other layouts fall back to a full shuffle
+LAYOUTS = [(8, 8), (4, 8), (2, 8), (5, 8)]
+DATA_SIZE = 100000
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    session = CSession(data_dir=tmp_path_factory.mktemp("standalone").as_posix())
+    yield session
+    session.destroy()
+
+
+@pytest.mark.parametrize("left_partitions,right_partitions", LAYOUTS)
+def test_join(benchmark, session, left_partitions, right_partitions):
+    left = session.parallelize(((i, i) for i in range(DATA_SIZE)), partition=left_partitions)
+    right = session.parallelize(((i, -i) for i in range(DATA_SIZE)), partition=right_partitions)
+
+    result = benchmark(lambda: left.join(right, lambda x, y: x + y))
+    assert result.num_partitions == max(left_partitions, right_partitions)
+    assert result.count() == DATA_SIZE
+
+
+@pytest.mark.parametrize("num_partitions,target_partitions", [(4, 8), (8, 4), (5, 8)])
+def test_repartition(benchmark, session, num_partitions, target_partitions):
+    table = session.parallelize(((i, i) for i in range(DATA_SIZE)), partition=num_partitions)
+
+    result = benchmark(lambda: table.repartition(target_partitions))
+    assert result.count() == DATA_SIZE
+    assert dict(result.collect()) == dict(table.collect())
@@ -0,0 +1,34 @@
+import random
+
+import pytest
+from fate.arch.computing.backends.standalone import CSession
+
+DATA_SIZE = 200000
+NUM_PARTITIONS = 4
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    session = CSession(data_dir=tmp_path_factory.mktemp("standalone").as_posix())
+    yield session
+    session.destroy()
+
+
+def _skewed_keys(num_keys, seed=0):
+    # zipf-like: a handful of hot keys receive most of the records
+    rng = random.Random(seed)
+    weights = [1.0 / (i + 1) for i in range(num_keys)]
+    return rng.choices(range(num_keys), weights=weights, k=DATA_SIZE)
+
+
+@pytest.mark.parametrize("num_keys", [16, 1024, DATA_SIZE])
+def test_map_reduce_partitions(benchmark, session, num_keys):
+    keys = _skewed_keys(num_keys) if num_keys < DATA_SIZE else list(range(DATA_SIZE))
+    table = session.parallelize(enumerate(keys), partition=NUM_PARTITIONS)
+
+    def _map(kvs):
+        for _, key in kvs:
+            yield key, 1
+
+    result = benchmark(lambda: table.mapReducePartitions(_map, lambda x, y: x + y))
+    assert sum(v for _, v in result.collect()) == DATA_SIZE
@@ -0,0 +1,35 @@
+import pytest
+from fate.arch.computing.backends.standalone import CSession
+
+# small tables: the cost of an op is dominated by task dispatch and environment setup
+DATA_SIZE = 100
+NUM_PARTITIONS = 8
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    session = CSession(data_dir=tmp_path_factory.mktemp("standalone").as_posix())
+    yield session
+    session.destroy()
+
+
+@pytest.fixture(scope="module")
+def table(session):
+    return session.parallelize(((i, i) for i in range(DATA_SIZE)), partition=NUM_PARTITIONS)
+
+
+def test_map_values(benchmark, table):
+    benchmark(lambda: table.mapValues(lambda x: x + 1))
+
+
+def test_reduce(benchmark, table):
+    assert benchmark(lambda: table.reduce(lambda x, y: x + y)) == sum(range(DATA_SIZE))
+
+
+def test_count(benchmark, table):
+    assert benchmark(lambda: table.mapValues(lambda x: x).count()) == DATA_SIZE
+
+
+def test_join(benchmark, table):
+    other = table.mapValues(lambda x: -x)
+    benchmark(lambda: table.join(other, lambda x, y: x + y))
@@ -0,0 +1,46 @@
+import numpy as np
+import pandas as pd
+import pytest
+from fate.ml.nn.dataset.table import TableDataset
+from torch.utils.data import DataLoader
+
+NUM_ROWS = 20000
+BATCH_SIZE = 256
+
+
+@pytest.fixture(scope="module", params=[16, 1024])
+def csv_path(request, tmp_path_factory):
+    path = tmp_path_factory.mktemp("table_dataset") / "data.csv"
+    columns = [f"x{i}" for i in range(request.param)]
+    df = pd.DataFrame(np.random.random_sample((NUM_ROWS, request.param)), columns=columns)
+    df["y"] = np.random.randint(0, 2, NUM_ROWS)
+    df.to_csv(path, index_label="id")
+    return str(path)
+
+
+def _epoch(dataset):
+    rows = 0
+    for x, y in DataLoader(dataset, batch_size=BATCH_SIZE, shuffle=True):
+        rows += len(x)
+    return rows
+
+
+def test_table_dataset_epoch(benchmark, csv_path):
+    dataset = TableDataset()
+    dataset.load(csv_path)
+    assert benchmark(_epoch, dataset) == NUM_ROWS
+
+
+def test_table_dataset_cached_epoch(benchmark, csv_path, tmp_path):
+    TableDataset(cache_dir=str(tmp_path)).load(csv_path)
+    dataset = TableDataset(cache_dir=str(tmp_path))
+    dataset.load(csv_path)
+    assert benchmark(_epoch, dataset) == NUM_ROWS
+
+
+def test_table_dataset_getitems(csv_path):
+    dataset = TableDataset()
+    dataset.load(csv_path)
+    indices = [5, 1, 5, 42]
+    for (x, y), i in zip(dataset.__getitems__(indices), indices):
+        assert np.array_equal(x.numpy(), dataset[i][0].numpy()) and np.array_equal(y.numpy(), dataset[i][1].numpy())
@@ -0,0 +1,33 @@
+import numpy as np
+import pytest
+from fate.arch.histogram.indexer import HistogramIndexer
+
+
+@pytest.fixture
+def indexer():
+    return HistogramIndexer(4, [3, 2, 5])
+
+
+@pytest.fixture
+def samples():
+    rng = np.random.default_rng(0)
+    nids = rng.integers(0, 4, size=(20, 1))
+    bids = np.stack([rng.integers(0, size, size=20) for size in [3, 2, 5]], axis=1)
+    return nids, bids
+
+
+def test_get_positions_array(indexer, samples):
+    nids, bids = samples
+    expected = indexer.get_positions(nids.flatten().tolist(), bids.tolist())
+    assert indexer.get_positions_array(nids, bids).tolist() == expected
+
+
+@pytest.mark.parametrize("node_mapping", [{}, {1: 0}, {0: 1, 3: 0}, {2: 0, 7: 1}])
+def test_get_positions_array_with_node_mapping(indexer, samples, node_mapping):
+    nids, bids = samples
+    expected_positions, expected_masks = indexer.get_positions_with_node_mapping(
+        nids.flatten().tolist(), bids.tolist(), node_mapping
+    )
+    positions, masks = indexer.get_positions_array_with_node_mapping(nids, bids, node_mapping)
+    assert positions.tolist() == expected_positions
+    assert masks.tolist() == expected_masks
@@ -0,0 +1,143 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import functools
+import math
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import PandasReader
+from fate.arch.federation.backends.standalone import StandaloneFederation
+
+GUEST = ("guest", "10000")
+SAMPLE_NUM = 50
+PRECISION = 52
+G_OFFSET = 1
+# offset bit of binary gh as secureboost guest computes it, |g| <= 1 + offset, h <= 1
+OFFSET_BIT = int(math.log2(2**PRECISION * SAMPLE_NUM * 2) + 1)
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def kit(ctx):
+    return ctx.cipher.phe.setup(options={"kind": "paillier", "key_length": 1024})
+
+
+@pytest.fixture(scope="module")
+def grad_and_hess(ctx):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "sample_id": np.arange(SAMPLE_NUM),
+            "id": np.arange(SAMPLE_NUM),
+            "g": rng.random(SAMPLE_NUM) * 2 - 1,
+            "h": rng.random(SAMPLE_NUM),
+        }
+    )
+    return PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64").to_frame(ctx, df)
+
+
+class _CheckingEncryptor:
+    """
+    tensor encryptor that fails the partition unless it is given one float32 packed plaintext per row
+    """
+
+    def __init__(self, encryptor):
+        self._encryptor = encryptor
+
+    def lift(self, data, shape, dtype, device):
+        return self._encryptor.lift(data, shape, dtype, device)
+
+    def encrypt_encoded(self, tensor, obfuscate=False):
+        encrypted = self._encryptor.encrypt_encoded(tensor, obfuscate=obfuscate)
+        if tuple(encrypted.shape) != (len(encrypted.data), 1) or encrypted.dtype != torch.float32:
+            raise ValueError(
+                f"{len(encrypted.data)} packed rows encrypted as {tuple(encrypted.shape)} {encrypted.dtype}"
+            )
+        return encrypted
+
+
+def _apply_row_encrypt(grad_and_hess, kit):
+    """
+    the row by row packing secureboost guest used before `pack_encrypt`
+    """
+
+    def make_long_tensor(s: pd.Series, coder, pk, offset, shift_bit, precision, encryptor, pack_num=2):
+        pack_tensor = torch.Tensor(s.values)
+        pack_tensor[0] = pack_tensor[0] + offset
+        pack_vec = coder.pack_floats(pack_tensor, shift_bit, pack_num, precision)
+        en = pk.encrypt_encoded(pack_vec, obfuscate=True)
+        return encryptor.lift(en, (len(en), 1), pack_tensor.dtype, pack_tensor.device)
+
+    en_grad_hess = grad_and_hess.create_frame()
+    en_grad_hess["gh"] = grad_and_hess.apply_row(
+        functools.partial(
+            make_long_tensor,
+            coder=kit.coder,
+            pk=kit.pk,
+            offset=G_OFFSET,
+            shift_bit=OFFSET_BIT,
+            precision=PRECISION,
+            encryptor=kit.get_tensor_encryptor(),
+        )
+    )
+    return en_grad_hess
+
+
+def _decrypt_unpack(en_grad_hess, kit):
+    """
+    decrypt the shards of the gh column and unpack them, returns the shapes/dtypes of the shards and (g, h)
+    """
+    encoded = en_grad_hess["gh"].as_tensor().decrypt_encoded(kit.get_tensor_decryptor())
+    shards = [shard for _, shard in sorted(encoded.shardings._data.collect(), key=lambda kv: kv[0])]
+    gh = torch.cat(
+        [kit.coder.unpack_floats(shard.data, OFFSET_BIT, 2, PRECISION, 2 * shard.shape[0]) for shard in shards]
+    ).reshape(-1, 2)
+    return [(tuple(shard.shape), shard.dtype) for shard in shards], gh[:, 0] - G_OFFSET, gh[:, 1]
+
+
+def test_pack_encrypt_matches_apply_row(grad_and_hess, kit):
+    en_grad_hess = grad_and_hess[["g", "h"]].pack_encrypt(
+        _CheckingEncryptor(kit.get_tensor_encryptor()),
+        kit.get_tensor_coder(),
+        offset_bit=OFFSET_BIT,
+        precision=PRECISION,
+        column="gh",
+        offsets=[G_OFFSET, 0],
+    )
+    expected = _apply_row_encrypt(grad_and_hess, kit)
+    assert en_grad_hess.data_manager.blocks[-1].dtype == expected.data_manager.blocks[-1].dtype == torch.float32
+
+    shards, g, h = _decrypt_unpack(en_grad_hess, kit)
+    expected_shards, expected_g, expected_h = _decrypt_unpack(expected, kit)
+    # one packed ciphertext per row
+    assert shards == expected_shards
+    assert sum(shape[0] for shape, _ in shards) == SAMPLE_NUM
+    assert torch.equal(g, expected_g) and torch.equal(h, expected_h)
+
+    # and the values that were packed, in the same shard order
+    plain = grad_and_hess[["g", "h"]].as_tensor().shardings._data.collect()
+    plain = torch.cat([shard for _, shard in sorted(plain, key=lambda kv: kv[0])]).to(torch.float32)
+    assert torch.allclose(g, plain[:, 0], atol=1e-6) and torch.allclose(h, plain[:, 1], atol=1e-6)
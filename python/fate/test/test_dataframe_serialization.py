@@ -0,0 +1,135 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pandas as pd
+import pytest
+import torch
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import DataFrame, PandasReader
+from fate.arch.dataframe.io._json_schema import FRAME_BUFFER_FORMAT, FRAME_LIST_FORMAT, build_schema
+from fate.arch.dataframe.io._json_serialization import deserialize, serialize
+from fate.arch.dataframe.ops._transformer import transform_block_table_to_list, transform_block_to_list
+from fate.arch.federation.backends.standalone import StandaloneFederation
+
+GUEST = ("guest", "10000")
+SAMPLE_NUM = 100
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield Context(computing=computing, federation=StandaloneFederation(computing, "fed", GUEST, [GUEST]))
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def frame(ctx):
+    """
+    index, int, float and bool blocks, the first partition is empty
+    """
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame(
+        {
+            "sample_id": [f"s{i}" for i in range(SAMPLE_NUM)],
+            "id": [f"id_{i}" for i in range(SAMPLE_NUM)],
+            "y": rng.random(SAMPLE_NUM),
+            "x": rng.random(SAMPLE_NUM),
+            "n": rng.integers(-100, 100, SAMPLE_NUM),
+            "b": rng.random(SAMPLE_NUM) > 0.5,
+        }
+    )
+    reader = PandasReader(
+        sample_id_name="sample_id",
+        match_id_name="id",
+        label_name="y",
+        label_type="float64",
+        dtype={"x": "float64", "n": "int64", "b": "bool"},
+    )
+    data = reader.to_frame(ctx, df)
+    first_partition = min(k for k, _ in data.block_table.collect())
+    return _map_blocks(data, lambda k, blocks: [block[:0] for block in blocks] if k == first_partition else blocks)
+
+
+def _map_blocks(data, func):
+    items = [(k, func(k, blocks)) for k, blocks in data.block_table.collect()]
+    block_table = data._ctx.computing.parallelize(items, include_key=True, partition=data.block_table.num_partitions)
+    return DataFrame(data._ctx, block_table, data.partition_order_mappings, data.data_manager.duplicate())
+
+
+def _list_serialize(data):
+    serialize_data = transform_block_table_to_list(data.block_table, data.data_manager)
+    serialize_data.schema = build_schema(data, data_format=FRAME_LIST_FORMAT)
+    return serialize_data
+
+
+def _rows(data):
+    fields_loc = data.data_manager.get_fields_loc()
+    return {k: transform_block_to_list(blocks, fields_loc) for k, blocks in data.block_table.collect()}
+
+
+def _assert_blocks_equal(blocks, expected_blocks):
+    assert len(blocks) == len(expected_blocks)
+    for block, expected in zip(blocks, expected_blocks):
+        assert type(block) == type(expected)
+        if isinstance(expected, torch.Tensor):
+            assert block.dtype == expected.dtype
+            assert torch.equal(block, expected)
+        else:
+            assert block.dtype == expected.dtype
+            assert block.tolist() == expected.tolist()
+
+
+def test_buffer_round_trip(ctx, frame):
+    serialized = serialize(ctx, frame)
+    assert serialized.schema["format"] == FRAME_BUFFER_FORMAT
+    restored = dict(deserialize(ctx, serialized).block_table.collect())
+    for k, blocks in frame.block_table.collect():
+        _assert_blocks_equal(restored[k], blocks)
+    assert any(len(blocks[0]) == 0 for blocks in restored.values())
+
+
+def test_buffer_and_list_readers_agree(ctx, frame):
+    from_buffer = _rows(deserialize(ctx, serialize(ctx, frame)))
+    from_list = _rows(deserialize(ctx, _list_serialize(frame)))
+    assert from_buffer == from_list == _rows(frame)
+
+
+def test_numeric_index_keeps_dtype(ctx, frame):
+    match_id_bid = frame.data_manager.loc_block(frame.schema.match_id_name, with_offset=False)
+    data = _map_blocks(
+        frame,
+        lambda k, blocks: [
+            pd.Index(np.arange(len(block), dtype=np.int64) * 3) if bid == match_id_bid else block
+            for bid, block in enumerate(blocks)
+        ],
+    )
+    restored = dict(deserialize(ctx, serialize(ctx, data)).block_table.collect())
+    for k, blocks in data.block_table.collect():
+        assert restored[k][match_id_bid].dtype == np.int64
+        _assert_blocks_equal(restored[k], blocks)
+
+
+def test_blocks_sharing_storage(ctx, frame):
+    label_bid = frame.data_manager.loc_block(frame.schema.label_name, with_offset=False)
+    x_bid, _ = frame.data_manager.loc_block("x", with_offset=True)
+    # the label block aliases the feature block
+    data = _map_blocks(
+        frame, lambda k, blocks: [blocks[x_bid] if bid == label_bid else block for bid, block in enumerate(blocks)]
+    )
+    restored = dict(deserialize(ctx, serialize(ctx, data)).block_table.collect())
+    for k, blocks in data.block_table.collect():
+        _assert_blocks_equal(restored[k], blocks)
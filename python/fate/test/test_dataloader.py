@@ -0,0 +1,161 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import multiprocessing
+import uuid
+
+import numpy as np
+import pandas as pd
+import pytest
+from fate.arch import Context
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.dataframe import DataLoader, PandasReader
+from fate.arch.dataframe.utils._dataloader import _permute_positions
+from fate.arch.federation.backends.standalone import StandaloneFederation
+
+GUEST = ("guest", "10000")
+HOST = ("host", "9999")
+SAMPLE_NUM = 1000
+BATCH_SIZE = 96
+EPOCHS = 3
+
+
+def _create_ctx(computing, federation_id, local, parties):
+    federation = StandaloneFederation(computing, federation_id, local, parties)
+    return Context(computing=computing, federation=federation)
+
+
+def _to_frame(ctx, scale):
+    # the feature of a sample is its sample id times scale, so batches can be traced back to sample ids
+    df = pd.DataFrame({"sample_id": np.arange(SAMPLE_NUM), "x": np.arange(SAMPLE_NUM, dtype=np.float64) * scale})
+    df["id"] = df["sample_id"]
+    return PandasReader(sample_id_name="sample_id", match_id_name="id", dtype="float64").to_frame(ctx, df)
+
+
+def _batch_sample_ids(loader, scale=1, epochs=EPOCHS):
+    return [
+        [np.rint(batch.x.shardings.merge().numpy().ravel() / scale).astype(np.int64) for batch in loader]
+        for _ in range(epochs)
+    ]
+
+
+@pytest.fixture(scope="module")
+def ctx(tmp_path_factory):
+    computing = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield _create_ctx(computing, uuid.uuid1().hex, GUEST, [GUEST])
+    computing.destroy()
+
+
+@pytest.fixture(scope="module")
+def dataset(ctx):
+    return _to_frame(ctx, 1)
+
+
+def test_permute_positions_is_a_permutation():
+    rng = np.random.default_rng(0)
+    for row_num in [1, 2, 3, 100, 1000, 4097]:
+        round_keys = rng.integers(0, 2**63, 4).tolist()
+        permuted = _permute_positions(np.arange(row_num, dtype=np.int64), row_num, round_keys)
+        np.testing.assert_array_equal(np.sort(permuted), np.arange(row_num))
+
+
+@pytest.mark.parametrize("shuffle", [False, True])
+@pytest.mark.parametrize("prefetch", [False, True])
+def test_batches_cover_every_sample_once(ctx, dataset, shuffle, prefetch):
+    loader = DataLoader(
+        dataset, ctx=ctx, mode="local", role="guest", batch_size=BATCH_SIZE, shuffle=shuffle, prefetch=prefetch
+    )
+    for batches in _batch_sample_ids(loader):
+        assert [len(batch) for batch in batches[:-1]] == [BATCH_SIZE] * (len(batches) - 1)
+        assert len(batches[-1]) == SAMPLE_NUM - BATCH_SIZE * (len(batches) - 1)
+        np.testing.assert_array_equal(np.sort(np.concatenate(batches)), np.arange(SAMPLE_NUM))
+
+
+def test_no_shuffle_keeps_batches(ctx, dataset):
+    loader = DataLoader(dataset, ctx=ctx, mode="local", role="guest", batch_size=BATCH_SIZE, shuffle=False)
+    epochs = _batch_sample_ids(loader)
+    for batches in epochs[1:]:
+        for batch, first_batch in zip(batches, epochs[0]):
+            np.testing.assert_array_equal(batch, first_batch)
+
+
+def test_shuffle_changes_batches_every_epoch(ctx, dataset):
+    loader = DataLoader(
+        dataset, ctx=ctx, mode="local", role="guest", batch_size=BATCH_SIZE, shuffle=True, random_state=42
+    )
+    epochs = [[frozenset(batch.tolist()) for batch in batches] for batches in _batch_sample_ids(loader)]
+    for i in range(1, EPOCHS):
+        assert epochs[i] != epochs[i - 1]
+    # batches are not runs of neighbouring samples
+    for batch in epochs[0][:-1]:
+        assert max(batch) - min(batch) > 2 * BATCH_SIZE
+
+    same_state = DataLoader(
+        dataset, ctx=ctx, mode="local", role="guest", batch_size=BATCH_SIZE, shuffle=True, random_state=42
+    )
+    assert [[frozenset(batch.tolist()) for batch in batches] for batches in _batch_sample_ids(same_state)] == epochs
+
+
+def _iterate_hetero(data_dir, federation_id, local, scale, shuffle, prefetch, result_queue):
+    try:
+        computing = CSession(data_dir=data_dir)
+        ctx = _create_ctx(computing, federation_id, local, [GUEST, HOST])
+        loader = DataLoader(
+            _to_frame(ctx, scale),
+            ctx=ctx,
+            mode="hetero",
+            role=local[0],
+            batch_size=BATCH_SIZE,
+            shuffle=shuffle,
+            random_state=7,
+            prefetch=prefetch,
+        )
+        result_queue.put((local, _batch_sample_ids(loader, scale)))
+    except Exception as e:
+        result_queue.put((local, e))
+
+
+@pytest.mark.parametrize("shuffle,prefetch", [(False, False), (True, False), (True, True)])
+def test_guest_and_host_batches_agree(tmp_path, shuffle, prefetch):
+    # parties of the standalone federation run in their own processes
+    mp_ctx = multiprocessing.get_context("spawn")
+    result_queue = mp_ctx.Queue()
+    federation_id = uuid.uuid1().hex
+    processes = [
+        mp_ctx.Process(
+            target=_iterate_hetero,
+            args=(tmp_path.as_posix(), federation_id, local, scale, shuffle, prefetch, result_queue),
+        )
+        for local, scale in [(GUEST, 1), (HOST, 10)]
+    ]
+    for process in processes:
+        process.start()
+    results = {}
+    try:
+        # a failed party leaves the other one waiting, so stop at the first error
+        while len(results) < len(processes):
+            local, result = result_queue.get(timeout=300)
+            if isinstance(result, Exception):
+                raise result
+            results[local] = result
+    finally:
+        for process in processes:
+            process.terminate()
+            process.join()
+
+    for guest_batches, host_batches in zip(results[GUEST], results[HOST]):
+        assert len(guest_batches) == len(host_batches)
+        for guest_batch, host_batch in zip(guest_batches, host_batches):
+            np.testing.assert_array_equal(guest_batch, host_batch)
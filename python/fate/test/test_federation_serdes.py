@@ -0,0 +1,117 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import numpy as np
+import pytest
+import torch
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.config import cfg
+from fate.arch.federation.api._serdes import (
+    TableRemotePersistentPickler,
+    TableRemotePersistentUnpickler,
+    _FederationBytesCoder,
+)
+
+PARTY = ("host", "9999")
+
+
+class _LoopbackFederation(object):
+    """
+    keeps what is pushed so that it can be pulled back
+    """
+
+    local_party = ("guest", "10000")
+
+    def __init__(self):
+        self.bytes = {}
+        self.tables = {}
+
+    def push_bytes(self, v, name, tag, parties):
+        self.bytes[(name, tag)] = v
+
+    def push_table(self, table, name, tag, parties):
+        self.tables[(name, tag)] = table
+
+    def pull_table(self, name, tag, parties, table_metas):
+        return [self.tables[(name, tag)]]
+
+
+@pytest.fixture(scope="module")
+def computing(tmp_path_factory):
+    session = CSession(data_dir=tmp_path_factory.mktemp("computing").as_posix())
+    yield session
+    session.destroy()
+
+
+def _value():
+    return {
+        "tensor": torch.arange(3000, dtype=torch.float64).reshape(1000, 3),
+        "transposed": torch.arange(12, dtype=torch.int64).reshape(3, 4).T,
+        "array": np.random.default_rng(0).random((500, 2)),
+        "bf16": torch.ones(4, dtype=torch.bfloat16),
+        "meta": ["a", 1, 2.0],
+    }
+
+
+def _round_trip(computing, value, max_message_size, options):
+    federation = _LoopbackFederation()
+    with cfg.temp_override(options):
+        TableRemotePersistentPickler.push(
+            value, federation, computing, "value", "tag", [PARTY], max_message_size, num_partitions_of_slice_table=3
+        )
+    mode = _FederationBytesCoder.decode_mode(federation.bytes[("value", "tag")])
+    pulled = TableRemotePersistentUnpickler.pull(
+        federation.bytes[("value", "tag")], None, federation, "value", "tag", PARTY
+    )
+    return mode, pulled
+
+
+def _assert_equal(pulled, value):
+    assert pulled.keys() == value.keys()
+    for k, v in value.items():
+        if isinstance(v, torch.Tensor):
+            assert pulled[k].dtype == v.dtype
+            assert torch.equal(pulled[k], v)
+        elif isinstance(v, np.ndarray):
+            np.testing.assert_array_equal(pulled[k], v)
+        else:
+            assert pulled[k] == v
+
+
+def test_out_of_band_is_off_by_default(computing):
+    # safetensors in the plain format only takes contiguous tensors
+    value = {k: v for k, v in _value().items() if k != "transposed"}
+    mode, pulled = _round_trip(computing, value, 1 << 30, {})
+    assert mode == _FederationBytesCoder.BASE
+    _assert_equal(pulled, value)
+
+
+@pytest.mark.parametrize(
+    "max_message_size,expected_mode",
+    [(1 << 30, _FederationBytesCoder.FRAMED_BASE), (4096, _FederationBytesCoder.FRAMED_SPLIT)],
+)
+@pytest.mark.parametrize("codec", ["none", "zstd", "lz4"])
+def test_framed_round_trip(computing, max_message_size, expected_mode, codec):
+    options = {
+        "federation.pickle.out_of_band": True,
+        "federation.pickle.compress_threshold": 0,
+        "federation.pickle.compress_codec": codec,
+    }
+    mode, pulled = _round_trip(computing, _value(), max_message_size, options)
+    assert mode == expected_mode
+    _assert_equal(pulled, _value())
+    # arrays rebuilt from received bytes can be updated in place
+    pulled["tensor"] += 1
+    pulled["array"] += 1
@@ -0,0 +1,48 @@
+import pytest
+from fate.arch.federation.message_queue._datastream import (
+    BINARY_CONTENT_TYPE,
+    JSON_CONTENT_TYPE,
+    create_datastream,
+    decode_datastream,
+)
+
+KVS = [(b"k1", b"\x00\x01\x02"), (b"", b"empty-key"), (b"empty-value", b""), (b"\xff" * 17, b"\xfe" * 1024)]
+
+
+@pytest.mark.parametrize("content_type", [BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE])
+def test_datastream_round_trip(content_type):
+    datastream = create_datastream(content_type)
+    for k, v in KVS:
+        datastream.append(k, v)
+    assert len(datastream) == len(KVS)
+    data = datastream.get_data()
+    assert decode_datastream(content_type, data) == KVS
+
+
+@pytest.mark.parametrize("content_type", [BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE])
+def test_datastream_size_is_exact(content_type):
+    datastream = create_datastream(content_type)
+    expected = datastream.get_size()
+    for k, v in KVS:
+        # the first json record is not preceded by a ","
+        separator_size = 1 if content_type == JSON_CONTENT_TYPE and not datastream else 0
+        expected += datastream.get_record_size(k, v) - separator_size
+        datastream.append(k, v)
+        assert datastream.get_size() == expected
+    # json streams are closed with a trailing "]"
+    assert len(datastream.get_data()) == expected + (1 if content_type == JSON_CONTENT_TYPE else 0)
+
+
+def test_binary_datastream_smaller_than_json():
+    binary, text = create_datastream(BINARY_CONTENT_TYPE), create_datastream(JSON_CONTENT_TYPE)
+    for k, v in KVS:
+        binary.append(k, v)
+        text.append(k, v)
+    assert len(binary.get_data()) * 2 < len(text.get_data())
+
+
+def test_truncated_binary_datastream():
+    datastream = create_datastream(BINARY_CONTENT_TYPE)
+    datastream.append(b"key", b"value")
+    with pytest.raises(ValueError):
+        decode_datastream(BINARY_CONTENT_TYPE, datastream.get_data()[:-1])
@@ -0,0 +1,159 @@
+#
+#  Copyright 2019 The FATE Authors. All Rights Reserved.
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
+
+import json
+
+import pytest
+from fate.arch.federation.message_queue._datastream import BINARY_CONTENT_TYPE, JSON_CONTENT_TYPE
+from fate.arch.federation.message_queue._federation import MessageQueueBasedFederation
+from fate.arch.federation.message_queue._parties import Party
+
+GUEST = ("guest", "9999")
+HOST = ("host", "10000")
+KVS = [(f"key_{i}".encode(), bytes(range(i % 256)) * 4) for i in range(200)]
+
+
+class _Channel(object):
+    def __init__(self, federation, dst_party_id, dst_role):
+        self._federation = federation
+        self._dst_party_id = dst_party_id
+        self._dst_role = dst_role
+
+    def produce(self, body, properties):
+        self._federation.messages.append((properties, body))
+
+    def cancel(self):
+        pass
+
+
+class _MemoryFederation(MessageQueueBasedFederation):
+    """
+    one in memory queue, messages not acked are delivered again on the next consume, like a message queue does
+    """
+
+    def __init__(self, table_wire_format=None, max_message_size=1024):
+        super().__init__("session", None, GUEST, [GUEST, HOST], None, max_message_size, None, None, table_wire_format)
+        self.messages = []
+        self.acked = set()
+
+    def _get_channel(self, topic_pair, src_party_id, src_role, dst_party_id, dst_role, mq=None, conf=None):
+        return _Channel(self, dst_party_id, dst_role)
+
+    def _get_consume_message(self, channel_info):
+        for i, (properties, body) in enumerate(self.messages):
+            if i not in self.acked:
+                yield i, properties, body
+
+    def _consume_ack(self, channel_info, id):
+        self.acked.add(id)
+
+    def send(self, kvs):
+        self._partition_send(
+            index=0,
+            kvs=kvs,
+            name="name",
+            tag="tag",
+            partitions=1,
+            party_topic_infos=[[(Party(*HOST), "name-0", None)]],
+            src_party_id=GUEST[1],
+            src_role=GUEST[0],
+            mq=None,
+            max_message_size=self._max_message_size,
+            conf=None,
+            content_type=self._table_content_type,
+        )
+
+    def receive(self):
+        return self._partition_receive(
+            index=0,
+            name="name",
+            tag="tag",
+            src_party_id=HOST[1],
+            src_role=HOST[0],
+            dst_party_id=GUEST[1],
+            dst_role=GUEST[0],
+            topic_infos=[(Party(*GUEST), "name-0", None)],
+            mq=None,
+            conf=None,
+        )
+
+
+def _json_only_receive(messages):
+    # how receivers of versions without the binary format decode a partition
+    kvs = []
+    for properties, body in messages:
+        if properties["content_type"] != JSON_CONTENT_TYPE:
+            raise ValueError(f"content_type is {properties['content_type']}, but must be {JSON_CONTENT_TYPE}")
+        kvs.extend((bytes.fromhex(el["k"]), bytes.fromhex(el["v"])) for el in json.loads(body.decode()))
+    return kvs
+
+
+def test_json_only_receiver_decodes_default_sender():
+    federation = _MemoryFederation()
+    federation.send(KVS)
+    assert len(federation.messages) > 1
+    assert _json_only_receive(federation.messages) == KVS
+
+
+def test_json_only_receiver_rejects_binary_sender():
+    federation = _MemoryFederation(table_wire_format="binary")
+    federation.send(KVS)
+    assert {properties["content_type"] for properties, _ in federation.messages} == {BINARY_CONTENT_TYPE}
+    with pytest.raises(ValueError):
+        _json_only_receive(federation.messages)
+
+
+@pytest.mark.parametrize("table_wire_format", ["json", "binary"])
+def test_receiver_decodes_both_formats(table_wire_format):
+    federation = _MemoryFederation(table_wire_format=table_wire_format)
+    federation.send(KVS)
+    assert list(federation.receive()) == KVS
+    assert federation.acked == set(range(len(federation.messages)))
+
+
+def test_receive_acks_a_message_after_its_pairs_are_consumed():
+    federation = _MemoryFederation(table_wire_format="binary")
+    federation.send(KVS)
+    received = federation.receive()
+    first_message_size = None
+    consumed = []
+    for kv in received:
+        consumed.append(kv)
+        if first_message_size is None and federation.acked:
+            # the first message is acked when the first pair of the second one is pulled
+            first_message_size = len(consumed) - 1
+    assert consumed == KVS
+    assert 0 < first_message_size < len(KVS)
+    assert federation.acked == set(range(len(federation.messages)))
+
+
+def test_receive_closed_early_redelivers_the_unfinished_message():
+    federation = _MemoryFederation(table_wire_format="binary")
+    federation.send(KVS)
+    received = federation.receive()
+    consumed = [next(received) for _ in range(3)]
+    received.close()
+    # pairs of the unfinished message may not have been written, so it is left for the next consumer
+    assert not federation.acked
+    redelivered = federation.receive()
+    assert [next(redelivered) for _ in range(3)] == consumed
+    redelivered.close()
+
+    received = federation.receive()
+    with pytest.raises(RuntimeError):
+        for i, _ in enumerate(received):
+            if i == len(KVS) - 1:
+                raise RuntimeError("failed writing the last pair")
+    assert federation.acked == set(range(len(federation.messages) - 1))
@@ -31,3 +31,51 @@ def test_pack_squeeze():
     c_pack = sk.decrypt_to_encoded(ec_pack)
     c = coder.unpack_floats(c_pack, offset_bit, pack_num * pack_packed_num, precision, 5)
     assert torch.allclose(vec1 + vec2, c, rtol=1e-3, atol=1e-3)
+
+
+def test_obfuscator_pool():
+    from fate.arch.tensor.phe import PHEObfuscatorPool
+
+    sk, pk, coder = keygen(1024)
+    pool = PHEObfuscatorPool(pk, coder, evaluator, pool_size=8, refill_threads=1, chunk_size=4)
+    vec = torch.tensor([0.1, -0.2, 0.3, 0.4, 0.5, 0.6, 0.7, 0.8, 0.9, 1.0], dtype=torch.float64)
+    encrypted = pk.encrypt_encoded(coder.encode_tensor(vec), obfuscate=False)
+    obfuscated = pool.obfuscate(encrypted)
+    assert pool.hits + pool.misses == len(vec)
+    decrypted = coder.decode_tensor(sk.decrypt_to_encoded(obfuscated), torch.float64)
+    assert torch.allclose(vec, decrypted)
+    pool.close()
+
+
+def _refill_threads():
+    import threading
+
+    return [thread for thread in threading.enumerate() if thread.name.startswith("phe-obfuscator")]
+
+
+def test_obfuscator_pool_is_opt_in():
+    from fate.arch import Context
+
+    kit = Context().cipher.phe.setup(options={"kind": "paillier", "key_length": 1024})
+    assert kit.get_tensor_encryptor().obfuscator is None
+
+
+def test_obfuscator_pool_is_closed_with_cipher():
+    import gc
+
+    from fate.arch import Context
+
+    kit = Context().cipher.phe.setup(options={"kind": "paillier", "key_length": 1024, "obfuscator_pool_size": 8})
+    encryptor, decryptor = kit.get_tensor_encryptor(), kit.get_tensor_decryptor()
+    pool = encryptor.obfuscator
+    vec = torch.tensor([0.1, -0.2, 0.3], dtype=torch.float64)
+    assert torch.allclose(vec, decryptor.decrypt_tensor(encryptor.encrypt_tensor(vec, obfuscate=True)))
+
+    # releasing the cipher stops the pool, encryptors still in use encrypt without it
+    del kit
+    gc.collect()
+    assert pool._closed and encryptor.obfuscator is None
+    assert torch.allclose(vec, decryptor.decrypt_tensor(encryptor.encrypt_tensor(vec, obfuscate=True)))
+    for thread in _refill_threads():
+        thread.join(timeout=5)
+    assert not _refill_threads()
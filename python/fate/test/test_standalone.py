@@ -0,0 +1,180 @@
+import os
+import shutil
+import threading
+import time
+from pathlib import Path
+
+import pytest
+from fate.arch.computing.backends.standalone import CSession
+from fate.arch.computing.backends.standalone import _standalone
+
+DATA_SIZE = 100
+NUM_PARTITIONS = 4
+
+
+@pytest.fixture(scope="module")
+def session(tmp_path_factory):
+    session = CSession(data_dir=tmp_path_factory.mktemp("standalone").as_posix())
+    yield session
+    session.destroy()
+
+
+@pytest.fixture(scope="module")
+def table(session):
+    return session.parallelize(((i, i) for i in range(DATA_SIZE)), partition=NUM_PARTITIONS)
+
+
+@pytest.fixture
+def federations(session, request):
+    """
+    standalone federations of a guest sending to two hosts
+    """
+    raw_session = session.get_standalone_session()
+    parties = [("guest", "9999"), ("host", "10000"), ("host", "10001")]
+    federations = [_standalone.Federation.create(raw_session, request.node.name, party) for party in parties]
+    yield federations
+    for federation in federations:
+        federation._meta.close()
+
+
+@pytest.fixture
+def meta(tmp_path):
+    meta = _standalone._FederationMetaManager(
+        data_dir=tmp_path.as_posix(), session_id="notify", party=("host", "10000")
+    )
+    yield meta
+    meta.close()
+
+
+def _wait_status_in_thread(meta, key):
+    waiter = threading.Thread(target=meta.wait_status_set, args=(key,), daemon=True)
+    waiter.start()
+    # let the waiter block on the pipe before the status is set
+    time.sleep(0.2)
+    return waiter
+
+
+def _table_exists(session, table):
+    return (
+        _standalone._TableMetaManager.get_table_meta(
+            session.get_standalone_session().data_dir, table.namespace, table.name
+        )
+        is not None
+    )
+
+
+def test_reduce(table):
+    assert table.reduce(lambda x, y: x + y) == sum(range(DATA_SIZE))
+
+
+def test_reduce_after_map_values(table):
+    assert table.mapValues(lambda x: 2 * x).reduce(lambda x, y: x + y) == 2 * sum(range(DATA_SIZE))
+
+
+def test_env_cache_closes_envs_of_removed_tables(tmp_path):
+    cache = _standalone._EnvCache(max_size=8)
+    removed, kept = Path(tmp_path, "removed"), Path(tmp_path, "kept")
+    with cache.open(removed):
+        pass
+    # removed by another process, the cache is not invalidated
+    shutil.rmtree(removed)
+    with cache.open(kept):
+        pass
+    assert list(cache._entries) == [kept.as_posix()]
+
+
+def test_env_cache_closes_env_removed_while_in_use(tmp_path):
+    cache = _standalone._EnvCache(max_size=8)
+    path = Path(tmp_path, "table")
+    with cache.open(path):
+        shutil.rmtree(path)
+    assert not cache._entries
+
+
+def test_release_ref(tmp_path):
+    meta = _standalone._FederationMetaManager(data_dir=tmp_path.as_posix(), session_id="ref", party=("host", "10000"))
+    meta.set_ref_count(b"shared", 2)
+    assert meta.release_ref(b"shared") == 1
+    assert meta.release_ref(b"shared") == 0
+    # the count is dropped with the last release
+    assert meta._get(meta.REF_COUNT_TABLE_NAME, b"shared") is None
+    assert meta.release_ref(b"shared") == 0
+    meta.close()
+
+
+def test_push_table_shares_one_copy_until_last_release(session, table, federations):
+    guest, host_a, host_b = federations
+    guest.push_table(table.table, "shared", "0", [host_a._party, host_b._party])
+    (received_a,) = host_a.pull_table("shared", "0", [guest._party])
+    (received_b,) = host_b.pull_table("shared", "0", [guest._party])
+
+    # one copy, apart from the pushed table
+    assert (received_a.name, received_a.namespace) == (received_b.name, received_b.namespace)
+    assert received_a.name != table.table.name
+
+    # destroying twice releases once, so the copy is still there for host_b
+    received_a.destroy()
+    received_a.destroy()
+    assert _table_exists(session, received_b)
+    assert received_b.count() == DATA_SIZE
+
+    received_b.destroy()
+    assert not _table_exists(session, received_b)
+    assert table.count() == DATA_SIZE
+
+
+def test_push_table_destroy_before_other_receiver_acks(session, table, federations):
+    guest, host_a, host_b = federations
+    guest.push_table(table.table, "shared", "0", [host_a._party, host_b._party])
+    (received_a,) = host_a.pull_table("shared", "0", [guest._party])
+    received_a.destroy()
+
+    # host_b has not pulled, so its status is not acked yet and the table is kept for it
+    assert host_b._meta.get_status(guest._federation_object_key("shared", "0", guest._party, host_b._party))
+    assert _table_exists(session, received_a)
+    (received_b,) = host_b.pull_table("shared", "0", [guest._party])
+    assert received_b.count() == DATA_SIZE
+
+    received_b.destroy()
+    assert not _table_exists(session, received_b)
+
+
+def test_wait_status_wakes_on_notify(meta, monkeypatch):
+    # a waiter only woken by the poll timeout would not return in time
+    monkeypatch.setattr(_standalone, "FEDERATION_NOTIFY_TIMEOUT", 60)
+    waiter = _wait_status_in_thread(meta, b"status")
+    meta.set_status(meta.party, b"status", b"value")
+    waiter.join(5)
+    assert not waiter.is_alive()
+
+
+def test_wait_status_polls_when_notification_missed(meta, monkeypatch):
+    monkeypatch.setattr(_standalone, "FEDERATION_NOTIFY_TIMEOUT", 0.05)
+    waiter = _wait_status_in_thread(meta, b"status")
+    # set without notifying
+    meta._set(meta._get_status_table_name(meta.party), b"status", b"value")
+    waiter.join(5)
+    assert not waiter.is_alive()
+
+
+def test_wait_status_polls_without_named_pipes(meta, monkeypatch):
+    monkeypatch.delattr(os, "mkfifo")
+    meta._notifier = _standalone._FederationNotifier(meta._get_notify_fifo_path(meta.party))
+    waiter = _wait_status_in_thread(meta, b"status")
+    meta.set_status(meta.party, b"status", b"value")
+    waiter.join(5)
+    assert not waiter.is_alive()
+    assert meta._notifier._read_fd is None
+
+
+def test_federation_destroy_closes_notifier(session):
+    federation = _standalone.Federation.create(session.get_standalone_session(), "notify_destroy", ("host", "10000"))
+    federation._meta.set_status(federation._party, b"status", b"value")
+    federation._meta.wait_status_set(b"status")
+    notifier = federation._meta._notifier
+    assert notifier._read_fd is not None and notifier._write_fd is not None
+
+    federation.destroy()
+    assert notifier._read_fd is None and notifier._write_fd is None
+    # nobody listens on the pipe anymore, notifying it is a no-op
+    _standalone._FederationNotifier.notify(federation._meta._get_notify_fifo_path(federation._party))